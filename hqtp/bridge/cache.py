@@ -0,0 +1,192 @@
+import hashlib
+import marshal
+import os
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from ..sat.cnf import CNFFormula, Clause, Literal
+from ..sat.symmetry import ClauseGraph
+
+@dataclass
+class CanonicalCNF:
+    """
+    A clause set relabeled into canonical form
+    
+    Canonical variable k+1 is the input variable variables[k]; canonical
+    clause i (signed literals, sorted) came from input clause sources[i].
+    """
+    fingerprint: str
+    variables: List[int]
+    clauses: List[Tuple[int, ...]]
+    sources: List[int]
+
+def canonical_form(clauses: List[Clause], max_vertices: int = 20000) -> CanonicalCNF:
+    """
+    Relabel clauses so that renumbering variables or reordering clauses
+    gives the same result
+    
+    The variable order comes from the discrete coloring reached by color
+    refinement of the clause-literal graph (positive literals, negative
+    literals and clauses colored apart), individualizing the first vertex
+    of the target cell whenever refinement stalls. The fingerprint hashes
+    the relabeled clauses themselves, so distinct formulas never share
+    one; a formula that needed individualization may occasionally get a
+    different fingerprint than a renumbered copy, which only costs a cache
+    miss. Above max_vertices the input numbering is kept and only clause
+    order is normalized.
+    """
+    variables = sorted({lit.var for clause in clauses for lit in clause.literals})
+    local = {var: k + 1 for k, var in enumerate(variables)}
+    formula = CNFFormula()
+    formula.num_vars = len(variables)
+    for clause in clauses:
+        formula.add_clause(Clause([Literal(local[lit.var], lit.positive) for lit in clause.literals]))
+    
+    order = list(range(1, len(variables) + 1))
+    graph = ClauseGraph(formula)
+    if 0 < graph.size <= max_vertices:
+        num_literals = 2 * len(variables)
+        colors = graph.refine([v % 2 if v < num_literals else 2 for v in range(graph.size)])
+        while True:
+            cell = graph.target_cell(colors)
+            if cell is None:
+                break
+            colors = graph.refine(graph.individualize(colors, cell[0]))
+        order.sort(key=lambda var: colors[graph.vertex(var, True)])
+    
+    rank = {var: k + 1 for k, var in enumerate(order)}
+    relabeled = [tuple(sorted({rank[lit.var] if lit.positive else -rank[lit.var]
+                               for lit in clause.literals}, key=lambda l: (abs(l), l < 0)))
+                 for clause in formula.clauses]
+    sources = sorted(range(len(relabeled)), key=relabeled.__getitem__)
+    canonical = [relabeled[i] for i in sources]
+    return CanonicalCNF(hashlib.sha256(marshal.dumps(canonical)).hexdigest(),
+                        [variables[var - 1] for var in order], canonical, sources)
+
+class ResultCache:
+    """
+    Verdicts for clause sets, keyed by canonical fingerprint
+    
+    Results are ('sat', {var: value}) with a model covering every variable
+    of the clauses, or ('unsat', core) where core lists indices of clauses
+    forming an unsatisfiable core (None: all of them). They are stored in
+    canonical numbering and translated back for whoever asks, so a hit
+    works across renumbered and reordered copies.
+    
+    Entries live in an in-memory LRU bounded by max_bytes of encoded data.
+    With a path, they are also written to an SQLite database that any
+    number of processes and runs can share; a memory miss falls back to
+    the database.
+    """
+    
+    def __init__(self, max_bytes: int = 64 << 20, path: Optional[str] = None,
+                 max_vertices: int = 20000):
+        """
+        Args:
+            max_bytes: Bound on encoded entries kept in memory
+            path: SQLite database for persistence (created if missing)
+            max_vertices: Largest clause-literal graph canonicalized fully
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_vertices = max_vertices
+        self.entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._db = None
+        self._db_pid = None
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Database connection of this process (connections do not survive fork)"""
+        if self.path is None:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(fingerprint TEXT PRIMARY KEY, data BLOB NOT NULL)')
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+    
+    def _remember(self, fingerprint: str, data: bytes):
+        old = self.entries.pop(fingerprint, None)
+        if old is not None:
+            self.bytes -= len(fingerprint) + len(old)
+        self.entries[fingerprint] = data
+        self.bytes += len(fingerprint) + len(data)
+        while self.bytes > self.max_bytes and self.entries:
+            key, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(key) + len(evicted)
+            self.evictions += 1
+    
+    def _load(self, fingerprint: str) -> Optional[bytes]:
+        data = self.entries.get(fingerprint)
+        if data is not None:
+            self.entries.move_to_end(fingerprint)
+            self.hits += 1
+            return data
+        db = self._connection()
+        if db is not None:
+            row = db.execute('SELECT data FROM results WHERE fingerprint = ?',
+                             (fingerprint,)).fetchone()
+            if row is not None:
+                self._remember(fingerprint, row[0])
+                self.disk_hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+    
+    def get(self, clauses: List[Clause], canonical: CanonicalCNF = None) -> Optional[tuple]:
+        """Cached result for clauses in their own numbering, or None"""
+        canonical = canonical or canonical_form(clauses, self.max_vertices)
+        data = self._load(canonical.fingerprint)
+        if data is None:
+            return None
+        status, payload = marshal.loads(data)
+        if status == 'sat':
+            return ('sat', {var: bool(bit) for var, bit in zip(canonical.variables, payload)})
+        core = None if payload is None else sorted(canonical.sources[i] for i in payload)
+        return ('unsat', core)
+    
+    def put(self, clauses: List[Clause], result: tuple, canonical: CanonicalCNF = None):
+        """Store a ('sat', model) or ('unsat', core) result for clauses"""
+        canonical = canonical or canonical_form(clauses, self.max_vertices)
+        status, payload = result
+        if status == 'sat':
+            payload = bytes(int(bool(payload[var])) for var in canonical.variables)
+        elif payload is not None:
+            position = {source: i for i, source in enumerate(canonical.sources)}
+            payload = tuple(sorted(position[index] for index in payload))
+        data = marshal.dumps((status, payload))
+        
+        self._remember(canonical.fingerprint, data)
+        self.stores += 1
+        db = self._connection()
+        if db is not None:
+            db.execute('INSERT OR REPLACE INTO results VALUES (?, ?)',
+                       (canonical.fingerprint, data))
+            db.commit()
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+    
+    def close(self):
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+        self._db = None
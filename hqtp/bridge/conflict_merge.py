@@ -1,7 +1,108 @@
-from typing import List, Any
-from ..sat.cnf import Clause
+import time
+from typing import List, Optional
+from ..sat.cdcl import CDCLSolver
+from ..sat.cnf import Clause, Literal
 
-def extract_core(quantum_result: Any) -> List[Clause]:
-    """Extract unsatisfiable core from quantum search result"""
-    # TODO: Implement core extraction from quantum results
-    pass
\ No newline at end of file
+class _OutOfTime(Exception):
+    pass
+
+class CoreSolver:
+    """
+    Incremental satisfiability checks of subsets of a clause list
+    
+    Clause i is added as (C_i | ~s_i) with a fresh selector s_i; a subset
+    is checked by assuming its selectors, and an UNSAT answer comes with
+    the selectors of the clauses actually used (CDCLSolver.failed_core).
+    Learned clauses stay valid across checks, so later ones get cheaper.
+    """
+    
+    def __init__(self, clauses: List[Clause], deadline: float = None):
+        self.solver = CDCLSolver()
+        num_vars = max((lit.var for clause in clauses for lit in clause.literals), default=0)
+        self.solver.formula.num_vars = num_vars
+        self.selectors = {}  # Selector variable -> clause index
+        for index, clause in enumerate(clauses):
+            selector = self.solver.new_variable()
+            self.selectors[selector] = index
+            self.solver.formula.add_clause(Clause(clause.literals + [Literal(selector, False)]))
+        self.variable = {index: var for var, index in self.selectors.items()}
+        self.deadline = deadline
+        self.checks = 0
+    
+    def core(self, indices: List[int]) -> Optional[List[int]]:
+        """Indices of an unsatisfiable subset of indices, or None if they are satisfiable"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise _OutOfTime()
+        self.checks += 1
+        assumptions = [Literal(self.variable[index], True) for index in indices]
+        if self.solver.solve(assumptions=assumptions) is not None:
+            return None
+        return sorted(self.selectors[lit.var] for lit in self.solver.failed_core)
+
+def _deletion(checker: CoreSolver, core: List[int]) -> List[int]:
+    """Drop clauses one at a time while the rest stays unsatisfiable"""
+    position = 0
+    while position < len(core):
+        candidate = core[:position] + core[position + 1:]
+        try:
+            smaller = checker.core(candidate)
+        except _OutOfTime:
+            return core  # Unsatisfiable, just not known to be minimal
+        if smaller is None:
+            position += 1  # Necessary
+        else:
+            # Clause-set refinement: keep only what the refutation used
+            kept = set(smaller)
+            position = sum(1 for index in core[:position] if index in kept)
+            core = [index for index in core if index in kept]
+    return core
+
+def _quickxplain(checker: CoreSolver, background: List[int], changed: bool,
+                 constraints: List[int]) -> List[int]:
+    """Junker's QuickXplain: a minimal subset of constraints conflicting with background"""
+    if changed and checker.core(background) is not None:
+        return []
+    if len(constraints) == 1:
+        return list(constraints)
+    half = len(constraints) // 2
+    first, second = constraints[:half], constraints[half:]
+    right = _quickxplain(checker, background + first, bool(first), second)
+    left = _quickxplain(checker, background + right, bool(right), first)
+    return left + right
+
+def extract_core(clauses: List[Clause], time_budget: float = 0.5,
+                 method: str = 'quickxplain') -> Optional[List[int]]:
+    """
+    Unsatisfiable core of a clause list, minimized within a time budget
+    
+    A first core comes from the selector assumptions involved in refuting
+    all clauses. It is then shrunk to a minimal core either by deletion
+    (one check per clause, each refutation trimming the rest) or by
+    QuickXplain (divide and conquer, fewer checks when the core is much
+    smaller than its input). If the budget runs out the smallest core
+    found so far is returned, which is still unsatisfiable.
+    
+    Args:
+        clauses: Clauses believed unsatisfiable, e.g. a quantum subproblem
+        time_budget: Seconds for minimization (None: no limit)
+        method: 'quickxplain', 'deletion' or 'none'
+    
+    Returns:
+        Sorted indices into clauses of an unsatisfiable core, or None if
+        the clauses are in fact satisfiable
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    checker = CoreSolver(clauses)
+    core = checker.core(list(range(len(clauses))))
+    if core is None or method == 'none':
+        return core
+    
+    checker.deadline = deadline
+    try:
+        if method == 'deletion':
+            return sorted(_deletion(checker, core))
+        if method == 'quickxplain':
+            return sorted(_quickxplain(checker, [], False, core))
+        raise ValueError(f"Unknown core minimization method: {method}")
+    except _OutOfTime:
+        return core
@@ -0,0 +1,173 @@
+import networkx as nx
+from typing import Dict, List, Set, Tuple
+from ..sat.cdcl import CDCLSolver
+from ..sat.cnf import Clause
+
+class InteractionGraph:
+    """
+    Variable-interaction graph of a CDCL solver's residual formula
+    
+    Nodes are unassigned variables; two are joined when some clause that is
+    not yet satisfied contains both, with the number of such clauses as the
+    edge weight. Learned clauses are left out: they are implied by the
+    originals and would only glue components together.
+    
+    The graph follows the solver incrementally. sync() replays the trail
+    against the assignments already applied, undoing only what was
+    backtracked over and applying only new assignments and clauses.
+    """
+    
+    def __init__(self, solver: CDCLSolver):
+        self.solver = solver
+        self.graph = nx.Graph()
+        self.clauses: List[Clause] = []
+        self.true_count: List[int] = []  # True literals per tracked clause
+        self.occurs: Dict[int, List[int]] = {}  # Variable -> tracked clause indices
+        self.values: Dict[int, bool] = {}  # Assignments applied to the graph
+        self.applied: List[Tuple[int, bool]] = []
+        self.learned_ids: Set[int] = set()
+        self.num_learned = 0
+        self.num_seen = 0
+        self.version = 0  # Bumped on every change, for caching partitions
+        self._partition = (None, None, [])
+    
+    def sync(self):
+        """Bring the graph up to date with the solver's clauses and trail"""
+        solver = self.solver
+        for clause in solver.learned[self.num_learned:]:
+            self.learned_ids.add(id(clause))
+        self.num_learned = len(solver.learned)
+        
+        for clause in solver.formula.clauses[self.num_seen:]:
+            if id(clause) not in self.learned_ids:
+                self._add_clause(clause)
+        self.num_seen = len(solver.formula.clauses)
+        
+        trail = solver.trail
+        common = 0
+        while (common < len(self.applied) and common < len(trail) and
+               self.applied[common] == (trail[common], solver.assignment[trail[common]])):
+            common += 1
+        while len(self.applied) > common:
+            self._unassign(*self.applied.pop())
+        for var in trail[common:]:
+            self._assign(var, solver.assignment[var])
+            self.applied.append((var, solver.assignment[var]))
+    
+    def _free(self, index: int) -> List[int]:
+        """Unassigned variables of a tracked clause"""
+        return list(dict.fromkeys(lit.var for lit in self.clauses[index].literals
+                                  if lit.var not in self.values))
+    
+    def _link(self, variables: List[int], delta: int):
+        for i, u in enumerate(variables):
+            for v in variables[i + 1:]:
+                weight = self.graph.get_edge_data(u, v, {'weight': 0})['weight'] + delta
+                if weight > 0:
+                    self.graph.add_edge(u, v, weight=weight)
+                else:
+                    self.graph.remove_edge(u, v)
+    
+    def _add_clause(self, clause: Clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.true_count.append(sum(1 for lit in clause.literals
+                                   if self.values.get(lit.var) == lit.positive))
+        for var in dict.fromkeys(lit.var for lit in clause.literals):
+            self.occurs.setdefault(var, []).append(index)
+            if var not in self.values:
+                self.graph.add_node(var)
+        if self.true_count[index] == 0:
+            self._link(self._free(index), 1)
+        self.version += 1
+    
+    def _assign(self, var: int, value: bool):
+        for index in self.occurs.get(var, ()):
+            satisfied = any(lit.var == var and lit.positive == value
+                            for lit in self.clauses[index].literals)
+            if satisfied:
+                self.true_count[index] += 1
+                if self.true_count[index] == 1:
+                    self._link(self._free(index), -1)
+        self.values[var] = value
+        if var in self.graph:
+            self.graph.remove_node(var)
+        self.version += 1
+    
+    def _unassign(self, var: int, value: bool):
+        del self.values[var]
+        if var in self.occurs:
+            self.graph.add_node(var)
+        for index in self.occurs.get(var, ()):
+            satisfied = any(lit.var == var and lit.positive == value
+                            for lit in self.clauses[index].literals)
+            if satisfied:
+                self.true_count[index] -= 1
+                if self.true_count[index] == 0:
+                    self._link(self._free(index), 1)
+            elif self.true_count[index] == 0:
+                for other in self._free(index):
+                    if other != var:
+                        self._link([var, other], 1)
+        self.version += 1
+    
+    def residual_clauses(self, variables: Set[int]) -> List[Clause]:
+        """Unsatisfied clauses whose unassigned variables all lie in variables"""
+        indices = {index for var in variables for index in self.occurs.get(var, ())
+                   if self.true_count[index] == 0}
+        return [self.clauses[index] for index in sorted(indices)
+                if all(var in variables for var in self._free(index))]
+    
+    def components(self) -> List[Set[int]]:
+        """Connected components of the residual graph, largest first"""
+        return sorted(nx.connected_components(self.graph), key=len, reverse=True)
+    
+    def cut_ratio(self, variables: Set[int]) -> float:
+        """Share of the edge weight at variables that leaves the set"""
+        inside = cut = 0
+        for u, v, weight in self.graph.edges(variables, data='weight'):
+            if u in variables and v in variables:
+                inside += weight
+            else:
+                cut += weight
+        return cut / (inside + cut) if inside + cut else 0.0
+    
+    def clusters(self, component: Set[int], max_size: int) -> List[Set[int]]:
+        """
+        Split a component into dense clusters of at most max_size variables
+        
+        Louvain community detection (maximizing modularity, so few cut
+        edges) is applied recursively to oversized communities; a community
+        it cannot split further is cut into breadth-first chunks.
+        """
+        if len(component) <= max_size:
+            return [set(component)]
+        subgraph = self.graph.subgraph(component)
+        communities = nx.community.louvain_communities(subgraph, weight='weight', seed=0)
+        if len(communities) == 1:
+            order = list(nx.bfs_tree(subgraph, next(iter(component))))
+            order += [var for var in component if var not in set(order)]
+            return [set(order[k:k + max_size]) for k in range(0, len(order), max_size)]
+        return [cluster for community in communities
+                for cluster in self.clusters(community, max_size)]
+    
+    def partition(self, max_size: int) -> List[Set[int]]:
+        """
+        Variable sets small enough for the quantum search
+        
+        Whole components come first, then clusters of larger components in
+        order of increasing cut ratio. Cached until the graph changes.
+        """
+        self.sync()
+        if self._partition[:2] == (self.version, max_size):
+            return self._partition[2]
+        
+        parts, clusters = [], []
+        for component in self.components():
+            if len(component) <= max_size:
+                parts.append(component)
+            else:
+                clusters.extend(self.clusters(component, max_size))
+        parts.extend(sorted(clusters, key=self.cut_ratio))
+        self._partition = (self.version, max_size, parts)
+        return parts
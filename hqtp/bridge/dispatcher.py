@@ -1,20 +1,78 @@
-from typing import Optional, Union
+import os
+import tempfile
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from ..budget import PartialResult
 from ..sat.cdcl import CDCLSolver
-from ..quantum.grover import grover_search
+from ..sat.cnf import Clause
+from ..sat.symmetry import find_symmetries, lex_leader_clauses
+from ..stats import STATS
 from ..logic.unification import unify
 from .model_lifting import lift_sat_model
+from .cache import ResultCache, canonical_form
 from .conflict_merge import extract_core
-from ..learn.policies import ClausePolicy, LiteralPolicy
+from .subproblem import Subproblem
+
+# NumPy, networkx and torch load only once quantum search or learning is
+# enabled, so the classical path starts fast
+if TYPE_CHECKING:
+    from .decompose import InteractionGraph
+    from .offload import QuantumOffload
+
+# Largest register kept in memory; beyond this the state goes to state_dir
+MAX_IN_MEMORY_QUBITS = 26
+
+# Clause/variable ratios around the random 3-SAT phase transition, where CDCL struggles
+HARD_RATIO = (3.5, 5.5)
 
 class HybridDispatcher:
-    def __init__(self, max_quantum_vars: int = 14, use_quantum: bool = False, use_learning: bool = False):
+    def __init__(self, max_quantum_vars: int = 14, use_quantum: bool = False, use_learning: bool = False,
+                 quantum_dtype='complex128', state_dir: Optional[str] = None,
+                 quantum_jobs: int = 2, quantum_memory_budget: int = 1 << 30,
+                 break_symmetry: bool = True, symmetry_threshold: float = 0.3,
+                 use_cache: bool = True, cache: Optional[ResultCache] = None,
+                 core_budget: float = 0.5):
+        """
+        Args:
+            max_quantum_vars: Largest subproblem handed to the simulator.
+                Up to about 32 is practical with complex64 and state_dir
+            use_quantum: Enable quantum acceleration
+            use_learning: Enable learned guidance
+            quantum_dtype: State precision, complex64 or complex128 (a
+                NumPy dtype or its name)
+            state_dir: Directory for out-of-core (memory-mapped) states of
+                more than MAX_IN_MEMORY_QUBITS qubits
+            quantum_jobs: Quantum searches run in background processes
+                while CDCL continues; 0 runs them inline
+            quantum_memory_budget: Bytes the background searches may use
+            break_symmetry: Add lex-leader clauses for detected symmetries
+                before search
+            symmetry_threshold: Fraction of variables moved by symmetries
+                above which subproblems count as quantum-suitable
+            use_cache: Reuse verdicts of formulas and subproblems seen before
+            cache: ResultCache to use, e.g. one shared between dispatchers
+                or persisted on disk (default: a fresh in-memory cache)
+            core_budget: Seconds spent minimizing the core of each
+                unsatisfiable subproblem
+        """
         self.cdcl = CDCLSolver()
         self.max_quantum_vars = max_quantum_vars
         self.use_quantum = use_quantum
         self.use_learning = use_learning
+        self.quantum_dtype = quantum_dtype
+        self.state_dir = state_dir
+        self.quantum_jobs = quantum_jobs
+        self.quantum_memory_budget = quantum_memory_budget
+        self.break_symmetry = break_symmetry
+        self.symmetry_threshold = symmetry_threshold
+        self.symmetry: Optional[dict] = None  # Statistics of the last detection
+        self.cache = (cache or ResultCache()) if use_cache else None
+        self.core_budget = core_budget
+        self.graph: Optional['InteractionGraph'] = None
+        self.quantum_tried = set()  # Subproblems already solved, looked up or submitted
         
         # Initialize policies if learning is enabled
         if use_learning:
+            from ..learn.policies import ClausePolicy, LiteralPolicy
             self.clause_policy = ClausePolicy()
             self.literal_policy = LiteralPolicy()
         else:
@@ -27,43 +85,302 @@ class HybridDispatcher:
                 num_vars <= self.max_quantum_vars and
                 self.is_symmetric_enough(num_vars, num_clauses))
     
+    def register_options(self, num_vars: int) -> dict:
+        """Keyword arguments for QuantumRegister / grover_search on num_vars qubits"""
+        options = {'dtype': self.quantum_dtype}
+        if self.state_dir is not None and num_vars > MAX_IN_MEMORY_QUBITS:
+            fd, options['path'] = tempfile.mkstemp(suffix='.state', dir=self.state_dir)
+            os.close(fd)
+        return options
+    
     def is_symmetric_enough(self, num_vars: int, num_clauses: int) -> bool:
-        """Check if problem structure is suitable for quantum solving"""
-        # TODO: Implement heuristic check for quantum suitability
-        return True
+        """
+        Check if problem structure is suitable for quantum solving
+        
+        Highly symmetric formulas have solutions in large orbits, so Grover
+        needs few iterations while CDCL wanders between equivalent branches;
+        near the 3-SAT threshold density CDCL is at its weakest. Either is
+        worth a quantum search.
+        """
+        if self.symmetry is not None and self.symmetry['moved_fraction'] >= self.symmetry_threshold:
+            return True
+        low, high = HARD_RATIO
+        return low <= num_clauses / max(num_vars, 1) <= high
+    
+    def add_symmetry_breaking(self) -> dict:
+        """
+        Detect symmetries of the original clauses and add lex-leader clauses
+        
+        Auxiliary variables come from the solver. Returns the detection
+        statistics, which also drive is_symmetric_enough.
+        """
+        learned = {id(clause) for clause in self.cdcl.learned}
+        originals = [c for c in self.cdcl.formula.clauses if id(c) not in learned]
+        result = find_symmetries(self.cdcl.formula, originals)
+        
+        for generator in result.generators:
+            for clause in lex_leader_clauses(generator, self.cdcl.new_variable):
+                self.cdcl.formula.add_clause(clause)
+        self.symmetry = result.stats()
+        return self.symmetry
                 
-    def solve(self, clauses) -> Optional[Union[dict, bool]]:
-        """Main solving loop with hybrid classical/quantum dispatch"""
+    def solve(self, clauses, checkpoint=None, budget=None) -> Optional[Union[dict, bool, PartialResult]]:
+        """
+        Main solving loop with hybrid classical/quantum dispatch
+        
+        Quantum searches are submitted to a QuantumOffload and CDCL keeps
+        going; each pass of the loop merges whatever has finished and
+        cancels searches whose subproblem CDCL has since decided. With a
+        cache, a formula solved before (up to renumbering and clause order)
+        is answered from it without search.
+        
+        Args:
+            clauses: Clauses to add before solving (may be empty when
+                continuing from a restored solver)
+            checkpoint: Optional checkpoint.Checkpointer for periodic
+                snapshots of the CDCL state
+            budget: Optional budget.Budget, ticked once per CDCL step;
+                when it runs out the CDCL partial result is returned
+        """
         self.cdcl.add_clauses(clauses)
         
-        while True:
-            if self.cdcl.solve_partial():
-                return self.cdcl.get_model()
+        learned = {id(clause) for clause in self.cdcl.learned}
+        originals = [c for c in self.cdcl.formula.clauses if id(c) not in learned]
+        canonical = None
+        if self.cache is not None:
+            with STATS.timer('dispatch.cache_lookup'):
+                canonical = canonical_form(originals, self.cache.max_vertices)
+                cached = self.cache.get(originals, canonical)
+            if cached is not None:
+                STATS.count('dispatch.cache_hits')
+                if cached[0] == 'unsat':
+                    return None
+                model = dict(cached[1])
+                if self.cdcl.formula.is_satisfied(model):
+                    return model
+        
+        if self.break_symmetry:
+            with STATS.timer('dispatch.symmetry'):
+                self.add_symmetry_breaking()
+        with STATS.timer('dispatch.search'):
+            result = self.search(checkpoint, budget)
+        
+        if self.cache is not None and not isinstance(result, PartialResult):
+            if result is None:
+                self.cache.put(originals, ('unsat', None), canonical)
+            else:
+                self.cache.put(originals, ('sat', result), canonical)
+        return result
+    
+    def search(self, checkpoint=None, budget=None) -> Optional[Union[Dict[int, bool], PartialResult]]:
+        """Run CDCL with quantum dispatch to a model, refutation or the end of the budget"""
+        self.cdcl.best = None
+        offload = None
+        if self.use_quantum and self.quantum_jobs > 0:
+            from .offload import QuantumOffload
+            offload = QuantumOffload(self.quantum_jobs, self.quantum_memory_budget, 
+                                     self.quantum_dtype)
+        try:
+            while True:
+                if self.cdcl.solve_partial() and self.cdcl.all_variables_assigned():
+                    return self.cdcl.get_model()
                 
-            subproblem = self.extract_subproblem()
-            if (subproblem and 
-                self.should_use_quantum(subproblem.num_vars, 
-                                     len(subproblem.clauses))):
-                # Try quantum solving
-                result = self.solve_quantum(subproblem)
-                if result is not None:
-                    if isinstance(result, dict):
-                        # Found satisfying assignment
-                        return lift_sat_model(result)
-                    else:
-                        # Found conflict core
-                        self.cdcl.add_learned_clause(result)
-            
-            # Continue with CDCL
-            if not self.cdcl.solve_step():
-                return None  # UNSAT
+                if offload is not None:
+                    with STATS.timer('dispatch.quantum_collect'):
+                        model = self.collect_quantum(offload)
+                    if model is not None:
+                        return model
+                    
+                if self.use_quantum and (offload is None or len(offload.jobs) < offload.max_jobs):
+                    with STATS.timer('dispatch.quantum_dispatch'):
+                        model = self.dispatch_quantum(offload)
+                    if model is not None:
+                        return model
                 
-    def extract_subproblem(self):
+                # Continue with CDCL
+                if STATS.enabled:
+                    STATS.counters['dispatch.cdcl_steps'] += 1
+                if not self.cdcl.solve_step():
+                    return None  # UNSAT
+                
+                if budget is not None:
+                    if budget.tick():
+                        return self.cdcl.partial_result(budget.reason)
+                    if budget.steps % budget.check_every == 0:
+                        self.cdcl.record_best()
+                
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(self.cdcl)
+        finally:
+            if offload is not None:
+                offload.close()
+                
+    def dispatch_quantum(self, offload: Optional['QuantumOffload']) -> Optional[Dict[int, bool]]:
+        """
+        Hand suitable subproblems to the quantum search
+        
+        Independent components are all submitted, so they are searched in
+        parallel; without an offload each new one is solved inline. Each
+        subproblem is looked up in the cache first.
+        """
+        for subproblem in self.extract_subproblems():
+            if not self.should_use_quantum(subproblem.num_vars, len(subproblem.clauses)):
+                continue
+            if subproblem.key in self.quantum_tried:
+                continue
+            if offload is not None and len(offload.jobs) >= offload.max_jobs:
+                break
+            self.quantum_tried.add(subproblem.key)
+            STATS.count('dispatch.quantum_subproblems')
+            
+            result = self.cached_quantum(subproblem)
+            if result is None and offload is not None:
+                if not self.submit_quantum(offload, subproblem):
+                    self.quantum_tried.discard(subproblem.key)  # Retry once memory frees up
+                continue
+            if result is None:
+                # Try quantum solving inline
+                result = self.solve_quantum(subproblem)
+            else:
+                result = self.interpret_quantum(subproblem, result)
+            model = self.merge_quantum(subproblem, result)
+            if model is not None:
+                return model
+        return None
+    
+    def extract_subproblems(self) -> List[Subproblem]:
+        """
+        Subproblems of the residual formula, from its variable-interaction graph
+        
+        Each connected component is independent of the rest; components
+        wider than max_quantum_vars are split into dense clusters with few
+        cut edges (see InteractionGraph.partition). Clauses are simplified
+        under the trail (Subproblem.restrict), so models map back through
+        the subproblem's variable list.
+        """
+        if self.graph is None or self.graph.solver is not self.cdcl:
+            from .decompose import InteractionGraph
+            self.graph = InteractionGraph(self.cdcl)
+        
+        # Oracles are built over the unassigned variables only
+        subproblems = []
+        for variables in self.graph.partition(self.max_quantum_vars):
+            clauses = self.graph.residual_clauses(variables)
+            if clauses:
+                subproblems.append(Subproblem.restrict(clauses, self.cdcl.assignment))
+        return subproblems
+    
+    def extract_subproblem(self) -> Optional[Subproblem]:
         """Extract a subproblem suitable for quantum solving"""
-        # TODO: Implement subproblem extraction
-        pass
+        subproblems = self.extract_subproblems()
+        return subproblems[0] if subproblems else None
+        
+    def solve_quantum(self, subproblem: Subproblem) -> Optional[Union[Dict[int, bool], Clause]]:
+        """
+        Solve subproblem using quantum algorithm
+        
+        Returns:
+            Solver assignment for the subproblem's variables, a clause to
+            learn if it is unsatisfiable, or None if the search missed
+        """
+        import numpy as np
+        from .offload import simulate_subproblem
+        
+        options = self.register_options(subproblem.num_vars)
+        result = simulate_subproblem(subproblem.num_vars, subproblem.signed_clauses(),
+                                     np.dtype(options['dtype']).name, options.get('path'))
+        result = self.record_quantum(subproblem, result)
+        return self.interpret_quantum(subproblem, result)
+    
+    def cached_quantum(self, subproblem: Subproblem) -> Optional[tuple]:
+        """Cached verdict for a subproblem, as a simulate_subproblem result"""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(subproblem.clauses)
+        if cached is None:
+            return None
+        if cached[0] == 'unsat':
+            return cached
+        return ('sat', [int(cached[1][j + 1]) for j in range(subproblem.num_vars)])
+    
+    def record_quantum(self, subproblem: Subproblem, result: tuple) -> tuple:
+        """
+        Cache a decided simulate_subproblem result
+        
+        An unsatisfiable subproblem first gets a minimized core, returned
+        as ('unsat', core) with core indexing subproblem.clauses.
+        """
+        if result[0] == 'unsat':
+            with STATS.timer('dispatch.core_extraction'):
+                result = ('unsat', extract_core(subproblem.clauses, self.core_budget))
+            if result[1] is None:
+                return ('unknown',)  # The simulation was wrong; trust CDCL
+        if self.cache is not None:
+            if result[0] == 'sat':
+                self.cache.put(subproblem.clauses,
+                               ('sat', {j + 1: bool(bit) for j, bit in enumerate(result[1])}))
+            elif result[0] == 'unsat':
+                self.cache.put(subproblem.clauses, result)
+        return result
+    
+    def interpret_quantum(self, subproblem: Subproblem, 
+                          result: tuple) -> Optional[Union[Dict[int, bool], Clause]]:
+        """Turn a simulate_subproblem result into a model or a learned clause"""
+        if result[0] == 'sat':
+            return subproblem.lift(result[1])
+        if result[0] == 'unsat':
+            return subproblem.core_clause(result[1] if len(result) > 1 else None)
+        return None
+    
+    def submit_quantum(self, offload: 'QuantumOffload', subproblem: Subproblem) -> bool:
+        """Start a background search if the offload has room for it"""
+        options = self.register_options(subproblem.num_vars)
+        job = offload.submit(subproblem, options.get('path'))
+        if job is None and 'path' in options:
+            os.remove(options['path'])
+        return job is not None
+    
+    def collect_quantum(self, offload: 'QuantumOffload') -> Optional[Dict[int, bool]]:
+        """
+        Merge finished background searches and cancel stale ones
+        
+        A search is stale once its context no longer holds or CDCL has
+        assigned all of its variables. Returns a full model if a merged
+        result completes one.
+        """
+        assignment = self.cdcl.assignment
+        for job in list(offload.jobs):
+            subproblem = job.subproblem
+            if (not subproblem.holds(assignment) or 
+                    all(var in assignment for var in subproblem.variables)):
+                offload.cancel(job)
+        
+        for job, result in offload.poll():
+            result = self.record_quantum(job.subproblem, result)
+            model = self.merge_quantum(job.subproblem, self.interpret_quantum(job.subproblem, result))
+            if model is not None:
+                return model
+        return None
+    
+    def merge_quantum(self, subproblem: Subproblem, 
+                      result: Optional[Union[Dict[int, bool], Clause]]) -> Optional[Dict[int, bool]]:
+        """
+        Fold a quantum result into the CDCL search
         
-    def solve_quantum(self, subproblem):
-        """Solve subproblem using quantum algorithm"""
-        # TODO: Implement quantum solving
-        pass
\ No newline at end of file
+        A learned clause is valid regardless of the current trail and is
+        always added. A subproblem model is combined with the current
+        assignment; if that satisfies the whole formula it is returned,
+        otherwise it seeds the saved phases of its variables.
+        """
+        if isinstance(result, Clause):
+            STATS.count('dispatch.quantum_clauses')
+            self.cdcl.add_learned_clause(result)
+        elif isinstance(result, dict) and subproblem.holds(self.cdcl.assignment):
+            STATS.count('dispatch.quantum_models')
+            candidate = dict(self.cdcl.assignment)
+            candidate.update(result)
+            if (len(candidate) == self.cdcl.formula.num_vars and 
+                    self.cdcl.formula.is_satisfied(candidate)):
+                return candidate
+            self.cdcl.phase.update(result)
+        return None
@@ -0,0 +1,146 @@
+import marshal
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from .subproblem import Subproblem
+
+def simulate_subproblem(num_vars: int, clauses: List[List[int]],
+                        dtype: str = 'complex128', path: str = None) -> tuple:
+    """
+    Quantum search on a renumbered subproblem
+    
+    Returns ('sat', bits) with bit j the value of local variable j+1,
+    ('unsat',) when no assignment satisfies the clauses, or ('unknown',)
+    when the search missed. path, if given, backs the state out of core.
+    """
+    from ..quantum.grover import grover_search, bbht_search
+    from ..quantum.oracles import compile_oracle
+    
+    oracle = compile_oracle(clauses, num_vars)
+    if oracle.num_marked == 0:
+        return ('unsat',)
+    bits = grover_search(num_vars, oracle, dtype=np.dtype(dtype), path=path)
+    if bits is None:
+        bits = bbht_search(num_vars, oracle)
+    return ('sat', [int(b) for b in bits]) if bits is not None else ('unknown',)
+
+def _worker(conn, num_vars: int, clauses: List[List[int]], dtype: str, path: str):
+    """Run one simulation and send the marshalled result back"""
+    try:
+        result = simulate_subproblem(num_vars, clauses, dtype, path)
+    except MemoryError:
+        result = ('unknown',)
+    conn.send_bytes(marshal.dumps(result))
+    conn.close()
+
+@dataclass
+class QuantumJob:
+    subproblem: Subproblem
+    process: multiprocessing.Process
+    conn: object
+    memory: int
+    path: Optional[str] = None
+    started: float = field(default_factory=time.monotonic)
+
+class QuantumOffload:
+    """
+    Quantum subproblem searches running in background processes
+    
+    Each job is its own process, so a simulation whose subproblem has been
+    decided in the meantime can be terminated outright. At most max_jobs
+    run at once and their estimated state memory stays within
+    memory_budget bytes; submissions beyond either limit are declined and
+    the caller simply carries on classically. A subproblem is submitted at
+    most once.
+    """
+    
+    def __init__(self, max_jobs: int = 2, memory_budget: int = 1 << 30,
+                 dtype=np.complex128):
+        self.max_jobs = max_jobs
+        self.memory_budget = memory_budget
+        self.dtype = np.dtype(dtype)
+        self.jobs: List[QuantumJob] = []
+        self.submitted = set()
+        self.context = multiprocessing.get_context()
+    
+    def memory_estimate(self, num_vars: int, out_of_core: bool = False) -> int:
+        """Bytes of RAM for the state vector (unless memory-mapped) and oracle mask"""
+        return 2 ** num_vars * ((0 if out_of_core else self.dtype.itemsize) + 1)
+    
+    @property
+    def memory_in_use(self) -> int:
+        return sum(job.memory for job in self.jobs)
+    
+    def submit(self, subproblem: Subproblem, path: str = None) -> Optional[QuantumJob]:
+        """
+        Start a search, or return None if it is a repeat or over a limit
+        
+        path, if given, is the file for an out-of-core state; it is removed
+        when the job ends either way.
+        """
+        key = subproblem.key
+        memory = self.memory_estimate(subproblem.num_vars, path is not None)
+        if (key in self.submitted or len(self.jobs) >= self.max_jobs or
+                self.memory_in_use + memory > self.memory_budget):
+            return None
+        
+        parent, child = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=_worker, daemon=True,
+            args=(child, subproblem.num_vars, subproblem.signed_clauses(), self.dtype.name, path))
+        process.start()
+        child.close()
+        
+        job = QuantumJob(subproblem, process, parent, memory, path)
+        self.jobs.append(job)
+        self.submitted.add(key)
+        return job
+    
+    def poll(self) -> List[Tuple[QuantumJob, tuple]]:
+        """Collect finished jobs without blocking"""
+        finished = []
+        for job in list(self.jobs):
+            if not job.conn.poll() and job.process.is_alive():
+                continue
+            result = ('unknown',)  # Worker died before answering
+            if job.conn.poll():
+                try:
+                    result = marshal.loads(job.conn.recv_bytes())
+                except EOFError:
+                    pass
+            finished.append((job, result))
+            self._release(job)
+        return finished
+    
+    def wait(self, timeout: float = None) -> List[Tuple[QuantumJob, tuple]]:
+        """Block until some job finishes (or timeout), then poll"""
+        if self.jobs:
+            multiprocessing.connection.wait([job.conn for job in self.jobs], timeout)
+        return self.poll()
+    
+    def cancel(self, job: QuantumJob):
+        """Terminate a running search"""
+        if job.process.is_alive():
+            job.process.terminate()
+        self._release(job)
+    
+    def _release(self, job: QuantumJob):
+        job.process.join(timeout=1)
+        job.conn.close()
+        self.jobs.remove(job)
+        if job.path is not None and os.path.exists(job.path):
+            os.remove(job.path)
+    
+    def close(self):
+        for job in list(self.jobs):
+            self.cancel(job)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from ..sat.cnf import Clause, Literal
+
+@dataclass
+class Subproblem:
+    """
+    A piece of the CDCL formula handed to the quantum search
+    
+    Variables are renumbered densely: local variable j+1 (qubit j) is the
+    solver variable variables[j]. clauses use the local numbering. context
+    holds the solver literals the subproblem was extracted under; its
+    results are only meaningful while they all hold. reasons, if known,
+    gives for each clause the context literals that were simplified out
+    of it.
+    """
+    clauses: List[Clause]
+    variables: List[int]
+    context: List[Literal] = field(default_factory=list)
+    reasons: Optional[List[List[Literal]]] = None
+    
+    @property
+    def num_vars(self) -> int:
+        return len(self.variables)
+    
+    @property
+    def key(self) -> tuple:
+        """Identity for de-duplicating submissions"""
+        return (tuple(sorted(hash(c) for c in self.clauses)), tuple(self.variables),
+                tuple(sorted((lit.var, lit.positive) for lit in self.context)))
+    
+    def signed_clauses(self) -> List[List[int]]:
+        return [[lit.var if lit.positive else -lit.var for lit in clause.literals]
+                for clause in self.clauses]
+    
+    def lift(self, bits: List[int]) -> Dict[int, bool]:
+        """Solver assignment for a measured local assignment (bit j is qubit j)"""
+        return {var: bool(bit) for var, bit in zip(self.variables, bits)}
+    
+    def holds(self, assignment: Dict[int, bool]) -> bool:
+        """True while every context literal is still assigned as extracted"""
+        return all(assignment.get(lit.var) == lit.positive for lit in self.context)
+    
+    def core_clause(self, core: Optional[List[int]] = None) -> Clause:
+        """
+        Clause learned when the subproblem is unsatisfiable: some context literal is false
+        
+        With core, the indices of an unsatisfiable subset of clauses, only
+        the context literals removed from those clauses are negated, which
+        gives a shorter clause over the interface variables.
+        """
+        context = self.context
+        if core is not None and self.reasons is not None:
+            context = list({lit.var: lit for index in core for lit in self.reasons[index]}.values())
+        return Clause([Literal(lit.var, not lit.positive) for lit in context])
+    
+    @classmethod
+    def restrict(cls, clauses: List[Clause], assignment: Dict[int, bool]) -> 'Subproblem':
+        """
+        Simplify clauses under a partial assignment and renumber what is left
+        
+        Satisfied clauses are dropped and false literals removed, so only
+        unassigned variables become qubits. The assignments that falsified
+        removed literals form the context: an unsatisfiable result means at
+        least one of them must change. A clause left empty is kept, making
+        the subproblem unsatisfiable.
+        """
+        reduced = []
+        reasons = []
+        context = {}
+        for clause in clauses:
+            if any(assignment.get(lit.var) == lit.positive for lit in clause.literals):
+                continue
+            free = []
+            removed = []
+            for lit in clause.literals:
+                if lit.var in assignment:
+                    context[lit.var] = Literal(lit.var, assignment[lit.var])
+                    removed.append(context[lit.var])
+                else:
+                    free.append(lit)
+            reduced.append(Clause(free))
+            reasons.append(removed)
+        subproblem = cls.from_clauses(reduced, list(context.values()))
+        subproblem.reasons = reasons
+        return subproblem
+    
+    @classmethod
+    def from_clauses(cls, clauses: List[Clause],
+                     context: Optional[List[Literal]] = None) -> 'Subproblem':
+        """Renumber clauses over solver variables into a subproblem"""
+        variables = sorted({lit.var for clause in clauses for lit in clause.literals})
+        local = {var: j + 1 for j, var in enumerate(variables)}
+        renumbered = [Clause([Literal(local[lit.var], lit.positive) for lit in clause.literals])
+                      for clause in clauses]
+        return cls(renumbered, variables, list(context or []))
@@ -0,0 +1,140 @@
+"""
+Time, memory and work budgets for the solvers, with anytime results
+
+A Budget is handed to a solver the way a Checkpointer is: the solver calls
+tick() once per unit of work (conflict, decision, given clause, Grover
+iteration). tick() only counts until check_every units have passed, then
+looks at the clock, the process memory and the cancellation flag. Once the
+budget is exhausted the solver stops and returns a PartialResult instead
+of an answer.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+@dataclass
+class PartialResult:
+    """
+    What a solver had when its budget ran out
+
+    reason is 'timeout', 'memout', 'cancelled' or 'steps'. assignment is
+    the best total assignment found (fewest unsatisfied original clauses,
+    counted in unsatisfied), if the solver has one. clauses is the number
+    of clauses it derived (learned clauses or kept resolvents). A partial
+    result is falsy, so it never passes for a model.
+    """
+    reason: str
+    assignment: Optional[Dict[int, bool]] = None
+    unsatisfied: Optional[int] = None
+    clauses: int = 0
+    progress: Dict[str, float] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return False
+
+    def to_dict(self) -> dict:
+        return {'reason': self.reason, 'unsatisfied': self.unsatisfied,
+                'clauses': self.clauses, 'progress': self.progress}
+
+def memory_in_use() -> Optional[int]:
+    """Resident set size of this process in bytes (peak RSS where /proc is missing)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def limit_memory(megabytes: Optional[float]) -> Optional[tuple]:
+    """
+    Cap the address space at current use plus megabytes
+
+    A hard backstop behind the cooperative check: allocations past the cap
+    raise MemoryError. Returns the previous limits for restore_memory, or
+    None if nothing was changed.
+    """
+    if not megabytes:
+        return None
+    try:
+        import resource
+        with open('/proc/self/statm') as f:
+            used = int(f.read().split()[0]) * resource.getpagesize()
+    except (ImportError, OSError):
+        return None
+    previous = resource.getrlimit(resource.RLIMIT_AS)
+    limit = used + int(megabytes * (1 << 20))
+    if previous[1] != resource.RLIM_INFINITY:
+        limit = min(limit, previous[1])
+    resource.setrlimit(resource.RLIMIT_AS, (limit, previous[1]))
+    return previous
+
+def restore_memory(previous: Optional[tuple]):
+    if previous is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, previous)
+
+class Budget:
+    """
+    Wall-clock, memory and step limits, plus cancellation from any thread
+
+    Args:
+        time_limit: Seconds from construction
+        memory_limit: Largest resident set size in bytes
+        max_steps: Units of work (tick calls)
+        check_every: Ticks between clock, memory and cancellation checks
+    """
+
+    def __init__(self, time_limit: float = None, memory_limit: int = None,
+                 max_steps: int = None, check_every: int = 64):
+        self.started = time.monotonic()
+        self.deadline = self.started + time_limit if time_limit else None
+        self.memory_limit = memory_limit
+        self.max_steps = max_steps
+        self.check_every = max(check_every, 1)
+        self.steps = 0
+        self.reason: Optional[str] = None
+        self._next_check = self.check_every
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Ask the solver to stop at its next check (thread-safe)"""
+        self._cancelled.set()
+
+    def tick(self, units: int = 1) -> bool:
+        """Count units of work; True once the budget is exhausted"""
+        self.steps += units
+        if self.reason is None and self.max_steps is not None and self.steps >= self.max_steps:
+            self.reason = 'steps'
+        if self.reason is not None:
+            return True
+        if self.steps < self._next_check:
+            return False
+        self._next_check = self.steps + self.check_every
+        return self.exhausted()
+
+    def exhausted(self) -> bool:
+        """Check every limit now; True (with reason set) if one is exceeded"""
+        if self.reason is None:
+            if self._cancelled.is_set():
+                self.reason = 'cancelled'
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = 'timeout'
+            elif self.max_steps is not None and self.steps >= self.max_steps:
+                self.reason = 'steps'
+            elif self.memory_limit is not None and (memory_in_use() or 0) > self.memory_limit:
+                self.reason = 'memout'
+        return self.reason is not None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
@@ -0,0 +1,240 @@
+"""
+Binary snapshots of prover state, so long searches can be resumed
+
+A snapshot file is a small header, a section table and the section data:
+
+    header   '<4sHcB'   magic b'HQTP', format version, kind (b'C' CDCL,
+                        b'R' resolution), number of sections
+    table    '<8scQQ'   per section: name, typecode, offset, length
+    data                sections, each aligned to 8 bytes
+
+Typecode 'm' marks a marshal blob; 'i', 'd' and 'b' are raw native arrays
+(int32, float64, int8) that are read straight out of an mmap of the file.
+Snapshots are written to a temporary file and renamed into place, so a
+crash mid-write leaves the previous snapshot intact.
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Dict, List, Union
+
+from .logic.parser import Clause as FOLClause, Literal as FOLLiteral, Term
+from .logic.resolution import ResolutionProver
+from .sat.cdcl import CDCLSolver
+from .sat.cnf import Clause, Literal
+
+MAGIC = b'HQTP'
+VERSION = 1
+_HEADER = struct.Struct('<4sHcB')
+_ENTRY = struct.Struct('<8scQQ')
+
+def _write_sections(path: str, kind: bytes, sections: Dict[str, tuple]):
+    """Atomically write sections ({name: (typecode, payload)}) to path"""
+    blobs = []
+    for name, (typecode, payload) in sections.items():
+        if typecode == 'm':
+            data = marshal.dumps(payload)
+        else:
+            data = array(typecode, payload).tobytes()
+        blobs.append((name.encode(), typecode.encode(), data))
+
+    offset = _HEADER.size + _ENTRY.size * len(blobs)
+    table = []
+    for name, typecode, data in blobs:
+        offset = (offset + 7) & ~7
+        table.append(_ENTRY.pack(name, typecode, offset, len(data)))
+        offset += len(data)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, kind, len(blobs)))
+        for entry in table:
+            f.write(entry)
+        for (_, _, data), entry in zip(blobs, table):
+            f.write(b'\0' * (_ENTRY.unpack(entry)[2] - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_sections(path: str) -> tuple:
+    """Return (kind, {name: value}) with arrays decoded to lists"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, version, kind, count = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an HQTP checkpoint")
+        if version != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}")
+
+        sections = {}
+        view = memoryview(mm)
+        try:
+            for k in range(count):
+                name, typecode, offset, length = _ENTRY.unpack_from(mm, _HEADER.size + k * _ENTRY.size)
+                chunk = view[offset:offset + length]
+                if typecode == b'm':
+                    sections[name.rstrip(b'\0').decode()] = marshal.loads(chunk)
+                else:
+                    sections[name.rstrip(b'\0').decode()] = chunk.cast(typecode.decode()).tolist()
+                chunk.release()
+        finally:
+            view.release()
+    return kind, sections
+
+# CDCL solver
+
+def save_cdcl(solver: CDCLSolver, path: str):
+    """Snapshot clause arena, learned clauses, activities, phases and trail"""
+    arena = []
+    index: Dict[int, int] = {}  # id(clause) -> position in the arena
+    for k, clause in enumerate(solver.formula.clauses):
+        index[id(clause)] = k
+        arena.extend(lit.var if lit.positive else -lit.var for lit in clause.literals)
+        arena.append(0)
+
+    num_vars = solver.formula.num_vars
+    trail = [var if solver.assignment[var] else -var for var in solver.trail]
+    levels = [solver.decision_level[var] for var in solver.trail]
+    reasons = [index.get(id(solver.antecedent[var]), -1) if solver.antecedent[var] is not None else -1
+               for var in solver.trail]
+    activity = [solver.activity.get(var, 0.0) for var in range(num_vars + 1)]
+    phase = [int(solver.phase[var]) if var in solver.phase else -1 for var in range(num_vars + 1)]
+
+    _write_sections(path, b'C', {
+        'meta': ('m', {'level': solver.level, 'num_vars': num_vars,
+                       'activity_inc': solver.activity_inc, 'var_map': solver.var_map,
+                       'decision_stack': solver.decision_stack}),
+        'clauses': ('i', arena),
+        'learned': ('i', [index[id(c)] for c in solver.learned if id(c) in index]),
+        'trail': ('i', trail),
+        'levels': ('i', levels),
+        'reasons': ('i', reasons),
+        'activity': ('d', activity),
+        'phase': ('b', phase),
+    })
+
+def _load_cdcl(sections: dict) -> CDCLSolver:
+    solver = CDCLSolver()
+    meta = sections['meta']
+
+    clause: List[Literal] = []
+    for lit in sections['clauses']:
+        if lit == 0:
+            solver.formula.add_clause(Clause(clause))
+            clause = []
+        else:
+            clause.append(Literal(abs(lit), lit > 0))
+    clauses = solver.formula.clauses
+    solver.formula.num_vars = max(solver.formula.num_vars, meta['num_vars'])
+    solver.learned = [clauses[k] for k in sections['learned']]
+
+    for lit, level, reason in zip(sections['trail'], sections['levels'], sections['reasons']):
+        var = abs(lit)
+        solver.assignment[var] = lit > 0
+        solver.decision_level[var] = level
+        solver.antecedent[var] = clauses[reason] if reason >= 0 else None
+        solver.trail.append(var)
+
+    solver.activity = {var: score for var, score in enumerate(sections['activity']) if score}
+    solver.phase = {var: bool(value) for var, value in enumerate(sections['phase']) if value >= 0}
+    solver.activity_inc = meta['activity_inc']
+    solver.var_map = dict(meta['var_map'])
+    solver.level = meta['level']
+    solver.decision_stack = list(meta['decision_stack'])
+    return solver
+
+# Resolution prover
+
+def save_resolution(prover: ResolutionProver, path: str):
+    """Snapshot the term bank, active (usable/used) and passive (sos) clauses"""
+    terms: List[tuple] = []
+    term_ids: Dict[tuple, int] = {}
+
+    def intern(term: Term) -> int:
+        key = (term.kind, term.name, tuple(intern(arg) for arg in term.args))
+        if key not in term_ids:
+            term_ids[key] = len(terms)
+            terms.append(key)
+        return term_ids[key]
+
+    clauses: List[tuple] = []
+    clause_ids: Dict[int, int] = {}
+
+    def add(clause: FOLClause) -> int:
+        if id(clause) not in clause_ids:
+            clause_ids[id(clause)] = len(clauses)
+            clauses.append(tuple((lit.positive, lit.predicate, tuple(intern(a) for a in lit.args))
+                                 for lit in clause.literals))
+        return clause_ids[id(clause)]
+
+    _write_sections(path, b'R', {
+        'meta': ('m', {'fresh': prover.fresh, 'steps': prover.steps,
+                       'duplicates': prover.variants.duplicates}),
+        'usable': ('i', [add(c) for c in prover.usable]),
+        'used': ('i', [add(c) for c in prover.used]),
+        'sos': ('i', [add(c) for c in prover.passive()]),
+        'terms': ('m', terms),
+        'clauses': ('m', clauses),
+    })
+
+def _load_resolution(sections: dict) -> ResolutionProver:
+    prover = ResolutionProver([])
+    meta = sections['meta']
+
+    terms: List[Term] = []
+    for kind, name, args in sections['terms']:
+        terms.append(Term(kind, name, [terms[a] for a in args]))
+    clauses = [FOLClause([FOLLiteral(positive, predicate, [terms[a] for a in args])
+                          for positive, predicate, args in literals])
+               for literals in sections['clauses']]
+
+    for name in ('usable', 'used'):
+        group = getattr(prover, name)
+        for k in sections[name]:
+            group.add(clauses[k])
+            prover.variants.add(clauses[k])
+    for k in sections['sos']:  # Saved in selection order
+        prover.add_to_sos(clauses[k])
+        prover.variants.add(clauses[k])
+
+    prover.fresh = meta['fresh']
+    prover.steps = meta['steps']
+    prover.variants.duplicates = meta['duplicates']
+    return prover
+
+def save_checkpoint(state: Union[CDCLSolver, ResolutionProver], path: str):
+    """Write a snapshot of a CDCL solver or resolution prover"""
+    if isinstance(state, CDCLSolver):
+        save_cdcl(state, path)
+    elif isinstance(state, ResolutionProver):
+        save_resolution(state, path)
+    else:
+        raise TypeError(f"Cannot checkpoint {type(state).__name__}")
+
+def load_checkpoint(path: str) -> Union[CDCLSolver, ResolutionProver]:
+    """Rebuild the solver or prover stored in a snapshot"""
+    kind, sections = _read_sections(path)
+    if kind == b'C':
+        return _load_cdcl(sections)
+    if kind == b'R':
+        return _load_resolution(sections)
+    raise ValueError(f"Unknown checkpoint kind {kind!r}")
+
+class Checkpointer:
+    """Writes a snapshot to path at most once every interval seconds"""
+
+    def __init__(self, path: str, interval: float = 60.0):
+        self.path = str(path)
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last >= self.interval
+
+    def save(self, state: Union[CDCLSolver, ResolutionProver]):
+        save_checkpoint(state, self.path)
+        self.last = time.monotonic()
@@ -1,37 +1,203 @@
 import argparse
+import sys
 from pathlib import Path
-from .logic.parser import parse_tptp, parse_smtlib
+from typing import Callable, List, Optional, Tuple
+from .budget import Budget, PartialResult, limit_memory, memory_in_use, restore_memory
+from .stats import STATS, profile
+from .logic.parser import is_ground, parse_tptp, parse_smtlib
 from .bridge.dispatcher import HybridDispatcher
 
-def main():
-    parser = argparse.ArgumentParser(description='Hybrid Quantum-Guided Theorem Prover')
-    parser.add_argument('input', type=Path, help='Input file (TPTP or SMT-LIB format)')
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        from .serve import main as serve
+        return serve(argv[1:])
+    
+    parser = argparse.ArgumentParser(description='Hybrid Quantum-Guided Theorem Prover',
+                                     epilog='Run "hqtp serve --help" for the persistent server.')
+    parser.add_argument('input', type=Path, nargs='*', help='Input files (TPTP or SMT-LIB format)')
     parser.add_argument('--quantum', action='store_true', help='Enable quantum acceleration')
     parser.add_argument('--learning', action='store_true', help='Enable learned guidance')
-    args = parser.parse_args()
+    parser.add_argument('--max-qubits', type=int, default=14,
+                        help='Largest subproblem simulated (default: 14)')
+    parser.add_argument('--single-precision', action='store_true',
+                        help='Simulate with complex64 amplitudes (half the memory)')
+    parser.add_argument('--state-dir', type=Path,
+                        help='Keep large quantum states memory-mapped in this directory')
+    parser.add_argument('--quantum-jobs', type=int, default=2,
+                        help='Background quantum searches alongside CDCL (0: run inline)')
+    parser.add_argument('--no-symmetry', action='store_true',
+                        help='Skip symmetry detection and lex-leader clauses')
+    parser.add_argument('--cache', type=Path,
+                        help='SQLite file of solved formulas and subproblems, shared across runs')
+    parser.add_argument('--cache-size', type=int, default=64,
+                        help='MiB of cached results kept in memory (default: 64)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not reuse earlier results')
+    parser.add_argument('--checkpoint', type=Path, help='Periodically snapshot solver state to this file')
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0,
+                        help='Seconds between snapshots (default: 60)')
+    parser.add_argument('--resume', type=Path, help='Continue from a snapshot instead of reading input')
+    parser.add_argument('--timeout', type=float, help='Give up on each input after this many seconds')
+    parser.add_argument('--mem-limit', type=float, help='Give up on each input beyond this many MiB')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Inputs solved concurrently, each in its own process (default: 1)')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print counters and phase timings to stderr when done')
+    parser.add_argument('--stats-json', type=Path, metavar='PATH',
+                        help='Write counters and phase timings as JSON lines ("-": stdout)')
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help='Run under cProfile; save to PATH or print the top functions')
+    args = parser.parse_args(argv)
+    
+    if not args.input and args.resume is None:
+        parser.error('an input file or --resume is required')
+    if (args.checkpoint or args.resume) and len(args.input) > 1:
+        parser.error('--checkpoint and --resume take a single input')
+    if args.profile is not None and len(args.input) > 1:
+        parser.error('--profile takes a single input')
+    if args.stats_json is not None and str(args.stats_json) != '-':
+        args.stats_json.write_text('')  # Records of this run only
+    
+    if len(args.input) > 1:
+        # One process per input; answers are printed in input order
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max(args.jobs, 1)) as pool:
+            jobs = pool.map(_run_job, [args] * len(args.input), args.input)
+            for path, (lines, stats) in zip(args.input, jobs):
+                for line in lines:
+                    print(f"{path}: {line}", flush=True)
+                report_stats(args, path, stats)
+        return
+    
+    path = args.input[0] if args.input else args.resume
+    STATS.enable(args.stats or args.stats_json is not None)
+    limits = limit_memory(args.mem_limit)
+    try:
+        solve = lambda: run(args, args.input[0] if args.input else None,
+                            lambda line: print(line, flush=True))
+        if args.profile is not None:
+            profile(solve, args.profile)
+        else:
+            solve()
+    except MemoryError:
+        print("Proof attempt exhausted (memout)")
+    finally:
+        restore_memory(limits)
+    report_stats(args, path, STATS.snapshot())
+
+def _run_job(args, path: Path) -> Tuple[List[str], dict]:
+    """Solve one input in a pool process, collecting its output lines and stats"""
+    lines = []
+    STATS.reset()
+    STATS.enable(args.stats or args.stats_json is not None)
+    limits = limit_memory(args.mem_limit)
+    try:
+        run(args, path, lines.append)
+    except MemoryError:
+        lines.append("Proof attempt exhausted (memout)")
+    finally:
+        restore_memory(limits)
+    return lines, STATS.snapshot()
+
+def report_stats(args, path: Path, stats: dict):
+    """Print the --stats summary and append the --stats-json record of one input"""
+    if args.stats:
+        print(f"statistics for {path}:\n{STATS.report(stats)}", file=sys.stderr, flush=True)
+    if args.stats_json is not None:
+        import json
+        record = json.dumps(dict(input=str(path), **stats))
+        if str(args.stats_json) == '-':
+            print(record, flush=True)
+        else:
+            with args.stats_json.open('a') as f:
+                f.write(record + '\n')
+
+def make_budget(args) -> Optional[Budget]:
+    """Budget for one input from --timeout and --mem-limit, or None without them"""
+    if args.timeout is None and args.mem_limit is None:
+        return None
+    memory = None
+    if args.mem_limit is not None:
+        memory = (memory_in_use() or 0) + int(args.mem_limit * (1 << 20))
+    return Budget(time_limit=args.timeout, memory_limit=memory)
+
+def describe(result) -> str:
+    """
+    Verdict line for a solver result
+    
+    The dispatcher (ground clauses only, so exact) refutes the clause set
+    (None) or returns a model; resolution derives the empty clause (True)
+    or stops without deciding (False).
+    """
+    if isinstance(result, PartialResult):
+        detail = result.reason
+        if result.unsatisfied is not None:
+            detail += f", best assignment leaves {result.unsatisfied} clauses unsatisfied"
+        return f"Proof attempt exhausted ({detail})"
+    if result is True or result is None:
+        return "Theorem proved!"
+    if isinstance(result, dict):
+        return "Counter-example found!"
+    return "Proof attempt exhausted"
+
+def run(args, path: Optional[Path], emit: Callable[[str], None]):
+    """Solve one input (or resume a snapshot), passing each output line to emit"""
+    budget = make_budget(args)
+    
+    checkpoint = None
+    if args.checkpoint or args.resume:
+        from .checkpoint import Checkpointer
+        checkpoint = Checkpointer(args.checkpoint or args.resume, args.checkpoint_interval)
+    
+    cache = None
+    if not args.no_cache:
+        from .bridge.cache import ResultCache
+        cache = ResultCache(args.cache_size << 20, str(args.cache) if args.cache else None)
     
-    # Parse input
-    if args.input.suffix == '.p':
-        clauses = parse_tptp(args.input.read_text())
-    else:
-        clauses = parse_smtlib(args.input.read_text())
-        
     # Initialize prover
     dispatcher = HybridDispatcher(
-        max_quantum_vars=14,  # Default max qubits
+        max_quantum_vars=args.max_qubits,
         use_quantum=args.quantum,
-        use_learning=args.learning
+        use_learning=args.learning,
+        quantum_dtype='complex64' if args.single_precision else 'complex128',
+        state_dir=args.state_dir,
+        quantum_jobs=args.quantum_jobs,
+        break_symmetry=not args.no_symmetry,
+        use_cache=not args.no_cache,
+        cache=cache
     )
     
-    # Run proof search
-    result = dispatcher.solve(clauses)
+    if args.resume:
+        from .checkpoint import load_checkpoint
+        from .logic.resolution import ResolutionProver
+        state = load_checkpoint(args.resume)
+        
+        if isinstance(state, ResolutionProver):
+            emit(describe(state.prove(checkpoint=checkpoint, budget=budget)))
+            return
+        
+        dispatcher.cdcl = state
+        clauses = []
+    elif path.suffix == '.smt2':
+        # SMT-LIB scripts are executed command by command
+        from .logic.smtlib import SMTLibInterpreter
+        with path.open() as script:
+            for response in SMTLibInterpreter(budget).run(script):
+                emit(response)
+        return
+    # Parse input
+    elif path.suffix == '.p':
+        clauses = parse_tptp(path.read_text())
+    else:
+        clauses = parse_smtlib(path.read_text())
     
-    if result is True:
-        print("Theorem proved!")
-    elif result is False:
-        print("Counter-example found!")
+    # Run proof search; with variables left only resolution is exact
+    if not is_ground(clauses):
+        from .logic.resolution import ResolutionProver
+        result = ResolutionProver(clauses).prove(checkpoint=checkpoint, budget=budget)
     else:
-        print("Proof attempt exhausted")
+        result = dispatcher.solve(clauses, checkpoint=checkpoint, budget=budget)
+    emit(describe(result))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
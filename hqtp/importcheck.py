@@ -0,0 +1,81 @@
+"""
+Startup-time check for the classical CLI path
+
+Runs `hqtp` on a tiny CNF in fresh interpreters and reports the wall time
+and the heavy backends that got imported. The classical path must not load
+torch, NumPy or networkx; those belong to --learning and --quantum. Exits
+with status 1 if one of them shows up, so it can gate a release:
+
+    python -m hqtp.importcheck [--runs N] [--importtime]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules only the optional features may import
+HEAVY_MODULES = ('torch', 'numpy', 'networkx')
+
+PROBLEM = """
+cnf(c1, axiom, (p | q)).
+cnf(c2, axiom, (~p | r)).
+cnf(c3, axiom, (~q | r)).
+cnf(c4, negated_conjecture, (~r)).
+"""
+
+SCRIPT = """
+import json, sys
+from hqtp import cli
+sys.argv = ['hqtp'] + sys.argv[1:]
+cli.main()
+print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))
+"""
+
+def run_once(problem_path: str, importtime: bool = False) -> tuple:
+    """Run the CLI in a new interpreter: (seconds, top-level modules, stderr)"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else [])
+    command += ['-c', SCRIPT, problem_path]
+    start = time.perf_counter()
+    process = subprocess.run(command, capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    elapsed = time.perf_counter() - start
+    modules = json.loads(process.stdout.strip().splitlines()[-1])
+    return elapsed, modules, process.stderr
+
+def main():
+    parser = argparse.ArgumentParser(description='Check startup cost of the classical CLI path')
+    parser.add_argument('--runs', type=int, default=5, help='Interpreter launches to time')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Print the -X importtime report of the last run')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.p')
+    with os.fdopen(fd, 'w') as f:
+        f.write(PROBLEM)
+    try:
+        times = []
+        runs = max(args.runs, 1)
+        for run in range(runs):
+            elapsed, modules, report = run_once(path, args.importtime and run == runs - 1)
+            times.append(elapsed)
+    finally:
+        os.remove(path)
+
+    times.sort()
+    print(f"startup: best {times[0] * 1000:.0f} ms, median {times[len(times) // 2] * 1000:.0f} ms "
+          f"over {len(times)} runs")
+    if args.importtime:
+        print(report, end='')
+
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+    if heavy:
+        print(f"FAIL: classical path imported {', '.join(heavy)}")
+        sys.exit(1)
+    print("ok: no heavy backends imported")
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,247 @@
-from typing import List
-from .parser import Clause, Literal, Term
+from typing import List, Dict
+from .parser import Clause, Literal, Term, Formula
+from .prenex import free_variables, term_variables, rename_bound, skolemize
+
+def _rename_term(term: Term, var_map: Dict[str, str], counter: List[int]) -> Term:
+    if term.kind == 'var':
+        if term.name not in var_map:
+            var_map[term.name] = f"V{counter[0]}"
+            counter[0] += 1
+        return Term('var', var_map[term.name])
+    if term.kind == 'func':
+        return Term('func', term.name, [_rename_term(arg, var_map, counter) for arg in term.args])
+    return term
 
 def standardize_apart(clauses: List[Clause]) -> List[Clause]:
     """Rename variables to ensure no variable names are shared between clauses"""
-    counter = 0
+    counter = [0]
     result = []
-    
+
     for clause in clauses:
         var_map = {}  # Original var name -> New var name
         new_lits = []
-        
+
         for lit in clause.literals:
-            new_args = []
-            for arg in lit.args:
-                if arg.kind == 'var':
-                    if arg.name not in var_map:
-                        var_map[arg.name] = f"V{counter}"
-                        counter += 1
-                    new_args.append(Term('var', var_map[arg.name]))
-                else:
-                    new_args.append(arg)
+            new_args = [_rename_term(arg, var_map, counter) for arg in lit.args]
             new_lits.append(Literal(lit.positive, lit.predicate, new_args))
-            
+
         result.append(Clause(new_lits))
     return result
 
-def to_cnf(clauses: List[Clause]) -> List[Clause]:
-    """Convert clauses to Conjunctive Normal Form"""
-    # TODO: Implement CNF conversion
-    # 1. Eliminate implications
-    # 2. Move negations inward
-    # 3. Distribute OR over AND
-    pass
\ No newline at end of file
+def _negate(lit: Literal) -> Literal:
+    return Literal(not lit.positive, lit.predicate, lit.args)
+
+def to_nnf(formula: Formula, positive: bool = True) -> Formula:
+    """
+    Negation normal form: implications and equivalences eliminated and
+    negations pushed onto atoms (negated atoms become negative literals)
+    """
+    kind = formula.kind
+
+    if kind == 'atom':
+        return formula if positive else Formula('atom', atom=_negate(formula.atom))
+    if kind in ('true', 'false'):
+        return Formula(kind if positive else ('false' if kind == 'true' else 'true'))
+    if kind == 'not':
+        return to_nnf(formula.args[0], not positive)
+    if kind in ('and', 'or'):
+        new_kind = kind if positive else ('or' if kind == 'and' else 'and')
+        return Formula(new_kind, [to_nnf(arg, positive) for arg in formula.args])
+    if kind == 'implies':
+        a, b = formula.args
+        if positive:
+            return Formula('or', [to_nnf(a, False), to_nnf(b, True)])
+        return Formula('and', [to_nnf(a, True), to_nnf(b, False)])
+    if kind == 'iff':
+        a, b = formula.args
+        if positive:
+            return Formula('and', [Formula('or', [to_nnf(a, False), to_nnf(b, True)]),
+                                   Formula('or', [to_nnf(a, True), to_nnf(b, False)])])
+        return Formula('or', [Formula('and', [to_nnf(a, True), to_nnf(b, False)]),
+                              Formula('and', [to_nnf(a, False), to_nnf(b, True)])])
+    if kind in ('forall', 'exists'):
+        new_kind = kind if positive else ('exists' if kind == 'forall' else 'forall')
+        return Formula(new_kind, [to_nnf(formula.args[0], positive)],
+                       variables=list(formula.variables))
+
+    raise ValueError(f"Unknown formula kind: {kind}")
+
+def simplify(formula: Formula) -> Formula:
+    """Flatten nested and/or and remove $true/$false in an NNF formula"""
+    kind = formula.kind
+
+    if kind in ('and', 'or'):
+        unit, zero = ('true', 'false') if kind == 'and' else ('false', 'true')
+        args = []
+        for arg in formula.args:
+            arg = simplify(arg)
+            if arg.kind == zero:
+                return Formula(zero)
+            if arg.kind == unit:
+                continue
+            if arg.kind == kind:
+                args.extend(arg.args)
+            else:
+                args.append(arg)
+        if not args:
+            return Formula(unit)
+        if len(args) == 1:
+            return args[0]
+        return Formula(kind, args)
+
+    if kind in ('forall', 'exists'):
+        body = simplify(formula.args[0])
+        if body.kind in ('true', 'false'):
+            return body
+        return Formula(kind, [body], variables=list(formula.variables))
+
+    return formula
+
+def _push_quantifier(kind: str, var: str, body: Formula) -> Formula:
+    """Move a single quantifier as far inward as it will go"""
+    if var not in free_variables(body):
+        return body
+
+    # forall distributes over and, exists over or
+    spread, split = ('and', 'or') if kind == 'forall' else ('or', 'and')
+
+    if body.kind == spread:
+        return Formula(spread, [_push_quantifier(kind, var, arg) for arg in body.args])
+
+    if body.kind == split:
+        dependent = [arg for arg in body.args if var in free_variables(arg)]
+        independent = [arg for arg in body.args if var not in free_variables(arg)]
+        if independent:
+            inner = dependent[0] if len(dependent) == 1 else Formula(split, dependent)
+            return Formula(split, [_push_quantifier(kind, var, inner)] + independent)
+
+    return Formula(kind, [body], variables=[var])
+
+def miniscope(formula: Formula) -> Formula:
+    """Push quantifiers inward in an NNF formula so their scopes are minimal"""
+    if formula.kind in ('and', 'or'):
+        return simplify(Formula(formula.kind, [miniscope(arg) for arg in formula.args]))
+
+    if formula.kind in ('forall', 'exists'):
+        body = miniscope(formula.args[0])
+        for var in reversed(formula.variables):
+            body = _push_quantifier(formula.kind, var, body)
+        return simplify(body)
+
+    return formula
+
+class _DefinitionalCNF:
+    """
+    Quantifier-free NNF to clauses, naming subformulas to avoid blowup
+
+    Whenever distributing a disjunction would produce more than threshold
+    clauses, its largest conjunctive argument is replaced by a fresh def_N
+    atom over the argument's variables, with defining clauses ~def_N | C.
+    Only this direction is needed because the formula is in NNF, so every
+    subformula occurs positively.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.definitions: List[List[Literal]] = []
+        self.num_defs = 0
+
+    def name(self, clauses: List[List[Literal]]) -> Literal:
+        variables = []
+        for clause in clauses:
+            for lit in clause:
+                for arg in lit.args:
+                    for var in term_variables(arg):
+                        if var not in variables:
+                            variables.append(var)
+
+        atom = Literal(True, f"def_{self.num_defs}", [Term('var', v) for v in variables])
+        self.num_defs += 1
+
+        for clause in clauses:
+            self.definitions.append([_negate(atom)] + clause)
+        return atom
+
+    def clauses(self, formula: Formula) -> List[List[Literal]]:
+        kind = formula.kind
+
+        if kind == 'atom':
+            return [[formula.atom]]
+        if kind == 'true':
+            return []
+        if kind == 'false':
+            return [[]]
+        if kind == 'and':
+            return [c for arg in formula.args for c in self.clauses(arg)]
+        if kind == 'or':
+            parts = [self.clauses(arg) for arg in formula.args]
+            if any(not part for part in parts):
+                return []  # A disjunct is valid
+
+            while True:
+                size = 1
+                for part in parts:
+                    size *= len(part)
+                if size <= self.threshold:
+                    break
+                largest = max(range(len(parts)), key=lambda k: len(parts[k]))
+                if len(parts[largest]) <= 1:
+                    break
+                parts[largest] = [[self.name(parts[largest])]]
+
+            result = [[]]
+            for part in parts:
+                result = [left + right for left in result for right in part]
+            return result
+
+        raise ValueError(f"Unexpected {kind} in quantifier-free NNF")
+
+def _tidy(literals: List[Literal]) -> List[Literal]:
+    """Drop duplicate literals, or return None for a tautology"""
+    unique = list(dict.fromkeys(literals))
+    seen = set(unique)
+    for lit in unique:
+        if _negate(lit) in seen:
+            return None
+    return unique
+
+def to_cnf(formulas: List[Formula], threshold: int = 16) -> List[Clause]:
+    """
+    Convert first-order formulas to Conjunctive Normal Form
+
+    Pipeline: negation normal form, miniscoping, Skolemization with sk_N
+    functions over only the variables each existential depends on, and
+    clause generation with definitional renaming so the output stays
+    linear in the size of the input.
+
+    Args:
+        formulas: Formulas to convert (free variables are read universally)
+        threshold: Largest clause count a single distribution may produce
+            before a subformula is named
+
+    Returns:
+        Clauses with variables standardized apart
+    """
+    skolem_funcs: Dict[str, int] = {}
+    bound_counter = [0]
+    converter = _DefinitionalCNF(threshold)
+    raw: List[List[Literal]] = []
+
+    for formula in formulas:
+        free = free_variables(formula)
+        if free:
+            formula = Formula('forall', [formula], variables=free)
+
+        nnf = miniscope(simplify(to_nnf(formula)))
+        nnf = rename_bound(nnf, bound_counter)
+        matrix = simplify(skolemize(nnf, skolem_funcs))
+        raw.extend(converter.clauses(matrix))
+
+    raw.extend(converter.definitions)
+
+    result = []
+    for literals in raw:
+        literals = _tidy(literals)
+        if literals is not None:
+            result.append(Clause(literals))
+    return standardize_apart(result)
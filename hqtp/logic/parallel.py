@@ -0,0 +1,140 @@
+import marshal
+import multiprocessing
+from typing import List, Tuple
+from .parser import Clause, Literal, Term
+from .variants import VariantTable
+
+def encode_term(term: Term):
+    """Compact tuple form of a term: variables are plain strings"""
+    if term.kind == 'var':
+        return term.name
+    if term.kind == 'func':
+        return (term.name, tuple(encode_term(arg) for arg in term.args))
+    return (term.name,)
+
+def decode_term(encoded) -> Term:
+    if isinstance(encoded, str):
+        return Term('var', encoded)
+    if len(encoded) == 1:
+        return Term('const', encoded[0])
+    return Term('func', encoded[0], [decode_term(arg) for arg in encoded[1]])
+
+def encode_clause(clause: Clause) -> tuple:
+    """Compact tuple form of a clause, suitable for marshal"""
+    return tuple((lit.positive, lit.predicate, tuple(encode_term(arg) for arg in lit.args))
+                 for lit in clause.literals)
+
+def decode_clause(encoded: tuple) -> Clause:
+    return Clause([Literal(positive, predicate, [decode_term(arg) for arg in args])
+                   for positive, predicate, args in encoded])
+
+def _worker(conn, shard_id: int):
+    """
+    Worker loop: keeps its shard of the active set and answers 'given' requests
+
+    Messages are marshalled tuples:
+        ('add', index, clause)   append clause to this shard
+        ('given', clause, bool)  resolve against the shard, factoring if asked
+        ('stop',)
+    Replies to 'given' are lists of (partner index, position, clause), with
+    partner index -1 for factors.
+    """
+    from .resolution import ResolutionProver
+
+    prover = ResolutionProver([])
+    shard: List[Tuple[int, Clause]] = []
+    sent = VariantTable()  # Everything already streamed back
+
+    while True:
+        message = marshal.loads(conn.recv_bytes())
+        if message[0] == 'stop':
+            break
+        if message[0] == 'add':
+            shard.append((message[1], decode_clause(message[2])))
+            continue
+
+        given = decode_clause(message[1])
+        results = []
+        if message[2]:
+            for position, factor in enumerate(prover.factor(given)):
+                if sent.add(factor):
+                    results.append((-1, position, encode_clause(factor)))
+        for index, partner in shard:
+            for position, resolvent in enumerate(prover.resolve(given, partner)):
+                if sent.add(resolvent):
+                    results.append((index, position, encode_clause(resolvent)))
+        conn.send_bytes(marshal.dumps(results))
+
+class ParallelInference:
+    """
+    Binary resolution and factoring sharded over worker processes
+
+    The active set is split round-robin by insertion index. Each worker holds
+    its shard and is updated incrementally as clauses become active. For a
+    given clause every worker resolves against its shard and streams back
+    only clauses it has not sent before; results are merged by (partner
+    index, position), so the output order does not depend on the number of
+    workers.
+    """
+
+    def __init__(self, num_workers: int, active: List[Clause] = ()):
+        context = multiprocessing.get_context()
+        self.num_workers = num_workers
+        self.connections = []
+        self.processes = []
+        self.size = 0
+
+        for shard_id in range(num_workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, args=(child, shard_id), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+        for clause in active:
+            self.add(clause)
+
+    def owner(self, index: int) -> int:
+        return index % self.num_workers
+
+    def add(self, clause: Clause):
+        """Make clause active in its owner's shard"""
+        index = self.size
+        self.size += 1
+        message = ('add', index, encode_clause(clause))
+        self.connections[self.owner(index)].send_bytes(marshal.dumps(message))
+
+    def infer(self, given: Clause) -> Tuple[List[Clause], List[Clause]]:
+        """Return (factors, resolvents) of given against the active set"""
+        encoded = encode_clause(given)
+        factoring = self.owner(self.size - 1) if self.size else 0
+        for shard_id, conn in enumerate(self.connections):
+            conn.send_bytes(marshal.dumps(('given', encoded, shard_id == factoring)))
+
+        merged = []
+        for conn in self.connections:
+            merged.extend(marshal.loads(conn.recv_bytes()))
+        merged.sort(key=lambda item: (item[0], item[1]))
+
+        factors = [decode_clause(c) for index, _, c in merged if index < 0]
+        resolvents = [decode_clause(c) for index, _, c in merged if index >= 0]
+        return factors, resolvents
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                conn.send_bytes(marshal.dumps(('stop',)))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
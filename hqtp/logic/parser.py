@@ -1,6 +1,6 @@
 
-from dataclasses import dataclass
-from typing import List, Union, Dict
+from dataclasses import dataclass, field
+from typing import List, Union, Dict, Optional
 import re
 
 @dataclass
@@ -13,15 +13,66 @@ class Term:
         if self.args is None:
             self.args = []
 
+    def __hash__(self):
+        return hash((self.kind, self.name, tuple(self.args)))
+
 @dataclass
 class Literal:
     positive: bool
     predicate: str
     args: List[Term]
 
+    def __hash__(self):
+        return hash((self.positive, self.predicate, tuple(self.args)))
+
 @dataclass
 class Clause:
     literals: List[Literal]
+    # Canonical variant key, filled in lazily by logic.variants.variant_key
+    variant: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def __hash__(self):
+        return hash(tuple(self.literals))
+
+@dataclass
+class Formula:
+    kind: str  # 'atom', 'not', 'and', 'or', 'implies', 'iff', 'forall', 'exists', 'true', 'false'
+    args: List['Formula'] = None
+    atom: Optional[Literal] = None  # For 'atom'
+    variables: List[str] = None  # For 'forall' and 'exists'
+
+    def __post_init__(self):
+        if self.args is None:
+            self.args = []
+        if self.variables is None:
+            self.variables = []
+
+def format_term(term: Term) -> str:
+    """TPTP text of a term"""
+    if term.kind == 'func':
+        return f"{term.name}({','.join(format_term(arg) for arg in term.args)})"
+    return term.name
+
+def atom_name(lit: Literal) -> str:
+    """TPTP text of a literal's atom, e.g. p(a,f(b)); the name of a nullary predicate"""
+    if not lit.args:
+        return lit.predicate
+    return f"{lit.predicate}({','.join(format_term(arg) for arg in lit.args)})"
+
+def is_ground_term(term: Term) -> bool:
+    if term.kind == 'var':
+        return False
+    return all(is_ground_term(arg) for arg in term.args)
+
+def is_ground(clauses: List['Clause']) -> bool:
+    """
+    True if no clause contains a variable
+    
+    Only then do the propositional solvers decide the clause set exactly:
+    each distinct ground atom becomes one SAT variable.
+    """
+    return all(is_ground_term(arg) for clause in clauses
+               for lit in clause.literals for arg in lit.args)
 
 def parse_term(term_str: str) -> Term:
     """Parse a term from string representation"""
@@ -66,72 +117,232 @@ def parse_literal(lit_str: str) -> Literal:
     
     return Literal(positive, predicate, args)
 
+_TPTP_TOKEN = re.compile(r"""
+    (?P<space>\s+|%[^\n]*|/\*.*?\*/)
+  | (?P<op><=>|<~>|=>|<=|~\||~&|!=|[=~|&!?()\[\],:.])
+  | (?P<upper>[A-Z][A-Za-z0-9_]*)
+  | (?P<word>\$?\$?[a-z][A-Za-z0-9_]*|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[+-]?[0-9]+(?:\.[0-9]+)?(?:/[0-9]+)?)
+""", re.VERBOSE | re.DOTALL)
+
+_TPTP_BINARY = {'<=>', '<~>', '=>', '<=', '~|', '~&'}
+
+def _tokenize_tptp(input_str: str) -> List[tuple]:
+    tokens = []
+    pos = 0
+    while pos < len(input_str):
+        match = _TPTP_TOKEN.match(input_str, pos)
+        if match is None:
+            raise SyntaxError(f"Unexpected character {input_str[pos]!r} at offset {pos}")
+        if match.lastgroup != 'space':
+            tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    return tokens
+
+class _TPTPReader:
+    """Recursive-descent reader for TPTP cnf/fof statements"""
+
+    def __init__(self, input_str: str):
+        self.tokens = _tokenize_tptp(input_str)
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+
+    def next(self) -> tuple:
+        if self.pos >= len(self.tokens):
+            raise SyntaxError("Unexpected end of TPTP input")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, value: str):
+        kind, text = self.next()
+        if text != value:
+            raise SyntaxError(f"Expected {value!r}, found {text!r}")
+
+    def statements(self) -> List[tuple]:
+        """Return (language, name, role, formula) for every annotated formula"""
+        result = []
+        while self.peek() is not None:
+            _, language = self.next()
+            self.expect('(')
+            if language == 'include':
+                self.skip_balanced()
+                self.expect('.')
+                continue
+            _, name = self.next()
+            self.expect(',')
+            _, role = self.next()
+            self.expect(',')
+            formula = self.formula()
+            if self.peek() == ',':
+                self.next()
+                self.skip_balanced()
+            else:
+                self.expect(')')
+            self.expect('.')
+            result.append((language, name, role, formula))
+        return result
+
+    def skip_balanced(self):
+        """Skip tokens up to and including the ')' closing the current statement"""
+        depth = 1
+        while depth:
+            _, text = self.next()
+            if text in '([':
+                depth += 1
+            elif text in ')]':
+                depth -= 1
+
+    def formula(self) -> Formula:
+        left = self.unitary()
+        op = self.peek()
+        if op in ('&', '|'):
+            args = [left]
+            while self.peek() == op:
+                self.next()
+                args.append(self.unitary())
+            return Formula('and' if op == '&' else 'or', args)
+        if op in _TPTP_BINARY:
+            self.next()
+            right = self.unitary()
+            if op == '=>':
+                return Formula('implies', [left, right])
+            if op == '<=':
+                return Formula('implies', [right, left])
+            if op == '<=>':
+                return Formula('iff', [left, right])
+            if op == '<~>':
+                return Formula('not', [Formula('iff', [left, right])])
+            if op == '~|':
+                return Formula('not', [Formula('or', [left, right])])
+            return Formula('not', [Formula('and', [left, right])])
+        return left
+
+    def unitary(self) -> Formula:
+        token = self.peek()
+        if token in ('!', '?'):
+            self.next()
+            self.expect('[')
+            variables = []
+            while True:
+                _, name = self.next()
+                variables.append(name)
+                if self.peek() == ',':
+                    self.next()
+                    continue
+                break
+            self.expect(']')
+            self.expect(':')
+            body = self.unitary()
+            return Formula('forall' if token == '!' else 'exists', [body], variables=variables)
+        if token == '~':
+            self.next()
+            return Formula('not', [self.unitary()])
+        if token == '(':
+            self.next()
+            inner = self.formula()
+            self.expect(')')
+            return inner
+        return self.atomic()
+
+    def atomic(self) -> Formula:
+        left = self.term()
+        if self.peek() in ('=', '!='):
+            _, op = self.next()
+            right = self.term()
+            return Formula('atom', atom=Literal(op == '=', '=', [left, right]))
+        if left.kind == 'var':
+            raise SyntaxError(f"Variable {left.name} used as a formula")
+        if left.name == '$true':
+            return Formula('true')
+        if left.name == '$false':
+            return Formula('false')
+        return Formula('atom', atom=Literal(True, left.name, left.args))
+
+    def term(self) -> Term:
+        kind, name = self.next()
+        if kind == 'upper':
+            return Term('var', name)
+        if kind != 'word':
+            raise SyntaxError(f"Expected a term, found {name!r}")
+        if self.peek() != '(':
+            return Term('const', name)
+        self.next()
+        args = [self.term()]
+        while self.peek() == ',':
+            self.next()
+            args.append(self.term())
+        self.expect(')')
+        return Term('func', name, args)
+
+def parse_tptp_formulas(input_str: str) -> List[tuple]:
+    """Parse TPTP input into (language, name, role, Formula) tuples"""
+    return _TPTPReader(input_str).statements()
+
+def _formula_literals(formula: Formula) -> List[Literal]:
+    """Flatten a cnf() formula into its literals"""
+    if formula.kind == 'or':
+        return [lit for arg in formula.args for lit in _formula_literals(arg)]
+    if formula.kind == 'not' and formula.args[0].kind == 'atom':
+        atom = formula.args[0].atom
+        return [Literal(not atom.positive, atom.predicate, atom.args)]
+    if formula.kind == 'atom':
+        return [formula.atom]
+    if formula.kind == 'false':
+        return []
+    raise SyntaxError(f"Not a clause: {formula.kind} inside cnf()")
+
 def parse_tptp(input_str: str) -> List[Clause]:
-    """Parse TPTP format into internal clause representation"""
+    """
+    Parse TPTP format into internal clause representation
+    
+    cnf() statements are read as clauses directly. fof() statements are
+    clausified with clausify.to_cnf, with conjectures negated first.
+    """
+    from .clausify import to_cnf
+    
     clauses = []
+    formulas = []
     
-    # Remove comments and split into lines
-    lines = []
-    for line in input_str.split('\n'):
-        line = line.strip()
-        if line and not line.startswith('%'):
-            lines.append(line)
+    for language, name, role, formula in parse_tptp_formulas(input_str):
+        if language == 'cnf':
+            if formula.kind != 'true':
+                clauses.append(Clause(_formula_literals(formula)))
+        elif language == 'fof':
+            if role == 'conjecture':
+                formula = Formula('not', [formula])
+            formulas.append(formula)
+        else:
+            raise SyntaxError(f"Unsupported TPTP language: {language}")
     
-    for line in lines:
-        if line.startswith('cnf('):
-            # Extract the formula part
-            formula_start = line.find(',', line.find(',') + 1) + 1
-            formula_end = line.rfind(')')
-            formula = line[formula_start:formula_end].strip()
-            
-            # Parse disjunction of literals
-            literals = []
-            if '|' in formula:
-                lit_strs = formula.split('|')
-            else:
-                lit_strs = [formula]
-            
-            for lit_str in lit_strs:
-                literals.append(parse_literal(lit_str.strip()))
-            
-            clauses.append(Clause(literals))
+    if formulas:
+        clauses.extend(to_cnf(formulas))
     
     return clauses
 
 def parse_smtlib(input_str: str) -> List[Clause]:
-    """Parse SMT-LIB format into internal clause representation"""
-    # Simplified SMT-LIB parser for basic propositional logic
-    clauses = []
+    """
+    Parse SMT-LIB format into internal clause representation
     
-    # Find assert statements
-    assert_pattern = r'\(assert\s+([^)]+)\)'
-    matches = re.findall(assert_pattern, input_str)
+    Declarations, definitions and assertions are Tseitin-encoded by
+    smtlib.SMTLibInterpreter; all other commands are ignored. Atoms keep
+    their SMT-LIB names and definition variables are named _tN. Use the
+    interpreter directly to run scripts with push/pop and check-sat.
+    """
+    from .smtlib import SMTLibInterpreter, iter_sexprs
     
-    for match in matches:
-        # Convert SMT-LIB to clause form (very simplified)
-        formula = match.strip()
-        
-        # Handle basic OR statements
-        if formula.startswith('(or'):
-            lit_strs = re.findall(r'(\w+|\(not\s+\w+\))', formula)
-            literals = []
-            
-            for lit_str in lit_strs:
-                if lit_str.startswith('(not'):
-                    pred = re.search(r'not\s+(\w+)', lit_str).group(1)
-                    literals.append(Literal(False, pred, []))
-                else:
-                    literals.append(Literal(True, lit_str, []))
-            
-            clauses.append(Clause(literals))
-        else:
-            # Single literal
-            if formula.startswith('(not'):
-                pred = re.search(r'not\s+(\w+)', formula).group(1)
-                literals = [Literal(False, pred, [])]
-            else:
-                literals = [Literal(True, formula, [])]
-            
-            clauses.append(Clause(literals))
+    interpreter = SMTLibInterpreter()
+    for command in iter_sexprs(input_str):
+        if isinstance(command, list) and command and command[0] in (
+                'declare-sort', 'declare-fun', 'declare-const', 'define-fun', 'assert'):
+            response = interpreter.execute(command)
+            if response is not None:
+                raise SyntaxError(response)
     
+    names = interpreter.encoder.names
+    clauses = []
+    for clause in interpreter.solver.formula.clauses:
+        clauses.append(Clause([Literal(lit.positive, names.get(lit.var, f"_t{lit.var}"), []) 
+                               for lit in clause.literals]))
     return clauses
@@ -1,21 +1,132 @@
 from typing import List, Dict
-from .parser import Clause, Literal, Term
+from .parser import Literal, Term, Formula
 
-def skolemize(clauses: List[Clause]) -> List[Clause]:
-    """Convert formula to Skolem normal form"""
-    skolem_funcs: Dict[str, int] = {}  # Track skolem function symbols
+def term_variables(term: Term) -> List[str]:
+    """Variables of a term, in order of first occurrence"""
+    if term.kind == 'var':
+        return [term.name]
     result = []
-    
+    for arg in term.args:
+        for var in term_variables(arg):
+            if var not in result:
+                result.append(var)
+    return result
+
+def free_variables(formula: Formula) -> List[str]:
+    """Free variables of a formula, in order of first occurrence"""
+    if formula.kind == 'atom':
+        result = []
+        for arg in formula.atom.args:
+            for var in term_variables(arg):
+                if var not in result:
+                    result.append(var)
+        return result
+
+    result = []
+    for arg in formula.args:
+        for var in free_variables(arg):
+            if var not in result and var not in formula.variables:
+                result.append(var)
+    return result
+
+def substitute_term(term: Term, mapping: Dict[str, Term]) -> Term:
+    """Replace variables in a term according to mapping"""
+    if term.kind == 'var':
+        return mapping.get(term.name, term)
+    if term.kind == 'func':
+        return Term('func', term.name, [substitute_term(arg, mapping) for arg in term.args])
+    return term
+
+def substitute(formula: Formula, mapping: Dict[str, Term]) -> Formula:
+    """Replace free variables in a formula according to mapping"""
+    if formula.kind == 'atom':
+        atom = formula.atom
+        return Formula('atom', atom=Literal(atom.positive, atom.predicate,
+                                            [substitute_term(arg, mapping) for arg in atom.args]))
+    if formula.variables:
+        mapping = {k: v for k, v in mapping.items() if k not in formula.variables}
+    return Formula(formula.kind, [substitute(arg, mapping) for arg in formula.args],
+                   variables=list(formula.variables))
+
+def rename_bound(formula: Formula, counter: List[int] = None) -> Formula:
+    """Give every quantifier its own fresh variable names (B0, B1, ...)"""
+    if counter is None:
+        counter = [0]
+    if formula.kind == 'atom':
+        return formula
+
+    if formula.kind in ('forall', 'exists'):
+        mapping = {}
+        new_vars = []
+        for var in formula.variables:
+            fresh = f"B{counter[0]}"
+            counter[0] += 1
+            mapping[var] = Term('var', fresh)
+            new_vars.append(fresh)
+        body = substitute(formula.args[0], mapping)
+        return Formula(formula.kind, [rename_bound(body, counter)], variables=new_vars)
+
+    return Formula(formula.kind, [rename_bound(arg, counter) for arg in formula.args])
+
+def skolemize(formula: Formula, skolem_funcs: Dict[str, int] = None) -> Formula:
+    """
+    Convert formula to Skolem normal form
+
+    The formula must be in negation normal form with bound variables renamed
+    apart. Each existential variable is replaced by a fresh sk_N term over the
+    universal variables that are free in its (miniscoped) scope, and
+    universal quantifiers are dropped, leaving their variables free.
+
+    Args:
+        formula: NNF formula with distinct bound variable names
+        skolem_funcs: Skolem symbol -> arity, shared across a problem so
+            symbols stay unique; updated in place
+    """
+    if skolem_funcs is None:
+        skolem_funcs = {}  # Track skolem function symbols
+
     def make_skolem_term(vars: List[Term]) -> Term:
         num = len(skolem_funcs)
         sym = f"sk_{num}"
         skolem_funcs[sym] = len(vars)
+        if not vars:
+            return Term(kind='const', name=sym)
         return Term(kind='func', name=sym, args=vars)
-    
-    # TODO: Implement skolemization
-    return result
 
-def prenex(clauses: List[Clause]) -> List[Clause]:
-    """Convert to prenex normal form"""
-    # TODO: Implement prenex conversion
-    pass
\ No newline at end of file
+    def walk(f: Formula) -> Formula:
+        if f.kind in ('atom', 'true', 'false'):
+            return f
+        if f.kind == 'not':
+            return f  # NNF: negation only on atoms
+        if f.kind == 'forall':
+            return walk(f.args[0])
+        if f.kind == 'exists':
+            # Only the variables the subformula actually depends on
+            depends = [Term('var', v) for v in free_variables(f)]
+            mapping = {var: make_skolem_term(depends) for var in f.variables}
+            return walk(substitute(f.args[0], mapping))
+        return Formula(f.kind, [walk(arg) for arg in f.args])
+
+    return walk(formula)
+
+def prenex(formula: Formula) -> Formula:
+    """
+    Convert to prenex normal form
+
+    The formula must be in negation normal form with bound variables renamed
+    apart, so quantifiers can be pulled to the front without capture.
+    """
+    prefix: List[tuple] = []
+
+    def pull(f: Formula) -> Formula:
+        if f.kind in ('forall', 'exists'):
+            prefix.append((f.kind, f.variables))
+            return pull(f.args[0])
+        if f.kind in ('and', 'or'):
+            return Formula(f.kind, [pull(arg) for arg in f.args])
+        return f
+
+    matrix = pull(formula)
+    for kind, variables in reversed(prefix):
+        matrix = Formula(kind, [matrix], variables=list(variables))
+    return matrix
@@ -1,21 +1,46 @@
 
-from typing import Set, List, Optional
-from .parser import Clause, Literal
-from .unification import unify, apply_substitution
+import heapq
+from typing import Set, List, Optional, Dict, Iterator, Union
+from .parser import Clause, Literal, Term
+from ..budget import PartialResult
+from ..stats import STATS
+from .unification import unify, unify_terms, apply_substitution
+from .variants import VariantTable, variant_key
+
+INFERENCE_MODES = ('binary', 'hyper', 'neg_hyper', 'ur')
 
 class ResolutionProver:
     def __init__(self, clauses: List[Clause]):
         self.usable: Set[Clause] = set()
         self.sos: Set[Clause] = set()  # Set of support
+        # Selection order of sos: (length, ticket, clause), tickets by age
+        self.queue: List[tuple] = []
+        self.tickets = 0
         self.used: Set[Clause] = set()
+        # Every clause kept so far, up to variable renaming
+        self.variants = VariantTable()
+        self.fresh = 0  # Counter for renaming satellites apart
+        self.steps = 0  # Given clauses processed over the prover's lifetime
         
         # Separate goal clauses from axioms
         for clause in clauses:
+            if not self.variants.add(clause):
+                continue
             if self.is_goal_clause(clause):
-                self.sos.add(clause)
+                self.add_to_sos(clause)
             else:
                 self.usable.add(clause)
     
+    def add_to_sos(self, clause: Clause):
+        """Queue clause for selection, after older clauses of its length"""
+        self.sos.add(clause)
+        heapq.heappush(self.queue, (len(clause.literals), self.tickets, clause))
+        self.tickets += 1
+    
+    def passive(self) -> List[Clause]:
+        """The set of support in selection order"""
+        return [clause for _, _, clause in sorted(self.queue, key=lambda item: item[:2])]
+    
     def is_goal_clause(self, clause: Clause) -> bool:
         """Heuristic to identify goal clauses (typically negated goals)"""
         # Simple heuristic: clauses with only negative literals might be goals
@@ -44,8 +69,8 @@ class ResolutionProver:
                             new_lit = self.apply_subst_to_literal(lit, subst)
                             new_literals.append(new_lit)
                     
-                    # Remove duplicates
-                    new_literals = list(set(new_literals))
+                    # Remove duplicates (keeping order, so results are reproducible)
+                    new_literals = list(dict.fromkeys(new_literals))
                     resolvent = Clause(new_literals)
                     resolvents.append(resolvent)
         
@@ -99,40 +124,291 @@ class ResolutionProver:
         
         return factors
     
-    def prove(self, max_steps: int = 1000) -> bool:
-        """Main resolution loop with set-of-support strategy"""
+    def rename_apart(self, clause: Clause) -> Clause:
+        """Return a copy of clause with fresh variable names"""
+        subst: Dict[str, Term] = {}
+        for lit in clause.literals:
+            for arg in lit.args:
+                for var in self._variables(arg):
+                    if var not in subst:
+                        subst[var] = Term('var', f"R{self.fresh}")
+                        self.fresh += 1
+        return Clause([self.apply_subst_to_literal(lit, subst) 
+                       for lit in clause.literals])
+    
+    def _variables(self, term: Term) -> Iterator[str]:
+        if term.kind == 'var':
+            yield term.name
+        elif term.kind == 'func':
+            for arg in term.args:
+                yield from self._variables(arg)
+    
+    def _unify_complementary(self, lit1: Literal, lit2: Literal, 
+                             subst: Dict[str, Term]) -> Optional[Dict[str, Term]]:
+        """Extend subst so that lit1 and lit2 are complementary, without mutating it"""
+        if (lit1.positive == lit2.positive or 
+            lit1.predicate != lit2.predicate or
+            len(lit1.args) != len(lit2.args)):
+            return None
+        if STATS.enabled:
+            STATS.counters['unify.attempts'] += 1  # Matching literals only
+        
+        subst = dict(subst)
+        for arg1, arg2 in zip(lit1.args, lit2.args):
+            subst = unify_terms(arg1, arg2, subst)
+            if subst is None:
+                if STATS.enabled:
+                    STATS.counters['unify.failures'] += 1
+                return None
+        return subst
+    
+    def _clash(self, targets: List[Literal], slots: List[List[Clause]], 
+               subst: Dict[str, Term], used: List[Clause], 
+               residue: List[Literal]) -> Iterator[tuple]:
+        """
+        Resolve every target literal against some satellite simultaneously
+        
+        targets[i] is clashed with the clauses of slots[i]. Yields
+        (substitution, satellites used, leftover satellite literals) for
+        each way of clashing all targets.
+        """
+        if not targets:
+            yield subst, used, residue
+            return
+        
+        target, rest = targets[0], targets[1:]
+        for satellite in slots[0]:
+            renamed = self.rename_apart(satellite)
+            for k, lit in enumerate(renamed.literals):
+                extended = self._unify_complementary(target, lit, subst)
+                if extended is None:
+                    continue
+                leftover = [l for m, l in enumerate(renamed.literals) if m != k]
+                yield from self._clash(rest, slots[1:], extended, 
+                                       used + [satellite], residue + leftover)
+    
+    def _slots(self, targets: List[Literal], satellites: List[Clause], 
+               given: Optional[Clause]) -> Iterator[tuple]:
+        """
+        (targets, slots) orderings to clash, with given in some satellite slot
+        
+        Without given every target takes any satellite. With it (the
+        given-clause discipline), given fills slot i, earlier slots take
+        only the other satellites and later ones any satellite, so each
+        inference using given is produced exactly once and none without
+        it. The given slot is clashed first, where it prunes most.
+        """
+        if given is None:
+            yield targets, [satellites] * len(targets)
+            return
+        if not any(satellite is given for satellite in satellites):
+            return
+        older = [satellite for satellite in satellites if satellite is not given]
+        for i, target in enumerate(targets):
+            others = targets[:i] + targets[i + 1:]
+            yield [target] + others, [[given]] + [older] * i + [satellites] * (len(others) - i)
+    
+    def _build(self, literals: List[Literal], subst: Dict[str, Term]) -> Clause:
+        new_literals = [self.apply_subst_to_literal(lit, subst) for lit in literals]
+        return Clause(list(dict.fromkeys(new_literals)))
+    
+    def _hyper_inferences(self, nucleus: Clause, satellites: List[Clause], 
+                          positive: bool, given: Clause = None) -> Iterator[tuple]:
+        targets = [lit for lit in nucleus.literals if lit.positive != positive]
+        kept = [lit for lit in nucleus.literals if lit.positive == positive]
+        satellites = [s for s in satellites 
+                      if s.literals and all(l.positive == positive for l in s.literals)]
+        if not targets:
+            return
+        
+        for ordered, slots in self._slots(targets, satellites, given):
+            for subst, used, residue in self._clash(ordered, slots, {}, [], []):
+                yield self._build(kept + residue, subst), used
+    
+    def _ur_inferences(self, nucleus: Clause, units: List[Clause], 
+                       given: Clause = None) -> Iterator[tuple]:
+        units = [u for u in units if len(u.literals) == 1]
+        literals = nucleus.literals
+        
+        # Leave out one literal as the result, or none for the empty clause
+        for keep in [None] + list(range(len(literals))):
+            targets = [lit for k, lit in enumerate(literals) if k != keep]
+            kept = [] if keep is None else [literals[keep]]
+            for ordered, slots in self._slots(targets, units, given):
+                for subst, used, _ in self._clash(ordered, slots, {}, [], []):
+                    yield self._build(kept, subst), used
+    
+    def hyperresolve(self, nucleus: Clause, satellites: List[Clause], 
+                     positive: bool = True) -> List[Clause]:
+        """
+        Hyperresolvents of nucleus against satellites
+        
+        In positive mode the satellites are the positive clauses and every
+        negative literal of the nucleus is resolved away in one step, so the
+        result is again positive. Negative mode is the dual.
+        """
+        return [r for r, _ in self._hyper_inferences(nucleus, satellites, positive)]
+    
+    def ur_resolve(self, nucleus: Clause, units: List[Clause]) -> List[Clause]:
+        """
+        Unit-resulting resolvents of nucleus against unit clauses
+        
+        All but at most one nucleus literal are resolved away with units,
+        so every result is a unit clause or the empty clause.
+        """
+        return [r for r, _ in self._ur_inferences(nucleus, units)]
+    
+    def _is_nucleus(self, clause: Clause, inference: str) -> bool:
+        if inference == 'hyper':
+            return any(not lit.positive for lit in clause.literals)
+        if inference == 'neg_hyper':
+            return any(lit.positive for lit in clause.literals)
+        return bool(clause.literals)
+    
+    def _multi_inferences(self, nucleus: Clause, satellites: List[Clause], 
+                          inference: str, given: Clause = None) -> Iterator[tuple]:
+        if inference == 'ur':
+            return self._ur_inferences(nucleus, satellites, given)
+        return self._hyper_inferences(nucleus, satellites, inference == 'hyper', given)
+    
+    def generate(self, given: Clause, inference: str = 'binary') -> List[Clause]:
+        """
+        Conclusions of given against the processed clauses
+        
+        Binary mode resolves given with each partner. The other modes build
+        only the final resolvent of a nucleus and all of its satellites, with
+        given taking part either as the nucleus or as one of the satellites.
+        """
+        processed = list(self.usable | self.used)
+        
+        if inference == 'binary':
+            resolvents = []
+            for partner in processed:
+                resolvents.extend(self.resolve(given, partner))
+            return resolvents
+        
+        results = []
+        if self._is_nucleus(given, inference):
+            for resolvent, _ in self._multi_inferences(given, processed, inference):
+                results.append(resolvent)
+        
+        for nucleus in processed:
+            if nucleus is given or not self._is_nucleus(nucleus, inference):
+                continue
+            # Only clashes with given in a satellite slot are new
+            for resolvent, _ in self._multi_inferences(nucleus, processed, inference, given):
+                results.append(resolvent)
+        
+        return results
+    
+    def prove(self, max_steps: int = 1000, inference: str = 'binary', 
+              workers: int = 0, checkpoint=None, budget=None) -> Union[bool, PartialResult]:
+        """
+        Main resolution loop with set-of-support strategy
+        
+        Args:
+            max_steps: Maximum number of given clauses to process
+            inference: 'binary' resolution, positive 'hyper' or 'neg_hyper'
+                resolution, or unit-resulting 'ur' resolution
+            workers: Number of worker processes to share binary resolution
+                over; 0 or 1 keeps everything in this process
+            checkpoint: Optional checkpoint.Checkpointer, consulted after
+                every given clause to write periodic snapshots
+            budget: Optional budget.Budget, ticked once per given clause
+        
+        Returns:
+            True if the empty clause was derived, False if saturated or out
+            of steps, or a PartialResult if the budget ran out
+        """
+        if inference not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {inference}")
+        
+        if inference == 'hyper':
+            # Positive hyperresolution saturates from the positive clauses,
+            # which the goal-based set of support would never select
+            for clause in sorted(self.usable, key=variant_key):
+                self.add_to_sos(clause)
+            self.usable = set()
+        
+        if workers > 1:
+            if inference != 'binary':
+                raise ValueError("Parallel inference only supports binary resolution")
+            from .parallel import ParallelInference
+            with ParallelInference(workers, list(self.usable | self.used)) as engine, \
+                    STATS.timer('resolution.saturate'):
+                return self._saturate(max_steps, inference, engine, checkpoint, budget)
+        
+        with STATS.timer('resolution.saturate'):
+            return self._saturate(max_steps, inference, None, checkpoint, budget)
+    
+    def _saturate(self, max_steps: int, inference: str, engine, checkpoint,
+                  budget) -> Union[bool, PartialResult]:
         step = 0
+        kept = 0  # Clauses added to the set of support
         
         while self.sos and step < max_steps:
+            if budget is not None and budget.tick():
+                return PartialResult(budget.reason, clauses=kept, progress={
+                    'steps': step, 'sos': len(self.sos), 'usable': len(self.usable),
+                    'used': len(self.used), 'duplicates': self.variants.duplicates})
+            
             # Select clause from SOS
-            given = min(self.sos, key=lambda c: len(c.literals))  # Prefer shorter clauses
+            # Shortest clause first, oldest among equals, so the search does
+            # not depend on set order (hash seeds, worker count)
+            given = heapq.heappop(self.queue)[2]
             self.sos.remove(given)
             self.used.add(given)
+            STATS.count('resolution.given')
             
             # Empty clause found - proof complete
             if not given.literals:
                 return True
             
-            # Generate factors
-            factors = self.factor(given)
-            for factor in factors:
+            if engine is not None:
+                engine.add(given)
+                factors, conclusions = engine.infer(given)
+            else:
+                factors = self.factor(given)
+                conclusions = None
+            
+            # Generate factors; new clauses are queued in variant order
+            for factor in sorted(factors, key=variant_key):
                 if not factor.literals:  # Empty clause
                     return True
-                self.sos.add(factor)
+                if self.variants.add(factor):
+                    self.add_to_sos(factor)
+                    kept += 1
+                    STATS.count('resolution.factors')
             
-            # Generate resolvents with usable and used clauses
-            for partner in self.usable | self.used:
-                resolvents = self.resolve(given, partner)
+            if conclusions is None:
+                conclusions = self.generate(given, inference)
+            STATS.count('resolution.resolvents', len(conclusions))
+            
+            # Generate conclusions with usable and used clauses
+            for resolvent in sorted(conclusions, key=variant_key):
+                if not resolvent.literals:  # Empty clause
+                    return True
                 
-                for resolvent in resolvents:
-                    if not resolvent.literals:  # Empty clause
-                        return True
-                    
-                    # Check if resolvent is new and non-redundant
-                    if not any(self.subsumes(c, resolvent) 
-                             for c in self.usable | self.sos | self.used):
-                        self.sos.add(resolvent)
+                # Drop renamed copies of clauses we have already seen
+                if not self.variants.add(resolvent):
+                    if STATS.enabled:
+                        STATS.counters['resolution.variants_dropped'] += 1
+                    continue
+                
+                # Check if resolvent is new and non-redundant
+                if not any(self.subsumes(c, resolvent) 
+                         for c in self.usable | self.sos | self.used):
+                    self.add_to_sos(resolvent)
+                    kept += 1
+                    if STATS.enabled:
+                        STATS.counters['resolution.kept'] += 1
+                elif STATS.enabled:
+                    STATS.counters['resolution.subsumed'] += 1
             
             step += 1
+            self.steps += 1
+            
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save(self)
         
         return False
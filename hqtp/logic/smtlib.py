@@ -0,0 +1,547 @@
+import re
+from typing import Dict, Iterator, List, Optional, Union, TextIO
+from ..budget import PartialResult
+from ..sat.cdcl import CDCLSolver
+from ..sat.cnf import Clause as CNFClause, Literal as CNFLiteral
+
+_SEXPR_TOKEN = re.compile(r'''
+    \s+
+  | ;[^\n]*(?:\n|$)
+  | [()]
+  | "(?:[^"]|"")*"
+  | \|[^|]*\|
+  | [^\s()";|]+
+''', re.VERBOSE)
+
+class SMTLibError(Exception):
+    """Unsupported or ill-formed SMT-LIB input"""
+
+# Argument counts (minimum, maximum or None) of the built-in term forms
+_ARITY = {
+    'not': (1, 1), 'and': (0, None), 'or': (0, None), '=>': (2, None),
+    'xor': (2, None), '=': (2, None), 'distinct': (2, None), 'ite': (3, 3),
+    'let': (2, 2), '!': (1, None),
+}
+
+def _chunks(source: Union[str, TextIO]) -> Iterator[str]:
+    if isinstance(source, str):
+        yield source
+    else:
+        # Line by line, so interactive input is answered as it arrives
+        yield from source
+
+def iter_sexprs(source: Union[str, TextIO]) -> Iterator[Union[str, list]]:
+    """
+    Stream top-level s-expressions from a string or text stream
+
+    Atoms are returned as strings (string literals keep their quotes,
+    |quoted| symbols lose their bars) and lists as Python lists. Input is
+    read in chunks, so each command is available as soon as it is complete.
+    """
+    stack: List[list] = []
+    carry = ''
+
+    def consume(buffer: str, final: bool) -> str:
+        pos = 0
+        while pos < len(buffer):
+            match = _SEXPR_TOKEN.match(buffer, pos)
+            if match is None:
+                if final:
+                    raise SMTLibError(f"Malformed input near {buffer[pos:pos + 20]!r}")
+                return buffer[pos:]
+            token = match.group()
+            # A symbol, string or comment touching the end of the buffer may
+            # continue in the next chunk
+            if match.end() == len(buffer) and not final and token not in '()' \
+                    and not token.isspace():
+                return buffer[pos:]
+            pos = match.end()
+
+            if token[0].isspace() or token[0] == ';':
+                continue
+            if token == '(':
+                stack.append([])
+                continue
+            if token == ')':
+                if not stack:
+                    raise SMTLibError("Unbalanced ')'")
+                done = stack.pop()
+                if stack:
+                    stack[-1].append(done)
+                else:
+                    completed.append(done)
+                continue
+            if token[0] == '|':
+                token = token[1:-1]
+            if stack:
+                stack[-1].append(token)
+            else:
+                completed.append(token)
+        return ''
+
+    for chunk in _chunks(source):
+        completed: List[Union[str, list]] = []
+        carry = consume(carry + chunk, False)
+        yield from completed
+
+    completed = []
+    consume(carry, True)
+    yield from completed
+    if stack:
+        raise SMTLibError("Unexpected end of input inside an s-expression")
+
+def _error(e: SMTLibError) -> str:
+    """SMT-LIB error response for an exception"""
+    message = str(e).replace('"', '""')
+    return f'(error "{message}")'
+
+class TseitinEncoder:
+    """
+    Incremental Tseitin encoding of SMT-LIB Boolean terms into a CDCL solver
+
+    Every connective application gets a definition variable with the full
+    (two-sided) Tseitin clauses, so definitions are valid in every scope and
+    are cached by their argument literals. Atoms are Boolean constants and
+    applications of uninterpreted predicates to ground terms; without
+    equality over other sorts, each distinct application is an independent
+    propositional atom.
+    """
+
+    def __init__(self, solver: CDCLSolver):
+        self.solver = solver
+        self.cache: Dict[tuple, int] = {}  # (op, args) -> literal
+        self.atoms: Dict[tuple, int] = {}  # Ground predicate application -> variable
+        self.names: Dict[int, str] = {}  # Variable -> printable atom
+        self.true_var: Optional[int] = None
+
+    def add_clause(self, lits: List[int]):
+        self.solver.formula.add_clause(CNFClause([CNFLiteral(abs(l), l > 0) for l in lits]))
+
+    def new_var(self, name: str = None) -> int:
+        var = self.solver.new_variable()
+        if name is not None:
+            self.names[var] = name
+        return var
+
+    def true(self) -> int:
+        if self.true_var is None:
+            self.true_var = self.new_var()
+            self.add_clause([self.true_var])
+        return self.true_var
+
+    def atom(self, key: tuple, name: str) -> int:
+        if key not in self.atoms:
+            self.atoms[key] = self.new_var(name)
+        return self.atoms[key]
+
+    def gate(self, op: str, args: List[int]) -> int:
+        """Literal equivalent to op applied to argument literals"""
+        if op == 'and':
+            args = list(dict.fromkeys(args))
+            if len(args) == 1:
+                return args[0]
+        elif op == 'or':
+            return -self.gate('and', [-a for a in args])
+
+        key = (op, tuple(args))
+        if key in self.cache:
+            return self.cache[key]
+
+        v = self.new_var()
+        if op == 'and':
+            for a in args:
+                self.add_clause([-v, a])
+            self.add_clause([v] + [-a for a in args])
+        elif op == 'iff':
+            a, b = args
+            self.add_clause([-v, -a, b])
+            self.add_clause([-v, a, -b])
+            self.add_clause([v, a, b])
+            self.add_clause([v, -a, -b])
+        elif op == 'ite':
+            c, a, b = args
+            self.add_clause([-v, -c, a])
+            self.add_clause([-v, c, b])
+            self.add_clause([v, -c, -a])
+            self.add_clause([v, c, -b])
+        else:
+            raise ValueError(f"Unknown gate {op}")
+
+        self.cache[key] = v
+        return v
+
+class SMTLibInterpreter:
+    """
+    Command interpreter for the propositional / QF_UF subset of SMT-LIB 2
+
+    Assertions are Tseitin-encoded into one incremental CDCLSolver as they
+    arrive. Each push opens a scope with a fresh activation variable: the
+    scope's assertions are added as (~act | assertion) and check-sat assumes
+    every open activation variable, so pop only has to add ~act. Learned
+    clauses survive across check-sat calls.
+
+    Supported: set-logic, set-option, set-info, get-info, declare-sort,
+    declare-fun, declare-const, define-fun, assert, check-sat,
+    check-sat-assuming, push, pop, get-model, echo, reset and exit. Terms may
+    use the core Boolean connectives, let, ! annotations (:named), and
+    uninterpreted predicates over ground terms. Equality is supported on
+    Bool only.
+    """
+
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget: Optional budget.Budget shared by every check-sat; once
+                it runs out they answer unknown
+        """
+        self.budget = budget
+        self.reason_unknown: Optional[str] = None
+        self.reset()
+        self.done = False
+
+    def reset(self):
+        self.solver = CDCLSolver()
+        self.encoder = TseitinEncoder(self.solver)
+        self.sorts: Dict[str, tuple] = {}  # Function name -> (argument sorts, result sort)
+        self.definitions: Dict[str, tuple] = {}  # Macro name -> (params, result sort, body)
+        self.named: Dict[str, int] = {}  # :named label -> literal
+        # Open scopes: (activation variable, names declared in the scope)
+        self.scopes: List[tuple] = []
+        self.model: Optional[Dict[int, bool]] = None
+
+    def run(self, source: Union[str, TextIO]) -> Iterator[str]:
+        """
+        Execute a script, yielding each response as it is produced
+        
+        A script that cannot be read further (unbalanced parentheses,
+        truncated input) ends with an error response.
+        """
+        commands = iter_sexprs(source)
+        while not self.done:
+            try:
+                command = next(commands)
+            except StopIteration:
+                break
+            except SMTLibError as e:
+                yield _error(e)
+                break
+            response = self.execute(command)
+            if response is not None:
+                yield response
+
+    def execute(self, command) -> Optional[str]:
+        """Execute one command, returning its response (if any)"""
+        try:
+            if not isinstance(command, list) or not command or not isinstance(command[0], str):
+                raise SMTLibError("Command expected")
+            handler = getattr(self, '_cmd_' + command[0].replace('-', '_'), None)
+            if handler is None:
+                raise SMTLibError(f"Unsupported command: {command[0]}")
+            return handler(command[1:])
+        except SMTLibError as e:
+            return _error(e)
+
+    # Commands
+
+    def _cmd_set_logic(self, args):
+        return None
+
+    def _cmd_set_option(self, args):
+        return None
+
+    def _cmd_set_info(self, args):
+        return None
+
+    def _cmd_get_info(self, args):
+        if args and args[0] == ':name':
+            return '(:name "hqtp")'
+        if args and args[0] == ':reason-unknown' and self.reason_unknown is not None:
+            return f'(:reason-unknown {self.reason_unknown})'
+        raise SMTLibError(f"Unsupported info flag: {args[0] if args else ''}")
+
+    def _cmd_declare_sort(self, args):
+        return None
+
+    def _declare(self, name: str, arg_sorts: list, sort):
+        if not isinstance(name, str):
+            raise SMTLibError("Symbol expected")
+        if name in self.sorts or name in self.definitions:
+            raise SMTLibError(f"Symbol {name} already declared")
+        self.sorts[name] = (tuple(self._sort_name(s) for s in arg_sorts), self._sort_name(sort))
+        if self.scopes:
+            self.scopes[-1][1].append(name)
+
+    def _cmd_declare_fun(self, args):
+        if len(args) != 3 or not isinstance(args[1], list):
+            raise SMTLibError("Malformed declare-fun")
+        self._declare(args[0], args[1], args[2])
+
+    def _cmd_declare_const(self, args):
+        if len(args) != 2:
+            raise SMTLibError("Malformed declare-const")
+        self._declare(args[0], [], args[1])
+
+    def _cmd_define_fun(self, args):
+        if len(args) != 4 or not isinstance(args[1], list):
+            raise SMTLibError("Malformed define-fun")
+        name, params, sort, body = args
+        if not isinstance(name, str) or not all(isinstance(p, list) and len(p) == 2 and
+                                                isinstance(p[0], str) for p in params):
+            raise SMTLibError("Malformed define-fun")
+        if name in self.sorts or name in self.definitions:
+            raise SMTLibError(f"Symbol {name} already declared")
+        params = [(p[0], self._sort_name(p[1])) for p in params]
+        self.definitions[name] = (params, self._sort_name(sort), body)
+        if self.scopes:
+            self.scopes[-1][1].append(name)
+
+    def _cmd_assert(self, args):
+        if len(args) != 1:
+            raise SMTLibError("Malformed assert")
+        self._assert(args[0], {})
+
+    def _cmd_check_sat(self, args):
+        return self._check([])
+
+    def _cmd_check_sat_assuming(self, args):
+        if len(args) != 1 or not isinstance(args[0], list):
+            raise SMTLibError("Malformed check-sat-assuming")
+        return self._check([self._bool(term, {}) for term in args[0]])
+
+    def _cmd_push(self, args):
+        for _ in range(self._count(args)):
+            self.scopes.append((self.encoder.new_var(), []))
+
+    def _cmd_pop(self, args):
+        count = self._count(args)
+        if count > len(self.scopes):
+            raise SMTLibError("pop exceeds the number of pushed scopes")
+        for _ in range(count):
+            activation, names = self.scopes.pop()
+            # Permanently disable the scope's assertions
+            self.encoder.add_clause([-activation])
+            for name in names:
+                self.sorts.pop(name, None)
+                self.definitions.pop(name, None)
+                self.named.pop(name, None)
+        self.model = None
+
+    def _cmd_get_model(self, args):
+        if self.model is None:
+            raise SMTLibError("No model available")
+        lines = ['(']
+        for name, (arg_sorts, sort) in self.sorts.items():
+            if arg_sorts or sort != 'Bool':
+                continue
+            var = self.encoder.atoms.get((name,))
+            value = 'true' if var is not None and self.model.get(var, False) else 'false'
+            lines.append(f'  (define-fun {name} () Bool {value})')
+        lines.append(')')
+        return '\n'.join(lines)
+
+    def _cmd_echo(self, args):
+        return args[0] if args else '""'
+
+    def _cmd_reset(self, args):
+        self.reset()
+
+    def _cmd_exit(self, args):
+        self.done = True
+
+    # Helpers
+
+    def _count(self, args) -> int:
+        if not args:
+            return 1
+        if not isinstance(args[0], str) or not args[0].isdigit():
+            raise SMTLibError(f"Expected a numeral, found {args[0]}")
+        return int(args[0])
+
+    def _sort_name(self, sort) -> str:
+        if isinstance(sort, list):
+            return '(' + ' '.join(self._sort_name(s) for s in sort) + ')'
+        return sort
+
+    def _check(self, extra: List[int]) -> str:
+        assumptions = [CNFLiteral(activation, True) for activation, _ in self.scopes]
+        assumptions += [CNFLiteral(abs(l), l > 0) for l in extra]
+        self.model = self.solver.solve(assumptions=assumptions, budget=self.budget)
+        self.reason_unknown = None
+        if isinstance(self.model, PartialResult):
+            self.reason_unknown, self.model = self.model.reason, None
+            return 'unknown'
+        return 'sat' if self.model is not None else 'unsat'
+
+    def _assert(self, term, env: dict):
+        """Add an assertion, splitting top-level conjunctions and disjunctions"""
+        if isinstance(term, list) and term and term[0] == 'and':
+            for arg in term[1:]:
+                self._assert(arg, env)
+            return
+        if isinstance(term, list) and term and term[0] == 'or':
+            self._add_assertion([self._bool(arg, env) for arg in term[1:]])
+            return
+        self._add_assertion([self._bool(term, env)])
+
+    def _add_assertion(self, lits: List[int]):
+        if self.scopes:
+            lits = lits + [-self.scopes[-1][0]]
+        self.encoder.add_clause(lits)
+
+    def _sort_of(self, term, env: dict) -> str:
+        if isinstance(term, str):
+            if term in env:
+                return env[term][0]
+            if term in ('true', 'false'):
+                return 'Bool'
+            if term in self.sorts:
+                return self.sorts[term][1]
+            if term in self.definitions:
+                return self.definitions[term][1]
+            if term[0].isdigit():
+                return 'Int'
+            raise SMTLibError(f"Unknown symbol: {term}")
+        head = self._head(term)
+        if head in ('not', 'and', 'or', '=>', 'xor', '=', 'distinct'):
+            return 'Bool'
+        if head == 'ite':
+            return self._sort_of(term[2], env)
+        if head == 'let':
+            return self._sort_of(term[2], self._bind(term[1], env))
+        if head == '!':
+            return self._sort_of(term[1], env)
+        if head in self.sorts:
+            return self.sorts[head][1]
+        if head in self.definitions:
+            return self.definitions[head][1]
+        raise SMTLibError(f"Unknown function: {head}")
+
+    def _head(self, term: list) -> str:
+        """Function symbol of an application, checking built-in arities"""
+        if not term or not isinstance(term[0], str):
+            raise SMTLibError("Malformed term: expected a function application")
+        head = term[0]
+        if head in _ARITY:
+            minimum, maximum = _ARITY[head]
+            if len(term) - 1 < minimum or (maximum is not None and len(term) - 1 > maximum):
+                raise SMTLibError(f"Wrong number of arguments to {head}")
+        return head
+
+    def _bind(self, bindings, env: dict) -> dict:
+        """Evaluate let bindings (in parallel) into a new environment"""
+        if not isinstance(bindings, list) or not all(
+                isinstance(b, list) and len(b) == 2 and isinstance(b[0], str) for b in bindings):
+            raise SMTLibError("Malformed let bindings: expected ((name term) ...)")
+        new_env = dict(env)
+        for name, value in bindings:
+            sort = self._sort_of(value, env)
+            new_env[name] = (sort, self._bool(value, env) if sort == 'Bool' else self._ground(value, env))
+        return new_env
+
+    def _ground(self, term, env: dict) -> tuple:
+        """Key identifying a ground term of an uninterpreted sort"""
+        if isinstance(term, str):
+            if term in env:
+                return env[term][1]
+            if term in self.definitions:
+                return self._ground(self.definitions[term][2], {})
+            return (term,)
+        head = self._head(term)
+        if head == 'let':
+            return self._ground(term[2], self._bind(term[1], env))
+        if head == '!':
+            return self._ground(term[1], env)
+        if head == 'ite':
+            raise SMTLibError("ite over non-Bool sorts is not supported")
+        if head in self.definitions:
+            return self._ground(*self._expand(term, env))
+        if head in self.sorts and 'Bool' in self.sorts[head][0]:
+            raise SMTLibError(f"Bool arguments to {head} are not supported")
+        return (head,) + tuple(self._ground(arg, env) for arg in term[1:])
+
+    def _expand(self, term, env: dict) -> tuple:
+        """Macro-expand a define-fun application into (body, environment)"""
+        params, _, body = self.definitions[term[0]]
+        if len(params) != len(term) - 1:
+            raise SMTLibError(f"Wrong number of arguments to {term[0]}")
+        new_env = {}
+        for (name, sort), arg in zip(params, term[1:]):
+            new_env[name] = (sort, self._bool(arg, env) if sort == 'Bool' else self._ground(arg, env))
+        return body, new_env
+
+    def _bool(self, term, env: dict) -> int:
+        """Encode a Bool term, returning its literal"""
+        enc = self.encoder
+
+        if isinstance(term, str):
+            if term in env:
+                return env[term][1]
+            if term == 'true':
+                return enc.true()
+            if term == 'false':
+                return -enc.true()
+            if term in self.named:
+                return self.named[term]
+            if term in self.definitions:
+                return self._bool(self.definitions[term][2], {})
+            if self.sorts.get(term) == ((), 'Bool'):
+                return enc.atom((term,), term)
+            raise SMTLibError(f"Unknown Bool symbol: {term}")
+
+        head, args = self._head(term), term[1:]
+        if head == 'not':
+            return -self._bool(args[0], env)
+        if head == 'and':
+            return enc.gate('and', [self._bool(a, env) for a in args])
+        if head == 'or':
+            return enc.gate('or', [self._bool(a, env) for a in args])
+        if head == '=>':
+            lits = [self._bool(a, env) for a in args]
+            result = lits[-1]
+            for lit in reversed(lits[:-1]):
+                result = enc.gate('or', [-lit, result])
+            return result
+        if head == 'xor':
+            lits = [self._bool(a, env) for a in args]
+            result = lits[0]
+            for lit in lits[1:]:
+                result = -enc.gate('iff', [result, lit])
+            return result
+        if head in ('=', 'distinct'):
+            if any(self._sort_of(a, env) != 'Bool' for a in args):
+                raise SMTLibError(f"{head} is only supported on Bool")
+            lits = [self._bool(a, env) for a in args]
+            if head == '=':
+                return enc.gate('and', [enc.gate('iff', [a, b]) for a, b in zip(lits, lits[1:])])
+            return enc.gate('and', [-enc.gate('iff', [a, b])
+                                    for k, a in enumerate(lits) for b in lits[k + 1:]])
+        if head == 'ite':
+            return enc.gate('ite', [self._bool(a, env) for a in args])
+        if head == 'let':
+            return self._bool(args[1], self._bind(args[0], env))
+        if head == '!':
+            lit = self._bool(args[0], env)
+            for key, value in zip(args[1::2], args[2::2]):
+                if key == ':named':
+                    if not isinstance(value, str):
+                        raise SMTLibError("Malformed :named annotation")
+                    self.named[value] = lit
+                    if self.scopes:
+                        self.scopes[-1][1].append(value)
+            return lit
+        if head in self.definitions:
+            return self._bool(*self._expand(term, env))
+        if head in self.sorts:
+            arg_sorts, sort = self.sorts[head]
+            if sort != 'Bool':
+                raise SMTLibError(f"{head} is not Bool-valued")
+            if len(arg_sorts) != len(args):
+                raise SMTLibError(f"Wrong number of arguments to {head}")
+            key = self._ground(term, env)
+            return enc.atom(key, self._print(key))
+        raise SMTLibError(f"Unknown function: {head}")
+
+    def _print(self, key: tuple) -> str:
+        if len(key) == 1:
+            return key[0]
+        return '(' + ' '.join([key[0]] + [self._print(arg) for arg in key[1:]]) + ')'
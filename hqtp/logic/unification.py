@@ -1,6 +1,7 @@
 
 from typing import Dict, Optional, List
 from .parser import Term, Literal
+from ..stats import STATS
 
 def occurs_check(var: Term, term: Term) -> bool:
     """Check if variable occurs in term (prevents infinite structures)"""
@@ -14,6 +15,8 @@ def unify_terms(term1: Term, term2: Term, subst: Dict[str, Term] = None) -> Opti
     """Unify two terms, returning substitution or None if impossible"""
     if subst is None:
         subst = {}
+    if STATS.enabled:
+        STATS.counters['unify.term_pairs'] += 1  # Every call, recursive ones included
     
     # Apply existing substitution
     term1 = apply_substitution(term1, subst)
@@ -28,6 +31,8 @@ def unify_terms(term1: Term, term2: Term, subst: Dict[str, Term] = None) -> Opti
         if term1.name in subst:
             return unify_terms(subst[term1.name], term2, subst)
         elif occurs_check(term1, term2):
+            if STATS.enabled:
+                STATS.counters['unify.occurs_check_failures'] += 1
             return None
         else:
             subst[term1.name] = term2
@@ -47,6 +52,8 @@ def unify_terms(term1: Term, term2: Term, subst: Dict[str, Term] = None) -> Opti
                 return None
         return subst
     
+    if STATS.enabled:
+        STATS.counters['unify.clashes'] += 1
     return None
 
 def apply_substitution(term: Term, subst: Dict[str, Term]) -> Term:
@@ -64,11 +71,15 @@ def unify(lit1: Literal, lit2: Literal) -> Optional[Dict[str, Term]]:
         lit1.predicate != lit2.predicate or
         len(lit1.args) != len(lit2.args)):
         return None
+    if STATS.enabled:
+        STATS.counters['unify.attempts'] += 1  # Matching literals only
     
     subst = {}
     for arg1, arg2 in zip(lit1.args, lit2.args):
         subst = unify_terms(arg1, arg2, subst)
         if subst is None:
+            if STATS.enabled:
+                STATS.counters['unify.failures'] += 1
             return None
     
     return subst
@@ -0,0 +1,99 @@
+from typing import Dict, Optional
+from .parser import Clause, Literal, Term
+
+def _shape(term: Term) -> tuple:
+    """Term structure with every variable collapsed to the same placeholder"""
+    if term.kind == 'var':
+        return ('v',)
+    if term.kind == 'func':
+        return ('f', term.name, tuple(_shape(arg) for arg in term.args))
+    return ('c', term.name)
+
+def _literal_shape(lit: Literal) -> tuple:
+    """Variable-blind sort key for a literal"""
+    return (not lit.positive, lit.predicate, tuple(_shape(arg) for arg in lit.args))
+
+def _number_term(term: Term, numbering: Dict[str, int]) -> tuple:
+    """Encode a term, numbering variables by first occurrence"""
+    if term.kind == 'var':
+        if term.name not in numbering:
+            numbering[term.name] = len(numbering)
+        return ('v', numbering[term.name])
+    if term.kind == 'func':
+        return ('f', term.name, tuple(_number_term(arg, numbering) for arg in term.args))
+    return ('c', term.name)
+
+def variant_key(clause: Clause) -> tuple:
+    """
+    Canonical key shared by all alpha-variants of a clause
+
+    Literals are sorted on their variable-blind shape and variables are then
+    numbered by first occurrence, so clauses differing only in variable names
+    (and literal order) get the same key. Literals with identical shapes keep
+    their relative order, so a few exotic variants may still get distinct keys;
+    the key never identifies two clauses that are not variants.
+
+    The key is cached on the clause.
+    """
+    if clause.variant is None:
+        ordered = sorted(clause.literals, key=_literal_shape)
+        numbering: Dict[str, int] = {}
+        canonical = []
+        for lit in ordered:
+            encoded = (lit.positive, lit.predicate,
+                       tuple(_number_term(arg, numbering) for arg in lit.args))
+            # Drop duplicate literals
+            if not canonical or canonical[-1] != encoded:
+                canonical.append(encoded)
+        clause.variant = tuple(canonical)
+    return clause.variant
+
+def variant_hash(clause: Clause) -> int:
+    """Hash of the canonical variant key"""
+    return hash(variant_key(clause))
+
+def _decode_term(encoded: tuple) -> Term:
+    if encoded[0] == 'v':
+        return Term('var', f"X{encoded[1]}")
+    if encoded[0] == 'f':
+        return Term('func', encoded[1], [_decode_term(arg) for arg in encoded[2]])
+    return Term('const', encoded[1])
+
+def canonicalize(clause: Clause) -> Clause:
+    """Return the canonical representative of a clause (variables X0, X1, ...)"""
+    key = variant_key(clause)
+    literals = [Literal(positive, predicate, [_decode_term(arg) for arg in args])
+                for positive, predicate, args in key]
+    result = Clause(literals)
+    result.variant = key
+    return result
+
+class VariantTable:
+    """Set of clauses up to variable renaming"""
+
+    def __init__(self):
+        self.table: Dict[tuple, Clause] = {}
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, clause: Clause) -> bool:
+        return variant_key(clause) in self.table
+
+    def add(self, clause: Clause) -> bool:
+        """Record clause, returning False if a variant was already present"""
+        key = variant_key(clause)
+        if key in self.table:
+            self.duplicates += 1
+            return False
+        self.table[key] = clause
+        return True
+
+    def get(self, clause: Clause) -> Optional[Clause]:
+        """Return the stored variant of clause, if any"""
+        return self.table.get(variant_key(clause))
+
+    def discard(self, clause: Clause):
+        """Forget the variant class of clause"""
+        self.table.pop(variant_key(clause), None)
@@ -0,0 +1,234 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from .statevector import QuantumRegister
+
+_MATRICES = {
+    'h': np.array([[1, 1], [1, -1]]) / np.sqrt(2),
+    'x': np.array([[0, 1], [1, 0]]),
+    'z': np.array([[1, 0], [0, -1]]),
+}
+
+_SELF_INVERSE = {'h', 'x', 'z'}
+
+@dataclass
+class Gate:
+    """
+    One circuit operation
+    
+    name is 'h', 'x' or 'z' (matrix implied), 'unitary' (matrix given, bit j
+    of its index is targets[j]) or 'diag' (matrix holds the 2^k diagonal).
+    The operation acts on the subspace where every control qubit is 1.
+    """
+    name: str
+    targets: Tuple[int, ...]
+    controls: Tuple[int, ...] = ()
+    matrix: Optional[np.ndarray] = None
+    
+    @property
+    def qubits(self) -> Tuple[int, ...]:
+        return self.controls + self.targets
+    
+    @property
+    def unitary(self) -> np.ndarray:
+        """Matrix on the targets (for 'diag', the full diagonal matrix)"""
+        if self.name in _MATRICES:
+            return _MATRICES[self.name]
+        if self.name == 'diag':
+            return np.diag(self.matrix)
+        return self.matrix
+    
+    @property
+    def is_diagonal(self) -> bool:
+        return self.name in ('z', 'diag')
+    
+    def diagonal(self) -> np.ndarray:
+        """Diagonal over self.qubits (controls first) of a diagonal gate"""
+        targets = self.matrix if self.name == 'diag' else np.diag(self.unitary)
+        k = len(self.controls)
+        phases = np.ones(2 ** (k + len(self.targets)), dtype=complex)
+        # Controls are the low bits: the gate applies where they are all 1
+        phases[(2 ** k - 1)::2 ** k] = targets
+        return phases
+    
+    def inverse(self) -> 'Gate':
+        if self.name in _SELF_INVERSE:
+            return self
+        if self.name == 'diag':
+            return Gate('diag', self.targets, self.controls, np.conj(self.matrix))
+        return Gate('unitary', self.targets, self.controls, self.matrix.conj().T)
+    
+    def is_inverse_of(self, other: 'Gate') -> bool:
+        if self.targets != other.targets or set(self.controls) != set(other.controls):
+            return False
+        if self.name in _SELF_INVERSE and self.name == other.name:
+            return True
+        if self.name in _MATRICES and other.name in _MATRICES:
+            return False
+        product = self.unitary @ other.unitary
+        return np.allclose(product, np.eye(len(product)))
+
+class Circuit:
+    """
+    Gate list over num_qubits qubits
+    
+    Builders append gates and return self. optimize() returns an equivalent
+    circuit after the cancellation, fusion and diagonal-merge passes, and
+    run() executes the gates on a QuantumRegister.
+    """
+    
+    def __init__(self, num_qubits: int, gates: List[Gate] = None):
+        self.num_qubits = num_qubits
+        self.gates: List[Gate] = list(gates or [])
+    
+    def __len__(self) -> int:
+        return len(self.gates)
+    
+    def __iter__(self) -> Iterator[Gate]:
+        return iter(self.gates)
+    
+    def add(self, gate: Gate) -> 'Circuit':
+        for qubit in gate.qubits:
+            if not 0 <= qubit < self.num_qubits:
+                raise ValueError(f"Qubit {qubit} outside a {self.num_qubits}-qubit circuit")
+        if len(set(gate.qubits)) != len(gate.qubits):
+            raise ValueError("Gate qubits must be distinct")
+        self.gates.append(gate)
+        return self
+    
+    def h(self, qubit: int) -> 'Circuit':
+        return self.add(Gate('h', (qubit,)))
+    
+    def x(self, qubit: int, controls: Tuple[int, ...] = ()) -> 'Circuit':
+        return self.add(Gate('x', (qubit,), tuple(controls)))
+    
+    def z(self, qubit: int, controls: Tuple[int, ...] = ()) -> 'Circuit':
+        return self.add(Gate('z', (qubit,), tuple(controls)))
+    
+    def unitary(self, matrix: np.ndarray, targets: List[int],
+                controls: Tuple[int, ...] = ()) -> 'Circuit':
+        return self.add(Gate('unitary', tuple(targets), tuple(controls), np.asarray(matrix)))
+    
+    def diagonal(self, phases: np.ndarray, qubits: List[int]) -> 'Circuit':
+        return self.add(Gate('diag', tuple(qubits), (), np.asarray(phases)))
+    
+    def extend(self, other: 'Circuit') -> 'Circuit':
+        for gate in other:
+            self.add(gate)
+        return self
+    
+    def inverse(self) -> 'Circuit':
+        return Circuit(self.num_qubits, [gate.inverse() for gate in reversed(self.gates)])
+    
+    def optimize(self, max_diagonal_qubits: int = 12) -> 'Circuit':
+        """Run the passes until the gate count stops shrinking"""
+        gates = self.gates
+        while True:
+            size = len(gates)
+            gates = cancel_inverses(gates)
+            gates = fuse_single_qubit(gates)
+            gates = merge_diagonals(gates, max_diagonal_qubits)
+            if len(gates) >= size:
+                return Circuit(self.num_qubits, gates)
+    
+    def run(self, reg: QuantumRegister):
+        """Apply the gates in order to reg"""
+        if reg.num_qubits < self.num_qubits:
+            raise ValueError(f"{self.num_qubits}-qubit circuit on a {reg.num_qubits}-qubit register")
+        for gate in self.gates:
+            if gate.is_diagonal:
+                reg.apply_diagonal(gate.diagonal(), list(gate.qubits))
+            elif gate.controls:
+                reg.apply_controlled_gate(gate.unitary, list(gate.controls), list(gate.targets))
+            else:
+                reg.apply_gate(gate.unitary, list(gate.targets))
+
+# Optimization passes. Each takes and returns a gate list; a gate is only
+# ever moved past gates on disjoint qubits, with which it commutes.
+
+def _last_touching(gates: List[Optional[Gate]], last: Dict[int, int], gate: Gate) -> int:
+    """Index of the latest live gate sharing a qubit with gate, or -1"""
+    index = -1
+    for qubit in gate.qubits:
+        k = last.get(qubit, -1)
+        while k >= 0 and gates[k] is None:
+            k = _previous(gates, k, qubit)
+        index = max(index, k)
+    return index
+
+def _previous(gates: List[Optional[Gate]], k: int, qubit: int) -> int:
+    for j in range(k - 1, -1, -1):
+        if gates[j] is not None and qubit in gates[j].qubits:
+            return j
+    return -1
+
+def _compact(gates: List[Optional[Gate]]) -> List[Gate]:
+    return [gate for gate in gates if gate is not None]
+
+def cancel_inverses(gates: List[Gate]) -> List[Gate]:
+    """Remove pairs of mutually inverse gates with nothing in between on their qubits"""
+    out: List[Optional[Gate]] = []
+    last: Dict[int, int] = {}
+    for gate in gates:
+        k = _last_touching(out, last, gate)
+        if k >= 0 and set(out[k].qubits) == set(gate.qubits) and gate.is_inverse_of(out[k]):
+            out[k] = None
+            for qubit in gate.qubits:
+                last[qubit] = _previous(out, k, qubit)
+            continue
+        out.append(gate)
+        for qubit in gate.qubits:
+            last[qubit] = len(out) - 1
+    return _compact(out)
+
+def fuse_single_qubit(gates: List[Gate]) -> List[Gate]:
+    """Multiply runs of uncontrolled single-qubit gates into one matrix, dropping identities"""
+    out: List[Optional[Gate]] = []
+    last: Dict[int, int] = {}
+    for gate in gates:
+        if len(gate.qubits) == 1:
+            qubit = gate.targets[0]
+            k = last.get(qubit, -1)
+            if k >= 0 and out[k] is not None and len(out[k].qubits) == 1:
+                matrix = gate.unitary @ out[k].unitary
+                if np.allclose(matrix, np.eye(2)):
+                    out[k] = None
+                    last[qubit] = _previous(out, k, qubit)
+                elif np.allclose(matrix, np.diag(np.diag(matrix))):
+                    out[k] = Gate('diag', (qubit,), (), np.diag(matrix))
+                else:
+                    out[k] = Gate('unitary', (qubit,), (), matrix)
+                continue
+        out.append(gate)
+        for qubit in gate.qubits:
+            last[qubit] = len(out) - 1
+    return _compact(out)
+
+def _expand(phases: np.ndarray, qubits: Tuple[int, ...], onto: Tuple[int, ...]) -> np.ndarray:
+    """Diagonal over qubits re-indexed over the superset onto"""
+    index = np.arange(2 ** len(onto))
+    sub = np.zeros_like(index)
+    for j, qubit in enumerate(qubits):
+        sub |= ((index >> onto.index(qubit)) & 1) << j
+    return phases[sub]
+
+def merge_diagonals(gates: List[Gate], max_qubits: int = 12) -> List[Gate]:
+    """Fold each diagonal gate into the latest diagonal gate it meets, up to max_qubits"""
+    out: List[Optional[Gate]] = []
+    last: Dict[int, int] = {}
+    for gate in gates:
+        if gate.is_diagonal:
+            k = _last_touching(out, last, gate)
+            if k >= 0 and out[k].is_diagonal:
+                onto = out[k].qubits + tuple(q for q in gate.qubits if q not in out[k].qubits)
+                if len(onto) <= max_qubits:
+                    phases = (_expand(out[k].diagonal(), out[k].qubits, onto) *
+                              _expand(gate.diagonal(), gate.qubits, onto))
+                    out[k] = Gate('diag', onto, (), phases)
+                    for qubit in onto:
+                        last[qubit] = max(last.get(qubit, -1), k)
+                    continue
+        out.append(gate)
+        for qubit in gate.qubits:
+            last[qubit] = len(out) - 1
+    return _compact(out)
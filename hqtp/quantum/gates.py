@@ -1,6 +1,8 @@
 import numpy as np
-from typing import List
+from typing import List, Union
 from .statevector import QuantumRegister
+from .oracles import CompiledOracle
+from ..stats import STATS
 
 # Common single-qubit gates
 H = np.array([[1, 1], [1, -1]]) / np.sqrt(2)  # Hadamard
@@ -13,13 +15,25 @@ def hadamard_all(reg: QuantumRegister):
         reg.apply_gate(H, [i])
         
 def phase_oracle(reg: QuantumRegister, 
-                oracle_func: callable):
-    """Apply phase oracle |x⟩ → (-1)^{f(x)}|x⟩"""
+                oracle_func: Union[callable, CompiledOracle]):
+    """
+    Apply phase oracle |x⟩ → (-1)^{f(x)}|x⟩
+    
+    oracle_func receives the bits of x with bit j (qubit j) first, the
+    order measure() returns. Pass a CompiledOracle to skip the per-state
+    Python calls.
+    """
+    STATS.count('quantum.oracle_passes')
+    if isinstance(oracle_func, CompiledOracle):
+        reg.block_map(lambda start, block: oracle_func.apply(block, start))
+        return
     for i in range(len(reg.state)):
-        if oracle_func(list(map(int, f"{i:0{reg.num_qubits}b}"))):
+        if oracle_func([(i >> j) & 1 for j in range(reg.num_qubits)]):
             reg.state[i] *= -1
             
 def diffusion(reg: QuantumRegister):
     """Apply Grover diffusion operator"""
-    # |s⟩⟨s| - I where |s⟩ is uniform superposition
-    reg.state = 2 * np.mean(reg.state) - reg.state
\ No newline at end of file
+    # |s⟩⟨s| - I where |s⟩ is uniform superposition, applied in place
+    STATS.count('quantum.diffusions')
+    reflected = 2 * reg.total() / len(reg.state)
+    reg.block_map(lambda _, block: np.subtract(reflected, block, out=block))
\ No newline at end of file
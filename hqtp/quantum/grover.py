@@ -1,52 +1,91 @@
 
+import math
 import numpy as np
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Union
 from .statevector import QuantumRegister
 from .gates import hadamard_all, phase_oracle, diffusion
+from .oracles import CompiledOracle, compile_oracle
+from ..budget import PartialResult, memory_in_use
+from ..stats import STATS
 
-def grover_search(num_vars: int, oracle: Callable[[List[int]], bool], 
-                 max_iterations: int = None) -> Optional[List[int]]:
+Oracle = Union[Callable[[List[int]], bool], CompiledOracle]
+
+def grover_search(num_vars: int, oracle: Oracle, 
+                 max_iterations: int = None, dtype=np.complex128,
+                 path: str = None, shots: int = 64, top_k: int = 8,
+                 budget=None) -> Optional[Union[List[int], PartialResult]]:
     """
     Grover's algorithm for searching satisfying assignments
     
     Args:
         num_vars: Number of Boolean variables
-        oracle: Function that returns True for satisfying assignments
+        oracle: Function that returns True for satisfying assignments, or
+            a CompiledOracle (see oracles.compile_oracle)
         max_iterations: Maximum Grover iterations
+        dtype: State precision, np.complex64 or np.complex128
+        path: Backing file for an out-of-core state (see QuantumRegister)
+        shots: Measurements drawn from the final state
+        top_k: Most frequent outcomes checked against the oracle
+        budget: Optional budget.Budget, ticked once per iteration. When it
+            runs out the partly amplified state is measured anyway
     
     Returns:
-        Satisfying assignment or None if not found
+        Satisfying assignment or None if not found; a PartialResult if the
+        budget ran out (or the state would not fit it) before one was found
     """
     if max_iterations is None:
-        max_iterations = int(np.pi * np.sqrt(2**num_vars) / 4)
+        # With a compiled oracle the number of solutions is known exactly
+        num_marked = oracle.num_marked if isinstance(oracle, CompiledOracle) else 1
+        max_iterations = int(np.pi * np.sqrt(2**num_vars / max(num_marked, 1)) / 4)
     
-    # Initialize quantum register
-    reg = QuantumRegister(num_vars)
+    progress = {'iterations': 0, 'planned_iterations': max_iterations, 'qubits': num_vars}
+    if budget is not None and budget.memory_limit is not None and path is None:
+        needed = 2 ** num_vars * (np.dtype(dtype).itemsize + 1)  # State and oracle mask
+        if (memory_in_use() or 0) + needed > budget.memory_limit:
+            return PartialResult('memout', progress=progress)
     
-    # Create uniform superposition
-    hadamard_all(reg)
+    # Evaluate a plain oracle once per basis state instead of once per iteration
+    if not isinstance(oracle, CompiledOracle) and max_iterations > 1:
+        oracle = compile_oracle(oracle, num_vars)
     
-    # Grover iterations
-    for _ in range(max_iterations):
-        # Apply oracle
-        phase_oracle(reg, oracle)
+    # Initialize quantum register
+    reg = QuantumRegister(num_vars, dtype=dtype, path=path)
+    try:
+        # Create uniform superposition
+        hadamard_all(reg)
         
-        # Apply diffusion operator
-        diffusion(reg)
-    
-    # Measure result
-    result = reg.measure()
-    
-    # Verify result
-    if oracle(result):
-        return result
+        # Grover iterations
+        for _ in range(max_iterations):
+            if budget is not None and budget.tick():
+                break
+            progress['iterations'] += 1
+            STATS.count('quantum.grover_iterations')
+            
+            # Apply oracle
+            phase_oracle(reg, oracle)
+            
+            # Apply diffusion operator
+            diffusion(reg)
+        
+        # Sample the final state once, many shots
+        counts = reg.sample(shots)
+    finally:
+        reg.close()
     
-    return None
+    # Verify the most frequent candidates
+    candidates = sorted(counts, key=counts.get, reverse=True)[:top_k]
+    found = _verify(oracle, candidates, num_vars)
+    if found is None and budget is not None and budget.reason is not None:
+        return PartialResult(budget.reason, progress=progress)
+    return found
 
 def amplitude_amplification(reg: QuantumRegister, 
-                          oracle: Callable[[List[int]], bool],
+                          oracle: Oracle,
                           iterations: int):
     """Apply amplitude amplification for the given oracle"""
+    if not isinstance(oracle, CompiledOracle) and iterations > 1:
+        oracle = compile_oracle(oracle, reg.num_qubits)
+    
     for _ in range(iterations):
         # Mark target states
         phase_oracle(reg, oracle)
@@ -61,3 +100,151 @@ def amplitude_amplification(reg: QuantumRegister,
         
         # Global phase correction
         reg.state *= -1
+
+def _bits(index: int, num_vars: int) -> List[int]:
+    return [(index >> j) & 1 for j in range(num_vars)]
+
+def _verify(oracle: Oracle, candidates: List[int], num_vars: int) -> Optional[List[int]]:
+    """First candidate basis index the oracle accepts, as an assignment"""
+    if isinstance(oracle, CompiledOracle):
+        accepted = np.flatnonzero(oracle.marks(candidates))
+        return _bits(candidates[accepted[0]], num_vars) if len(accepted) else None
+    for index in candidates:
+        if oracle(_bits(index, num_vars)):
+            return _bits(index, num_vars)
+    return None
+
+def _subspace_sample(oracle: CompiledOracle, iterations: int) -> List[int]:
+    """
+    Measure after Grover iterations, simulated in the two-dimensional
+    span of the marked and unmarked uniform superpositions
+    
+    After k iterations the marked states carry total probability
+    sin^2((2k+1)θ) with sin^2 θ = M/N, spread evenly over the M marked
+    states, so no 2^n vector is needed.
+    """
+    size = 2 ** oracle.num_vars
+    theta = math.asin(math.sqrt(oracle.num_marked / size))
+    if oracle.num_marked and np.random.random() < math.sin((2 * iterations + 1) * theta) ** 2:
+        return _bits(int(np.random.choice(oracle.indices)), oracle.num_vars)
+    
+    # An unmarked state, uniformly (there is at least one unless all are marked)
+    if oracle.num_marked == size:
+        return _bits(int(np.random.choice(oracle.indices)), oracle.num_vars)
+    while True:
+        index = int(np.random.randint(size))
+        if not oracle.mask[index]:
+            return _bits(index, oracle.num_vars)
+
+def bbht_search(num_vars: int, oracle: Oracle, 
+                max_total_iterations: int = None) -> Optional[List[int]]:
+    """
+    Grover search for an unknown number of solutions (Boyer, Brassard,
+    Høyer and Tapp)
+    
+    Each round runs a random number of iterations below a bound m that
+    grows by a factor 6/5, measures, and stops at the first verified hit.
+    The expected total work is O(sqrt(N/M)) for any number of solutions M.
+    
+    A CompiledOracle is simulated exactly in the two-dimensional marked /
+    unmarked subspace; a plain callable runs on the full state vector.
+    
+    Args:
+        num_vars: Number of Boolean variables
+        oracle: Function that returns True for satisfying assignments, or
+            a CompiledOracle
+        max_total_iterations: Iteration budget over all rounds (default
+            9/4·sqrt(N), after which a solution would almost surely have
+            been found if one exists)
+    
+    Returns:
+        Satisfying assignment or None if not found within the budget
+    """
+    size = 2 ** num_vars
+    if max_total_iterations is None:
+        max_total_iterations = math.ceil(9 / 4 * math.sqrt(size))
+    
+    exact = isinstance(oracle, CompiledOracle)
+    compiled = oracle if exact else compile_oracle(oracle, num_vars)
+    if exact and compiled.num_marked == 0:
+        return None  # Every round would miss
+    
+    bound = 1.0
+    total = 0
+    while True:
+        iterations = int(np.random.randint(math.ceil(bound)))
+        if total + iterations > max_total_iterations:
+            return None
+        total += iterations
+        
+        if exact:
+            result = _subspace_sample(compiled, iterations)
+        else:
+            reg = QuantumRegister(num_vars)
+            hadamard_all(reg)
+            for _ in range(iterations):
+                phase_oracle(reg, compiled)
+                diffusion(reg)
+            result = reg.measure()
+        
+        if oracle(result):
+            return result
+        
+        bound = min(bound * 6 / 5, math.sqrt(size))
+        # Count the measurement round itself so the loop always terminates
+        total += 1
+
+def quantum_count(num_vars: int, oracle: Oracle, 
+                  precision_bits: int = None) -> int:
+    """
+    Estimate the number of solutions by quantum counting
+    
+    Simulates phase estimation of the Grover operator, whose eigenphases
+    ±2θ satisfy sin^2 θ = M/N. With T = 2^t the outcome y has probability
+    
+        |Σ_k e^{-2πiky/T} α_k|^2 / T^2 + |Σ_k e^{-2πiky/T} β_k|^2 / T^2
+    
+    where α_k, β_k are the marked / unmarked components of G^k|s⟩. For a
+    CompiledOracle these are sin/cos((2k+1)θ) exactly; for a plain callable
+    they are read off a full state-vector simulation.
+    
+    Args:
+        num_vars: Number of Boolean variables
+        oracle: Function that returns True for satisfying assignments, or
+            a CompiledOracle
+        precision_bits: Counting register size t (default n/2 + 3, giving
+            an error of O(sqrt(M)))
+    
+    Returns:
+        Estimated number of satisfying assignments
+    """
+    size = 2 ** num_vars
+    if precision_bits is None:
+        precision_bits = num_vars // 2 + 3
+    steps = 2 ** precision_bits
+    
+    if isinstance(oracle, CompiledOracle):
+        theta = math.asin(math.sqrt(oracle.num_marked / size))
+        angles = (2 * np.arange(steps) + 1) * theta
+        alpha, beta = np.sin(angles), np.cos(angles)
+    else:
+        compiled = compile_oracle(oracle, num_vars)
+        reg = QuantumRegister(num_vars)
+        hadamard_all(reg)
+        alpha = np.empty(steps, dtype=complex)
+        beta = np.empty(steps, dtype=complex)
+        total = np.sum(reg.state)
+        for k in range(steps):
+            marked = np.sum(reg.state[compiled.mask])
+            alpha[k] = marked / math.sqrt(max(compiled.num_marked, 1))
+            beta[k] = (total - marked) / math.sqrt(max(size - compiled.num_marked, 1))
+            phase_oracle(reg, compiled)
+            diffusion(reg)
+            total = np.sum(reg.state)
+    
+    probabilities = (np.abs(np.fft.fft(alpha)) ** 2 + np.abs(np.fft.fft(beta)) ** 2) / steps ** 2
+    probabilities /= probabilities.sum()
+    outcome = np.random.choice(steps, p=probabilities)
+    
+    estimate = size * math.sin(math.pi * outcome / steps) ** 2
+    return int(round(estimate))
@@ -1,6 +1,7 @@
-from typing import List, Callable
+from typing import List, Callable, Union
 import numpy as np
 from .statevector import QuantumRegister
+from .circuit import Circuit
 from ..sat.cnf import CNFFormula
 
 def build_clause_oracle(clause: List[int]) -> Callable[[List[int]], bool]:
@@ -15,9 +16,16 @@ def build_clause_oracle(clause: List[int]) -> Callable[[List[int]], bool]:
         return False
     return oracle
 
+def _signed_clauses(formula: Union[CNFFormula, List[List[int]]]) -> List[List[int]]:
+    """Clauses as lists of signed variable numbers"""
+    if isinstance(formula, CNFFormula):
+        return [[lit.var if lit.positive else -lit.var for lit in c.literals] 
+                for c in formula.clauses]
+    return [list(c) for c in formula]
+
 def build_cnf_oracle(formula: CNFFormula) -> Callable[[List[int]], bool]:
     """Build phase oracle for entire CNF formula"""
-    clause_oracles = [build_clause_oracle(c) for c in formula.clauses]
+    clause_oracles = [build_clause_oracle(c) for c in _signed_clauses(formula)]
     
     def oracle(x: List[int]) -> bool:
         # Formula satisfied if all clauses satisfied
@@ -25,19 +33,143 @@ def build_cnf_oracle(formula: CNFFormula) -> Callable[[List[int]], bool]:
         
     return oracle
 
+class CompiledOracle:
+    """
+    Marked basis states of an oracle, computed once
+    
+    Qubit j holds variable j+1, so assignment x (with x[j] for variable j+1)
+    is basis state sum(x[j] << j), matching QuantumRegister.measure.
+    """
+    
+    def __init__(self, num_vars: int, mask: np.ndarray):
+        self.num_vars = num_vars
+        self.mask = mask
+        self.indices = np.flatnonzero(mask)
+    
+    @property
+    def num_marked(self) -> int:
+        return len(self.indices)
+    
+    def __call__(self, x: List[int]) -> bool:
+        """Evaluate on a single assignment, like the oracle it was compiled from"""
+        index = sum(int(bit) << j for j, bit in enumerate(x))
+        return bool(self.mask[index])
+    
+    def marks(self, indices: np.ndarray) -> np.ndarray:
+        """Vectorized evaluation on an array of basis indices"""
+        return self.mask[np.asarray(indices, dtype=np.int64)]
+    
+    def apply(self, state: np.ndarray, offset: int = 0):
+        """
+        Phase flip the marked amplitudes of state in place
+        
+        state may be a slice of the full vector starting at basis index
+        offset, so blocks can be processed independently.
+        """
+        lo, hi = np.searchsorted(self.indices, [offset, offset + len(state)])
+        if (hi - lo) * 8 < len(state):
+            state[self.indices[lo:hi] - offset] *= -1
+        else:
+            np.negative(state, out=state, where=self.mask[offset:offset + len(state)])
+
+def compile_oracle(source: Union[CNFFormula, List[List[int]], Callable[[List[int]], bool]], 
+                   num_vars: int = None, block_size: int = 1 << 20) -> CompiledOracle:
+    """
+    Compile an oracle into a mask of marked basis states
+    
+    CNF input (a CNFFormula or lists of signed variables) is evaluated for all
+    basis states at once with bit planes of np.arange(2**n), a block at a time
+    to bound memory. A Python callable is evaluated once per basis state.
+    
+    Args:
+        source: CNFFormula, signed-literal clauses, or a callable oracle
+        num_vars: Number of variables (qubits); inferred for CNF input
+        block_size: Basis states evaluated per vectorized block
+    """
+    if callable(source) and not isinstance(source, CNFFormula):
+        if num_vars is None:
+            raise ValueError("num_vars is required to compile a callable oracle")
+        mask = np.fromiter((bool(source([(i >> j) & 1 for j in range(num_vars)]))
+                            for i in range(2 ** num_vars)), dtype=bool, count=2 ** num_vars)
+        return CompiledOracle(num_vars, mask)
+    
+    clauses = _signed_clauses(source)
+    if num_vars is None:
+        num_vars = max((abs(l) for c in clauses for l in c), default=0)
+        if isinstance(source, CNFFormula):
+            num_vars = max(num_vars, source.num_vars)
+    
+    size = 2 ** num_vars
+    mask = np.empty(size, dtype=bool)
+    for start in range(0, size, block_size):
+        index = np.arange(start, min(start + block_size, size), dtype=np.int64)
+        block = np.ones(len(index), dtype=bool)
+        for clause in clauses:
+            satisfied = np.zeros(len(index), dtype=bool)
+            for lit in clause:
+                plane = ((index >> (abs(lit) - 1)) & 1).astype(bool)
+                satisfied |= plane if lit > 0 else ~plane
+            block &= satisfied
+        mask[start:start + len(index)] = block
+    
+    return CompiledOracle(num_vars, mask)
+
 class ReversibleOracle:
-    """Reversible quantum circuit for CNF evaluation"""
+    """
+    Reversible quantum circuit for CNF evaluation
+    
+    Qubits 0..n-1 hold the variables (qubit j is variable j+1) and qubit
+    n+i is the ancilla of clause i. Each clause is computed into its
+    ancilla as OR(l) = NOT AND(NOT l) with a multi-controlled X, the phase
+    is a multi-controlled Z over all ancillas, and the clause computation
+    is then undone, so ancillas start and end in |0⟩.
+    """
     
     def __init__(self, formula: CNFFormula):
         self.formula = formula
         self.num_qubits = formula.num_vars
         self.num_ancilla = len(formula.clauses)  # One ancilla per clause
-        
+        self._circuit = None
+    
+    def compute_clauses(self) -> Circuit:
+        """Circuit writing each clause's truth value into its ancilla"""
+        circuit = Circuit(self.num_qubits + self.num_ancilla)
+        for i, clause in enumerate(_signed_clauses(self.formula)):
+            ancilla = self.num_qubits + i
+            clause = list(dict.fromkeys(clause))  # A repeated literal must not flip twice
+            variables = list(dict.fromkeys(abs(lit) - 1 for lit in clause))
+            positive = [abs(lit) - 1 for lit in clause if lit > 0]
+            negative = {abs(lit) - 1 for lit in clause if lit < 0}
+            if negative & set(positive):
+                circuit.x(ancilla)  # Tautology
+                continue
+            
+            # Ancilla ^= AND of the negated literals, then flip for the OR
+            for qubit in positive:
+                circuit.x(qubit)
+            circuit.x(ancilla, tuple(variables))
+            circuit.x(ancilla)
+            for qubit in positive:
+                circuit.x(qubit)
+        return circuit
+    
+    def circuit(self) -> Circuit:
+        """Optimized compute / phase / uncompute circuit (built once)"""
+        if self._circuit is None:
+            compute = self.compute_clauses()
+            circuit = Circuit(compute.num_qubits).extend(compute)
+            ancillas = list(range(self.num_qubits, self.num_qubits + self.num_ancilla))
+            if ancillas:
+                circuit.z(ancillas[-1], tuple(ancillas[:-1]))
+            elif self.num_qubits:
+                circuit.diagonal(np.array([-1, -1]), [0])  # Every state is marked
+            circuit.extend(compute.inverse())
+            self._circuit = circuit.optimize()
+        return self._circuit
+    
     def apply(self, reg: QuantumRegister):
         """Apply reversible CNF oracle"""
-        # TODO: Implement reversible circuit construction
-        # 1. Compute clause results in ancilla qubits
-        # 2. Compute AND of clause results
-        # 3. Apply phase to solution states
-        # 4. Uncompute ancillas
-        pass
\ No newline at end of file
+        if reg.num_qubits < self.num_qubits + self.num_ancilla:
+            raise ValueError(f"Oracle needs {self.num_qubits + self.num_ancilla} qubits "
+                             f"({self.num_ancilla} clause ancillas)")
+        self.circuit().run(reg)
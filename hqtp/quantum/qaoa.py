@@ -1,40 +1,198 @@
 import numpy as np
-from typing import List, Tuple, Callable
+from typing import List, Optional, Sequence, Tuple
 from .statevector import QuantumRegister
 
+Clauses = List[Tuple[List[int], List[bool]]]
+
+def cost_diagonal(clauses: Clauses, num_qubits: int,
+                  block_size: int = 1 << 20) -> np.ndarray:
+    """
+    Number of clauses violated by every basis state
+    
+    Clauses are (variables, signs) with 1-based variables; variable v is
+    qubit v-1 (bit v-1 of the basis index) and a True sign is a positive
+    literal. Evaluated with bit planes of np.arange(2**n), a block at a time.
+    """
+    size = 2 ** num_qubits
+    dtype = np.uint8 if len(clauses) < 256 else np.uint32
+    cost = np.zeros(size, dtype=dtype)
+    
+    for start in range(0, size, block_size):
+        index = np.arange(start, min(start + block_size, size), dtype=np.int64)
+        block = cost[start:start + len(index)]
+        for variables, signs in clauses:
+            violated = np.ones(len(index), dtype=bool)
+            for var, positive in zip(variables, signs):
+                bit = ((index >> (var - 1)) & 1).astype(bool)
+                violated &= ~bit if positive else bit
+            block += violated
+    return cost
+
 class QAOACircuit:
-    """QAOA circuit for MAX-SAT"""
+    """
+    QAOA circuit for MAX-SAT
     
-    def __init__(self, num_qubits: int, num_layers: int):
+    The cost C(x) (number of violated clauses) is precomputed once per clause
+    set as a diagonal, so exp(-iγC) is one elementwise multiply through a
+    table of the m+1 distinct phases. The mixer exp(-iβΣX) is a layer of
+    RX(2β) gates.
+    """
+    
+    def __init__(self, num_qubits: int, num_layers: int, **register_options):
         self.num_qubits = num_qubits
         self.num_layers = num_layers
-        self.reg = QuantumRegister(num_qubits)
-        
-    def cost_hamiltonian(self, 
-                        clauses: List[Tuple[List[int], List[bool]]]):
+        self.reg = QuantumRegister(num_qubits, **register_options)
+        self.clauses: Optional[Clauses] = None
+        self.cost: Optional[np.ndarray] = None
+    
+    def set_clauses(self, clauses: Clauses):
+        """Precompute the cost diagonal (reused while the clauses are the same)"""
+        clauses = [(list(v), list(s)) for v, s in clauses]
+        if self.cost is None or clauses != self.clauses:
+            self.clauses = clauses
+            self.cost = cost_diagonal(clauses, self.num_qubits)
+    
+    def reset(self):
+        """Put the register in the uniform superposition H^n|0⟩"""
+        amplitude = 1 / np.sqrt(2 ** self.num_qubits)
+        self.reg.block_map(lambda _, block: block.fill(amplitude))
+    
+    def cost_hamiltonian(self,
+                        clauses: Clauses, gamma: float):
         """Apply cost Hamiltonian exp(-iγC)"""
-        # TODO: Implement cost Hamiltonian evolution
-        pass
-        
+        self.set_clauses(clauses)
+        phases = np.exp(-1j * gamma * np.arange(len(self.clauses) + 1)).astype(self.reg.dtype)
+        cost = self.cost
+        self.reg.block_map(lambda start, block:
+                           np.multiply(block, phases[cost[start:start + len(block)]], out=block))
+    
     def mixer_hamiltonian(self, beta: float):
         """Apply mixer Hamiltonian exp(-iβB)"""
-        # TODO: Implement mixer Hamiltonian evolution
-        pass
-        
-    def run(self, 
-            clauses: List[Tuple[List[int], List[bool]]], 
+        rx = np.array([[np.cos(beta), -1j * np.sin(beta)],
+                       [-1j * np.sin(beta), np.cos(beta)]])
+        for i in range(self.num_qubits):
+            self.reg.apply_gate(rx, [i])
+    
+    def run(self,
+            clauses: Clauses,
             params: List[float]) -> List[int]:
         """Run QAOA circuit with given parameters"""
-        # Initialize in uniform superposition
-        for i in range(self.num_qubits):
-            self.reg.apply_gate(np.array([[1, 1], [1, -1]]) / np.sqrt(2), [i])
-            
+        # Initialize in uniform superposition (from scratch on every run)
+        self.reset()
+        
         # Alternate cost and mixer layers
         for p in range(self.num_layers):
             gamma = params[2*p]
             beta = params[2*p + 1]
             
-            self.cost_hamiltonian(clauses)
+            self.cost_hamiltonian(clauses, gamma)
             self.mixer_hamiltonian(beta)
+        
+        return self.reg.measure()
+    
+    def expectation(self, clauses: Clauses, params: List[float]) -> float:
+        """Expected number of violated clauses ⟨C⟩ for one parameter vector"""
+        return float(self.expectations(clauses, [params])[0])
+    
+    def expectations(self, clauses: Clauses, param_batch: Sequence[Sequence[float]],
+                     max_amplitudes: int = 1 << 24) -> np.ndarray:
+        """
+        ⟨C⟩ for many parameter vectors (gamma_1, beta_1, ..., gamma_p, beta_p)
+        
+        The states of a batch are simulated together as rows of one array,
+        in groups of at most max_amplitudes amplitudes.
+        """
+        self.set_clauses(clauses)
+        params = np.asarray(param_batch, dtype=float).reshape(-1, 2 * self.num_layers)
+        return self._evaluate(None, params[:, 0::2], params[:, 1::2], max_amplitudes)
+    
+    def _uniform(self, rows: int) -> np.ndarray:
+        size = 2 ** self.num_qubits
+        return np.full((rows, size), 1 / np.sqrt(size), dtype=self.reg.dtype)
+    
+    def _layers(self, states: np.ndarray, gammas: np.ndarray, betas: np.ndarray):
+        """Apply layers row-wise: states[b] gets gammas[b, k], betas[b, k] for each k"""
+        phases = np.arange(len(self.clauses) + 1)
+        for k in range(gammas.shape[1]):
+            table = np.exp(-1j * np.outer(gammas[:, k], phases)).astype(states.dtype)
+            states *= table[:, self.cost]
             
-        return self.reg.measure()
\ No newline at end of file
+            cos = np.cos(betas[:, k]).astype(states.dtype)[:, None, None]
+            sin = (-1j * np.sin(betas[:, k])).astype(states.dtype)[:, None, None]
+            for qubit in range(self.num_qubits):
+                view = states.reshape(len(states), -1, 2, 2 ** qubit)
+                low = view[:, :, 0, :].copy()
+                high = view[:, :, 1, :]
+                view[:, :, 0, :] = cos * low + sin * high
+                high *= cos
+                high += sin * low
+    
+    def _evaluate(self, initial: Optional[np.ndarray], gammas: np.ndarray,
+                  betas: np.ndarray, max_amplitudes: int) -> np.ndarray:
+        """⟨C⟩ after applying the given layers to initial (default uniform)"""
+        rows = max(1, max_amplitudes // 2 ** self.num_qubits)
+        values = np.empty(len(gammas))
+        for start in range(0, len(gammas), rows):
+            count = min(rows, len(gammas) - start)
+            if initial is None:
+                states = self._uniform(count)
+            else:
+                states = np.repeat(initial[None, :], count, axis=0)
+            self._layers(states, gammas[start:start + count], betas[start:start + count])
+            values[start:start + count] = (np.abs(states) ** 2) @ self.cost
+        return values
+    
+    def optimize(self, clauses: Clauses, params: List[float] = None,
+                 step: float = 0.2, tolerance: float = 1e-3,
+                 max_sweeps: int = 100) -> Tuple[List[float], float]:
+        """
+        Minimize ⟨C⟩ by layer-wise coordinate pattern search
+        
+        Each sweep visits the layers in order and tries the 3x3 grid of
+        (gamma, beta) ± step around the current values. The state before
+        layer p does not depend on the parameters being varied, so it is
+        cached and only layers p..L-1 are simulated, for the whole grid at
+        once. The step is halved after a sweep without improvement.
+        
+        Returns:
+            (best parameters, expected number of violated clauses)
+        """
+        self.set_clauses(clauses)
+        if params is None:
+            params = [0.1, 0.1] * self.num_layers
+        gammas = np.array(params[0::2], dtype=float)
+        betas = np.array(params[1::2], dtype=float)
+        offsets = np.array([(dg, db) for dg in (-1, 0, 1) for db in (-1, 0, 1)], dtype=float)
+        
+        best = self._evaluate(None, gammas[None, :], betas[None, :], 1 << 24)[0]
+        for _ in range(max_sweeps):
+            if step < tolerance:
+                break
+            improved = False
+            prefix = self._uniform(1)[0]
+            
+            for p in range(self.num_layers):
+                trial_g = np.repeat(gammas[None, p:], len(offsets), axis=0)
+                trial_b = np.repeat(betas[None, p:], len(offsets), axis=0)
+                trial_g[:, 0] += step * offsets[:, 0]
+                trial_b[:, 0] += step * offsets[:, 1]
+                
+                values = self._evaluate(prefix, trial_g, trial_b, 1 << 24)
+                k = int(np.argmin(values))
+                if values[k] < best - 1e-12:
+                    best = values[k]
+                    gammas[p], betas[p] = trial_g[k, 0], trial_b[k, 0]
+                    improved = True
+                
+                # Extend the cached prefix by the (possibly updated) layer p
+                state = prefix[None, :].copy()
+                self._layers(state, gammas[None, p:p + 1], betas[None, p:p + 1])
+                prefix = state[0]
+            
+            if not improved:
+                step /= 2
+        
+        result = []
+        for gamma, beta in zip(gammas, betas):
+            result.extend([float(gamma), float(beta)])
+        return result, float(best)
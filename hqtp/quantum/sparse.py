@@ -0,0 +1,204 @@
+import numpy as np
+from typing import Dict, List, Optional
+from .statevector import QuantumRegister
+
+# Largest register a sparse state may densify into (16·2^26 bytes = 1 GiB)
+MAX_DENSE_QUBITS = 26
+
+class SparseRegister:
+    """
+    Quantum state with few nonzero amplitudes, for registers too wide for 2^n
+    
+    Amplitudes are kept as sorted basis indices with their values. A gate
+    groups the support by the basis index with the gate's qubits cleared and
+    updates only those groups. When the support passes density·2^n (and the
+    register has at most max_dense_qubits qubits) the state moves into a
+    QuantumRegister, and every later call is forwarded to it.
+    
+    Indices are int64, so up to 62 qubits are supported.
+    """
+    
+    def __init__(self, num_qubits: int, dtype=np.complex128, density: float = 0.125,
+                 max_dense_qubits: int = MAX_DENSE_QUBITS, max_support: int = 1 << 24,
+                 **dense_options):
+        """
+        Args:
+            num_qubits: Number of qubits (at most 62)
+            dtype: Amplitude precision, np.complex64 or np.complex128
+            density: Fraction of nonzero amplitudes at which to go dense
+            max_dense_qubits: Never densify registers wider than this
+            max_support: Largest support kept sparse once densifying is ruled out
+            dense_options: Passed to QuantumRegister on densifying
+        """
+        if num_qubits > 62:
+            raise ValueError("SparseRegister supports at most 62 qubits")
+        self.num_qubits = num_qubits
+        self.dtype = np.dtype(dtype)
+        self.density = density
+        self.max_dense_qubits = max_dense_qubits
+        self.max_support = max_support
+        self.dense_options = dense_options
+        self.dense: Optional[QuantumRegister] = None
+        self.reset()
+    
+    def __getattr__(self, name):
+        # Only reached for attributes SparseRegister lacks (state, blocks, ...)
+        dense = self.__dict__.get('dense')
+        if dense is None:
+            if name.startswith('_') or 'dense' not in self.__dict__:
+                raise AttributeError(name)
+            dense = self.densify()
+        return getattr(dense, name)
+    
+    def reset(self, index: int = 0):
+        """Collapse to the basis state |index⟩, back in sparse storage"""
+        if self.dense is not None:
+            self.dense.close()
+            self.dense = None
+        self.indices = np.array([index], dtype=np.int64)
+        self.values = np.ones(1, dtype=self.dtype)
+    
+    def set_amplitudes(self, amplitudes: Dict[int, complex]):
+        """Replace the state by the given {basis index: amplitude}"""
+        self.reset()
+        order = sorted(amplitudes)
+        self.indices = np.array(order, dtype=np.int64)
+        self.values = np.array([amplitudes[i] for i in order], dtype=self.dtype)
+        self._maybe_densify()
+    
+    @property
+    def support(self) -> int:
+        """Number of stored amplitudes"""
+        if self.dense is not None:
+            return int(np.count_nonzero(self.dense.state))
+        return len(self.indices)
+    
+    @property
+    def is_dense(self) -> bool:
+        return self.dense is not None
+    
+    def densify(self) -> QuantumRegister:
+        """Move the state into a dense QuantumRegister"""
+        if self.dense is None:
+            if self.num_qubits > self.max_dense_qubits:
+                raise MemoryError(f"Refusing to densify a {self.num_qubits}-qubit register")
+            dense = QuantumRegister(self.num_qubits, dtype=self.dtype, **self.dense_options)
+            dense.state[0] = 0
+            dense.state[self.indices] = self.values
+            self.dense = dense
+            self.indices = self.values = None
+        return self.dense
+    
+    def _maybe_densify(self):
+        if len(self.indices) <= self.density * 2 ** self.num_qubits:
+            return
+        if self.num_qubits <= self.max_dense_qubits:
+            self.densify()
+        elif len(self.indices) > self.max_support:
+            raise MemoryError(f"Sparse support {len(self.indices)} exceeds {self.max_support}")
+    
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Amplitudes at basis indices keys (zero where not stored)"""
+        position = np.searchsorted(self.indices, keys)
+        position = np.minimum(position, len(self.indices) - 1)
+        found = self.indices[position] == keys
+        return np.where(found, self.values[position], 0)
+    
+    def _store(self, indices: np.ndarray, values: np.ndarray):
+        keep = np.abs(values) > 1e-15
+        indices, values = indices[keep], values[keep]
+        order = np.argsort(indices, kind='stable')
+        self.indices, self.values = indices[order], values[order].astype(self.dtype)
+        self._maybe_densify()
+    
+    def apply_gate(self, gate: np.ndarray, qubits: List[int]):
+        """
+        Apply quantum gate to specified qubits
+        
+        Bit j of the gate's row/column index corresponds to qubits[j], as
+        in QuantumRegister.apply_gate.
+        """
+        self.apply_controlled_gate(gate, [], qubits)
+    
+    def apply_controlled_gate(self, gate: np.ndarray, controls: List[int],
+                              targets: List[int]):
+        """Apply gate to targets on the subspace where every control qubit is 1"""
+        if self.dense is not None:
+            if controls:
+                return self.dense.apply_controlled_gate(gate, controls, targets)
+            return self.dense.apply_gate(gate, targets)
+        
+        gate = np.asarray(gate, dtype=self.dtype)
+        if gate.shape != (2 ** len(targets),) * 2:
+            raise ValueError(f"Gate of shape {gate.shape} does not act on {len(targets)} qubits")
+        if len(set(targets) | set(controls)) != len(targets) + len(controls):
+            raise ValueError("Gate qubits must be distinct")
+        
+        target_mask = sum(1 << q for q in targets)
+        control_mask = sum(1 << q for q in controls)
+        # Basis offset of gate column c: bit j of c placed at targets[j]
+        offsets = np.array([sum(((c >> j) & 1) << q for j, q in enumerate(targets))
+                            for c in range(2 ** len(targets))], dtype=np.int64)
+        
+        active = (self.indices & control_mask) == control_mask
+        bases = np.unique(self.indices[active] & ~target_mask)
+        if not len(bases):
+            return
+        
+        # Row b of amplitudes is the group of states sharing base b
+        keys = bases[:, None] | offsets[None, :]
+        amplitudes = self._lookup(keys) @ gate.T
+        
+        untouched = ~active
+        self._store(np.concatenate([self.indices[untouched], keys.ravel()]),
+                    np.concatenate([self.values[untouched], amplitudes.ravel()]))
+    
+    def apply_diagonal(self, phases: np.ndarray, qubits: List[int]):
+        """Multiply each amplitude by phases[k], k from the bits of qubits (see QuantumRegister)"""
+        if self.dense is not None:
+            return self.dense.apply_diagonal(phases, qubits)
+        phases = np.asarray(phases, dtype=self.dtype)
+        index = np.zeros(len(self.indices), dtype=np.int64)
+        for j, qubit in enumerate(qubits):
+            index |= ((self.indices >> qubit) & 1) << j
+        self.values = self.values * phases[index]
+    
+    def sample_indices(self, shots: int) -> np.ndarray:
+        """Basis indices of shots independent measurements"""
+        if self.dense is not None:
+            return self.dense.sample_indices(shots)
+        probabilities = np.abs(self.values) ** 2
+        cumulative = np.cumsum(probabilities)
+        picks = np.searchsorted(cumulative, np.random.random(shots) * cumulative[-1], side='right')
+        return self.indices[np.minimum(picks, len(self.indices) - 1)]
+    
+    def sample(self, shots: int, as_bits: bool = False):
+        """Measure shots times: {basis index: count}, or a (shots, n) bit matrix"""
+        outcomes = self.sample_indices(shots)
+        if as_bits:
+            return ((outcomes[:, None] >> np.arange(self.num_qubits)) & 1).astype(np.uint8)
+        values, counts = np.unique(outcomes, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+    
+    def measure(self) -> List[int]:
+        """Measure all qubits, returning classical bit string"""
+        return self.sample(1, as_bits=True)[0].tolist()
+    
+    def amplitudes(self) -> Dict[int, complex]:
+        """Nonzero amplitudes as {basis index: amplitude}"""
+        if self.dense is not None:
+            nonzero = np.flatnonzero(self.dense.state)
+            return dict(zip(nonzero.tolist(), self.dense.state[nonzero].tolist()))
+        return dict(zip(self.indices.tolist(), self.values.tolist()))
+    
+    def get_probabilities(self) -> np.ndarray:
+        """Get measurement probabilities for all basis states (allocates 2^n)"""
+        if self.dense is not None:
+            return self.dense.get_probabilities()
+        probabilities = np.zeros(2 ** self.num_qubits, dtype=self.values.real.dtype)
+        probabilities[self.indices] = np.abs(self.values) ** 2
+        return probabilities
+    
+    def close(self):
+        if self.dense is not None:
+            self.dense.close()
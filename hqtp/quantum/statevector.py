@@ -1,73 +1,280 @@
-
+import os
 import numpy as np
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..stats import STATS
+
+# Amplitudes processed per block by in-place kernels (1 MiB of complex128)
+CHUNK_SIZE = 1 << 16
+
+_POOLS: Dict[int, ThreadPoolExecutor] = {}
+
+def _pool(num_threads: int) -> ThreadPoolExecutor:
+    """Shared thread pool of the given size, created on first use"""
+    if num_threads not in _POOLS:
+        _POOLS[num_threads] = ThreadPoolExecutor(num_threads, thread_name_prefix='hqtp-sv')
+    return _POOLS[num_threads]
 
 class QuantumRegister:
-    """Quantum state vector simulator"""
+    """
+    Quantum state vector simulator
+    
+    Gates, diffusion and measurement work in place on the state and touch it
+    a cache-sized block at a time, so the only large allocation is the state
+    itself: 8·2^n bytes at complex64 or 16·2^n at complex128. With path set
+    the state is a numpy.memmap backed by that file, for registers that do
+    not fit in memory.
     
-    def __init__(self, num_qubits: int):
+    Blocks are independent, so with num_threads > 1 they are processed by
+    a shared thread pool; NumPy releases the GIL inside each block's
+    arithmetic, so kernels and reductions scale across cores.
+    """
+    
+    def __init__(self, num_qubits: int, dtype=np.complex128, 
+                 path: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                 num_threads: Optional[int] = None):
+        """
+        Args:
+            num_qubits: Number of qubits
+            dtype: np.complex64 (half the memory) or np.complex128
+            path: File to hold the state out of core; None keeps it in memory
+            chunk_size: Amplitudes per block for in-place kernels
+            num_threads: Worker threads for block kernels (default: all cores)
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.complex64, np.complex128):
+            raise ValueError(f"Unsupported state precision {dtype}")
+        
         self.num_qubits = num_qubits
-        self.state = np.zeros(2**num_qubits, dtype=complex)
+        self.chunk_size = chunk_size
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.path = path
+        if path is None:
+            self.state = np.zeros(2**num_qubits, dtype=dtype)
+        else:
+            # A fresh file is sparse and reads back as zeros
+            self.state = np.memmap(path, dtype=dtype, mode='w+', shape=(2**num_qubits,))
         self.state[0] = 1.0  # Initialize to |00...0⟩
+        if STATS.enabled:
+            STATS.counters['quantum.registers'] += 1
+            STATS.peak('quantum.statevector_bytes', self.state.nbytes)
+    
+    @property
+    def dtype(self) -> np.dtype:
+        return self.state.dtype
+    
+    def blocks(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (offset, view) over consecutive chunk_size slices of the state"""
+        for start in range(0, len(self.state), self.chunk_size):
+            yield start, self.state[start:start + self.chunk_size]
+    
+    def parallel_map(self, func: Callable, items: List) -> List:
+        """func over items, on the thread pool when there is more than one"""
+        if self.num_threads > 1 and len(items) > 1:
+            return list(_pool(self.num_threads).map(func, items))
+        return [func(item) for item in items]
+    
+    def block_map(self, func: Callable[[int, np.ndarray], object]) -> List:
+        """func(offset, view) over every block of the state, in parallel"""
+        return self.parallel_map(lambda item: func(*item), list(self.blocks()))
+    
+    def total(self) -> complex:
+        """Sum of all amplitudes, accumulated in double precision"""
+        return sum(self.block_map(lambda _, block: complex(block.sum(dtype=np.complex128))))
+    
+    def norm_squared(self) -> float:
+        """Sum of |amplitude|^2 over the state"""
+        return sum(self.block_map(lambda _, block: float(np.vdot(block, block).real)))
+    
+    def flush(self):
+        """Write an out-of-core state back to its file"""
+        if isinstance(self.state, np.memmap):
+            self.state.flush()
+    
+    def close(self):
+        """Release an out-of-core state and delete its file"""
+        if isinstance(self.state, np.memmap):
+            self.state._mmap.close()
+            self.state = None
+            os.remove(self.path)
     
     def apply_gate(self, gate: np.ndarray, qubits: List[int]):
-        """Apply quantum gate to specified qubits"""
+        """
+        Apply quantum gate to specified qubits
+        
+        Bit j of the gate's row/column index corresponds to qubits[j], so
+        for two qubits the basis order is (qubits[1], qubits[0]).
+        """
+        gate = np.asarray(gate, dtype=self.state.dtype)
+        if gate.shape != (2 ** len(qubits),) * 2:
+            raise ValueError(f"Gate of shape {gate.shape} does not act on {len(qubits)} qubits")
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("Gate qubits must be distinct")
+        if STATS.enabled:
+            STATS.counters['quantum.gates'] += 1
+        
         if len(qubits) == 1:
             self._apply_single_qubit_gate(gate, qubits[0])
         elif len(qubits) == 2:
             self._apply_two_qubit_gate(gate, qubits[0], qubits[1])
         else:
-            raise NotImplementedError("Gates on >2 qubits not implemented")
+            self._apply_tensor_gate(self._tensor(), gate, self._axes(qubits))
+    
+    def apply_controlled_gate(self, gate: np.ndarray, controls: List[int], 
+                              targets: List[int]):
+        """Apply gate to targets on the subspace where every control qubit is 1"""
+        gate = np.asarray(gate, dtype=self.state.dtype)
+        if gate.shape != (2 ** len(targets),) * 2:
+            raise ValueError(f"Gate of shape {gate.shape} does not act on {len(targets)} qubits")
+        if set(controls) & set(targets):
+            raise ValueError("Control and target qubits must be distinct")
+        if STATS.enabled:
+            STATS.counters['quantum.controlled_gates'] += 1
+        
+        # Fixing the control axes at 1 leaves a view of the controlled subspace
+        tensor = self._tensor()
+        control_axes = set(self._axes(controls))
+        index = tuple(1 if axis in control_axes else slice(None) 
+                      for axis in range(self.num_qubits))
+        remaining = [axis for axis in range(self.num_qubits) if axis not in control_axes]
+        axes = [remaining.index(axis) for axis in self._axes(targets)]
+        self._apply_tensor_gate(tensor[index], gate, axes)
+    
+    def apply_diagonal(self, phases: np.ndarray, qubits: List[int]):
+        """
+        Multiply each amplitude by phases[k], where bit j of k is the value
+        of qubits[j] in its basis state (one pass, no gate contraction)
+        """
+        phases = np.asarray(phases, dtype=self.state.dtype)
+        if phases.shape != (2 ** len(qubits),):
+            raise ValueError(f"Diagonal of shape {phases.shape} does not act on {len(qubits)} qubits")
+        if STATS.enabled:
+            STATS.counters['quantum.diagonal_gates'] += 1
+        
+        def kernel(start, block):
+            basis = np.arange(start, start + len(block), dtype=np.int64)
+            index = np.zeros(len(block), dtype=np.int64)
+            for j, qubit in enumerate(qubits):
+                index |= ((basis >> qubit) & 1) << j
+            block *= phases[index]
+        
+        self.block_map(kernel)
+    
+    def _tensor(self) -> np.ndarray:
+        """View of the state as a (2,)*n tensor; axis 0 is the highest qubit"""
+        return self.state.reshape((2,) * self.num_qubits)
+    
+    def _axes(self, qubits: List[int]) -> List[int]:
+        return [self.num_qubits - 1 - q for q in qubits]
+    
+    def _apply_tensor_gate(self, tensor: np.ndarray, gate: np.ndarray, axes: List[int]):
+        """
+        Contract gate into the given tensor axes, writing the result back in place
+        
+        The leading non-gate axes are looped over so that each contraction
+        (and its temporary) covers at most chunk_size amplitudes.
+        """
+        k = len(axes)
+        # Reversed so that tensor axis j of the gate is its (k-1-j)-th index bit
+        order = axes[::-1]
+        gate_tensor = gate.reshape((2,) * (2 * k))
+        
+        outer = []
+        size = tensor.size
+        for axis in range(tensor.ndim):
+            if size <= self.chunk_size:
+                break
+            if axis not in axes:
+                outer.append(axis)
+                size //= 2
+        
+        # Fixing outer axes removes them, shifting later gate axes down
+        block_order = [axis - sum(1 for o in outer if o < axis) for axis in order]
+        
+        def kernel(bits):
+            index = [slice(None)] * tensor.ndim
+            for axis, bit in zip(outer, bits):
+                index[axis] = bit
+            block = tensor[tuple(index)]
+            result = np.tensordot(gate_tensor, block, axes=(list(range(k, 2 * k)), block_order))
+            block[...] = np.moveaxis(result, list(range(k)), block_order)
+        
+        self.parallel_map(kernel, list(np.ndindex(*(2,) * len(outer))))
     
     def _apply_single_qubit_gate(self, gate: np.ndarray, qubit: int):
         """Apply single-qubit gate"""
-        new_state = np.zeros_like(self.state)
+        # Amplitude pairs differing in bit 'qubit' are view[:, 0, :] / view[:, 1, :]
+        view = self.state.reshape(-1, 2, 2 ** qubit)
+        rows = max(1, self.chunk_size // (2 * view.shape[2]))
+        cols = min(view.shape[2], self.chunk_size)
         
-        for i in range(len(self.state)):
-            # Extract bit at position 'qubit'
-            bit = (i >> qubit) & 1
-            other_bits = i ^ (bit << qubit)
-            
-            # Apply gate
-            for new_bit in [0, 1]:
-                new_i = other_bits | (new_bit << qubit)
-                new_state[new_i] += gate[new_bit, bit] * self.state[i]
+        def kernel(block):
+            r, c = block
+            low = view[r:r + rows, 0, c:c + cols]
+            high = view[r:r + rows, 1, c:c + cols]
+            saved = low.copy()
+            low *= gate[0, 0]
+            low += gate[0, 1] * high
+            high *= gate[1, 1]
+            high += gate[1, 0] * saved
         
-        self.state = new_state
+        self.parallel_map(kernel, [(r, c) for r in range(0, view.shape[0], rows) 
+                                   for c in range(0, view.shape[2], cols)])
     
     def _apply_two_qubit_gate(self, gate: np.ndarray, qubit1: int, qubit2: int):
         """Apply two-qubit gate"""
-        new_state = np.zeros_like(self.state)
-        
-        for i in range(len(self.state)):
-            bit1 = (i >> qubit1) & 1
-            bit2 = (i >> qubit2) & 1
-            other_bits = i ^ (bit1 << qubit1) ^ (bit2 << qubit2)
-            
-            # Two-qubit basis state
-            basis_state = (bit2 << 1) | bit1
-            
-            for new_basis in range(4):
-                new_bit1 = new_basis & 1
-                new_bit2 = (new_basis >> 1) & 1
-                new_i = other_bits | (new_bit1 << qubit1) | (new_bit2 << qubit2)
-                
-                new_state[new_i] += gate[new_basis, basis_state] * self.state[i]
-        
-        self.state = new_state
+        self._apply_tensor_gate(self._tensor(), gate, self._axes([qubit1, qubit2]))
     
     def measure(self) -> List[int]:
         """Measure all qubits, returning classical bit string"""
-        probabilities = np.abs(self.state) ** 2
-        outcome = np.random.choice(len(self.state), p=probabilities)
+        return self.sample(1, as_bits=True)[0].tolist()
+    
+    def sample_indices(self, shots: int) -> np.ndarray:
+        """
+        Basis indices of shots independent measurements
         
-        # Convert to bit string
-        bits = []
-        for i in range(self.num_qubits):
-            bits.append((outcome >> i) & 1)
+        Inverse CDF sampling a block at a time: block masses are summed
+        once, all uniforms are drawn in one call and routed to their blocks,
+        and each block that received draws builds its cumulative sum once.
+        No 2^n probability array is allocated.
+        """
+        blocks = list(self.blocks())
+        masses = np.array(self.block_map(lambda _, block: float(np.vdot(block, block).real)))
+        bounds = np.cumsum(masses)
+        targets = np.random.random(shots) * bounds[-1]
         
-        return bits
+        owners = np.minimum(np.searchsorted(bounds, targets, side='right'), len(blocks) - 1)
+        outcomes = np.empty(shots, dtype=np.int64)
+        for b in np.unique(owners):
+            start, block = blocks[b]
+            chosen = owners == b
+            cumulative = np.cumsum(np.abs(block) ** 2)
+            local = targets[chosen] - (bounds[b] - masses[b])
+            offsets = np.searchsorted(cumulative, local, side='right')
+            outcomes[chosen] = start + np.minimum(offsets, len(block) - 1)
+        return outcomes
+    
+    def sample(self, shots: int, as_bits: bool = False):
+        """
+        Measure all qubits shots times (the state is not collapsed)
+        
+        Returns:
+            {basis index: count}, or with as_bits a (shots, num_qubits)
+            uint8 matrix with qubit j in column j, as in measure()
+        """
+        outcomes = self.sample_indices(shots)
+        if as_bits:
+            return ((outcomes[:, None] >> np.arange(self.num_qubits)) & 1).astype(np.uint8)
+        values, counts = np.unique(outcomes, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
     
     def get_probabilities(self) -> np.ndarray:
         """Get measurement probabilities for all basis states"""
-        return np.abs(self.state) ** 2
+        probabilities = np.empty(len(self.state), dtype=self.state.real.dtype)
+        
+        def kernel(start, block):
+            np.abs(block, out=probabilities[start:start + len(block)])
+            np.square(probabilities[start:start + len(block)], out=probabilities[start:start + len(block)])
+        
+        self.block_map(kernel)
+        return probabilities
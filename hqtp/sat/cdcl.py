@@ -1,6 +1,9 @@
 
-from typing import List, Set, Dict, Optional, Tuple
+from typing import List, Set, Dict, Optional, Tuple, Union
 from .cnf import CNFFormula, Clause, Literal
+from ..budget import PartialResult
+from ..stats import STATS
+from ..logic.parser import atom_name, is_ground_term
 
 class CDCLSolver:
     """Conflict-Driven Clause Learning SAT solver"""
@@ -12,6 +15,18 @@ class CDCLSolver:
         self.antecedent: Dict[int, Optional[Clause]] = {}  # Variable -> antecedent clause
         self.level = 0
         self.decision_stack: List[int] = []
+        self.trail: List[int] = []  # Assigned variables in assignment order
+        self.learned: List[Clause] = []
+        self.activity: Dict[int, float] = {}  # VSIDS score per variable
+        self.activity_inc = 1.0
+        self.phase: Dict[int, bool] = {}  # Last value of each unassigned variable
+        self.var_map: Dict[str, int] = {}  # Ground atom -> variable number
+        self.assumptions: List[Literal] = []  # Assumptions of the current solve call
+        self.failed_assumption: Optional[Literal] = None  # Set when assumptions are refuted
+        self.failed_core: List[Literal] = []  # Assumptions jointly refuted (see analyze_final)
+        self.conflicts = 0
+        self.decisions = 0
+        self.best: Optional[Tuple[int, Dict[int, bool]]] = None  # (unsatisfied, assignment)
         
     def add_clauses(self, clauses):
         """Add clauses to the formula"""
@@ -20,39 +35,123 @@ class CDCLSolver:
             self.formula.add_clause(cnf_clause)
     
     def _convert_to_cnf_clause(self, clause) -> Clause:
-        """Convert internal clause representation to CNF clause"""
+        """
+        Convert internal clause representation to CNF clause
+        
+        Each distinct ground atom (predicate and arguments) is one variable,
+        which is exact only for ground clauses; clauses with variables are
+        rejected and belong to logic.resolution.ResolutionProver.
+        """
         literals = []
-        var_map = {}  # Map predicate names to variable numbers
+        var_map = self.var_map  # Shared so an atom keeps its number across clauses
         
         for lit in clause.literals:
-            if lit.predicate not in var_map:
-                var_map[lit.predicate] = len(var_map) + 1
+            if not all(is_ground_term(arg) for arg in lit.args):
+                raise ValueError(f"CDCL needs ground clauses, got {atom_name(lit)}")
+            name = atom_name(lit)
+            if name not in var_map:
+                var_map[name] = self.new_variable()
             
-            var = var_map[lit.predicate]
+            var = var_map[name]
             cnf_lit = Literal(var, lit.positive)
             literals.append(cnf_lit)
         
         return Clause(literals)
     
-    def solve(self) -> Optional[Dict[int, bool]]:
-        """Main CDCL solving loop"""
+    def new_variable(self) -> int:
+        """Allocate a fresh variable number"""
+        self.formula.num_vars += 1
+        return self.formula.num_vars
+    
+    def solve(self, assumptions: List[Literal] = None, checkpoint=None,
+              budget=None) -> Optional[Union[Dict[int, bool], PartialResult]]:
+        """
+        Main CDCL solving loop
+        
+        The solver is incremental: clauses may be added between calls and
+        learned clauses are kept. Assumptions are decided first, one per
+        decision level, and hold only for this call.
+        
+        Args:
+            assumptions: Literals to assume true for this call
+            checkpoint: Optional checkpoint.Checkpointer, consulted after
+                every conflict to write periodic snapshots
+            budget: Optional budget.Budget, ticked once per propagation
+                round
+        
+        Returns:
+            Satisfying assignment, or None if the formula is unsatisfiable
+            under the assumptions (failed_assumption is then set to the
+            assumption found false, or None if the formula itself is UNSAT,
+            and failed_core to the assumptions responsible), or a
+            PartialResult if the budget ran out
+        """
+        assumptions = list(assumptions or [])
+        if assumptions or self.assumptions:
+            self.backtrack_to(0)
+        self.assumptions = assumptions
+        self.failed_assumption = None
+        self.failed_core = []
+        self.best = None
+        
         while True:
+            if budget is not None and budget.tick():
+                return self.partial_result(budget.reason)
+            
             conflict_clause = self.unit_propagation()
             
             if conflict_clause is not None:
+                self.backtrack_to(self.conflict_level(conflict_clause))
                 if self.level == 0:
                     return None  # UNSAT
                 
                 learned = self.analyze_conflict(conflict_clause)
                 self.add_learned_clause(learned)
                 self.backtrack(learned)
+                
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(self)
+                if budget is not None and self.conflicts % budget.check_every == 0:
+                    self.record_best()
             else:
+                if self.level < len(assumptions):
+                    if not self.decide_assumption(assumptions[self.level]):
+                        self.failed_core = self.analyze_final(self.failed_assumption)
+                        return None
+                    continue
+                
                 if self.all_variables_assigned():
                     return self.assignment.copy()
                 
                 if not self.decide_next_branch():
                     return self.assignment.copy()
     
+    def record_best(self):
+        """
+        Keep the current assignment, completed with saved phases, if it
+        leaves fewer original clauses unsatisfied than the best so far
+        """
+        candidate = {var: self.assignment.get(var, self.phase.get(var, True))
+                     for var in range(1, self.formula.num_vars + 1)}
+        learned = {id(clause) for clause in self.learned}
+        unsatisfied = sum(1 for clause in self.formula.clauses
+                          if id(clause) not in learned and
+                          not any(candidate[lit.var] == lit.positive for lit in clause.literals))
+        if self.best is None or unsatisfied < self.best[0]:
+            self.best = (unsatisfied, candidate)
+    
+    def partial_result(self, reason: str) -> PartialResult:
+        """Best assignment and search progress, for a solve cut short"""
+        self.record_best()
+        unsatisfied, assignment = self.best
+        return PartialResult(reason, assignment, unsatisfied, len(self.learned), {
+            'conflicts': self.conflicts,
+            'decisions': self.decisions,
+            'assigned': len(self.assignment),
+            'variables': self.formula.num_vars,
+            'level': self.level,
+        })
+    
     def solve_partial(self) -> bool:
         """Partial solve for hybrid dispatch"""
         conflict_clause = self.unit_propagation()
@@ -63,6 +162,7 @@ class CDCLSolver:
         conflict_clause = self.unit_propagation()
         
         if conflict_clause is not None:
+            self.backtrack_to(self.conflict_level(conflict_clause))
             if self.level == 0:
                 return False  # UNSAT
             
@@ -129,6 +229,9 @@ class CDCLSolver:
         self.assignment[var] = value
         self.decision_level[var] = self.level
         self.antecedent[var] = antecedent
+        self.trail.append(var)
+        if STATS.enabled and antecedent is not None:
+            STATS.counters['cdcl.propagations'] += 1
     
     def decide_next_branch(self) -> bool:
         """Make next decision"""
@@ -138,41 +241,133 @@ class CDCLSolver:
         if not unassigned:
             return False
         
-        # Simple decision heuristic: pick first unassigned variable
-        var = unassigned[0]
+        # VSIDS: most active variable first, lowest index on ties, saved phase
+        var = max(unassigned, key=lambda v: (self.activity.get(v, 0.0), -v))
         self.level += 1
-        self.assign_variable(var, True, None)
+        self.decisions += 1
+        if STATS.enabled:
+            STATS.counters['cdcl.decisions'] += 1
+        self.assign_variable(var, self.phase.get(var, True), None)
         self.decision_stack.append(var)
         
         return True
     
+    def decide_assumption(self, lit: Literal) -> bool:
+        """Open a decision level for an assumption; False if it is already false"""
+        value = self.assignment.get(lit.var)
+        if value is not None and value != lit.positive:
+            self.failed_assumption = lit
+            return False
+        
+        self.level += 1
+        self.decision_stack.append(lit.var)
+        if value is None:
+            self.assign_variable(lit.var, lit.positive, None)
+        # An assumption that already holds gets an empty level
+        return True
+    
+    def analyze_final(self, failed: Literal) -> List[Literal]:
+        """
+        Assumptions that together force the failed assumption false
+        
+        Walks the trail back from the failed variable through antecedents;
+        every decision reached is an earlier assumption. The failed
+        assumption itself is included, so the result is a conflicting
+        subset of the assumptions.
+        """
+        core = [failed]
+        seen = {failed.var}
+        for var in reversed(self.trail):
+            if var not in seen:
+                continue
+            antecedent = self.antecedent[var]
+            if antecedent is None:
+                core.append(Literal(var, self.assignment[var]))
+                continue
+            for lit in antecedent.literals:
+                if self.decision_level[lit.var] > 0:
+                    seen.add(lit.var)
+        return core
+    
+    def conflict_level(self, conflict_clause: Clause) -> int:
+        """Highest decision level among the literals of a falsified clause"""
+        return max((self.decision_level[lit.var] for lit in conflict_clause.literals), 
+                   default=0)
+    
+    def bump_activity(self, var: int):
+        """Increase the VSIDS score of a variable involved in a conflict"""
+        self.activity[var] = self.activity.get(var, 0.0) + self.activity_inc
+        if self.activity[var] > 1e100:
+            # Rescale to avoid overflow
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.activity_inc *= 1e-100
+    
     def analyze_conflict(self, conflict_clause: Clause) -> Clause:
-        """Analyze conflict and derive learned clause"""
-        # Simplified conflict analysis - just return the conflict clause
-        # TODO: Implement proper conflict analysis with resolution
-        return conflict_clause
+        """Analyze conflict and derive learned clause (first UIP)"""
+        self.conflicts += 1
+        if STATS.enabled:
+            STATS.counters['cdcl.conflicts'] += 1
+        seen = set()
+        learned = []
+        pending = 0  # Seen literals of the current level not yet resolved
+        clause = conflict_clause
+        index = len(self.trail) - 1
+        
+        while True:
+            for lit in clause.literals:
+                var = lit.var
+                if var in seen or self.decision_level[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump_activity(var)
+                if self.decision_level[var] == self.level:
+                    pending += 1
+                else:
+                    learned.append(lit)
+            
+            # Walk back to the most recent seen variable on the trail
+            while self.trail[index] not in seen:
+                index -= 1
+            var = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.antecedent[var]
+        
+        # The first UIP, negated
+        learned.append(Literal(var, not self.assignment[var]))
+        self.activity_inc /= 0.95
+        if STATS.enabled:
+            STATS.counters['cdcl.learned_literals'] += len(learned)
+        return Clause(learned)
     
     def add_learned_clause(self, clause: Clause):
         """Add learned clause to formula"""
         self.formula.add_clause(clause)
+        self.learned.append(clause)
     
     def backtrack(self, learned_clause: Clause):
-        """Backtrack to appropriate decision level"""
-        # Simple backtracking: go back one level
-        if self.level > 0:
-            self.level -= 1
-            
-            # Remove assignments from higher levels
-            to_remove = [var for var, level in self.decision_level.items() 
-                        if level > self.level]
-            
-            for var in to_remove:
-                del self.assignment[var]
-                del self.decision_level[var]
-                del self.antecedent[var]
-            
-            if self.decision_stack:
-                self.decision_stack.pop()
+        """Backjump to the second highest level in the learned clause"""
+        levels = [self.decision_level[lit.var] for lit in learned_clause.literals 
+                  if lit.var in self.decision_level]
+        levels.sort()
+        self.backtrack_to(levels[-2] if len(levels) > 1 else 0)
+    
+    def backtrack_to(self, level: int):
+        """Undo all assignments above the given decision level"""
+        if STATS.enabled and level < self.level:
+            STATS.counters['cdcl.backtracks'] += 1
+        while self.trail and self.decision_level[self.trail[-1]] > level:
+            var = self.trail.pop()
+            self.phase[var] = self.assignment[var]  # Phase saving
+            del self.assignment[var]
+            del self.decision_level[var]
+            del self.antecedent[var]
+        
+        del self.decision_stack[level:]
+        self.level = level
     
     def all_variables_assigned(self) -> bool:
         """Check if all variables are assigned"""
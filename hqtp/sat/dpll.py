@@ -1,11 +1,17 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 from .cnf import CNFFormula, Clause, Literal
+from ..budget import PartialResult
+
+class _OutOfBudget(Exception):
+    pass
 
 class DPLLSolver:
     """Basic DPLL SAT solver (without modern CDCL features)"""
     
     def __init__(self):
         self.assignment: Dict[int, bool] = {}
+        self.branches = 0
+        self.budget = None
         
     def unit_propagate(self, formula: CNFFormula) -> Optional[bool]:
         """Perform unit propagation"""
@@ -13,9 +19,6 @@ class DPLLSolver:
         while changed:
             changed = False
             for clause in formula.clauses:
-                if clause.is_empty():
-                    return False  # UNSAT
-                    
                 unassigned = []
                 for lit in clause.literals:
                     if lit.var in self.assignment:
@@ -24,6 +27,8 @@ class DPLLSolver:
                     else:
                         unassigned.append(lit)
                 else:  # Clause not satisfied
+                    if not unassigned:
+                        return False  # Falsified (or empty): UNSAT on this branch
                     if len(unassigned) == 1:
                         lit = unassigned[0]
                         self.assignment[lit.var] = lit.positive
@@ -31,8 +36,32 @@ class DPLLSolver:
                         
         return None  # No conclusion
         
-    def solve(self, formula: CNFFormula) -> bool:
-        """Solve CNF formula using DPLL algorithm"""
+    def solve(self, formula: CNFFormula, budget=None) -> Union[bool, PartialResult]:
+        """
+        Solve CNF formula using DPLL algorithm
+        
+        With a budget.Budget, ticked once per branch, the search returns a
+        PartialResult holding the assignment on the current branch (free
+        variables set true) if the budget runs out.
+        """
+        self.budget = budget
+        try:
+            return self._solve(formula)
+        except _OutOfBudget:
+            candidate = {var: self.assignment.get(var, True)
+                         for var in range(1, formula.num_vars + 1)}
+            unsatisfied = sum(1 for clause in formula.clauses
+                              if not any(candidate[lit.var] == lit.positive for lit in clause.literals))
+            return PartialResult(budget.reason, candidate, unsatisfied, 0,
+                                 {'branches': self.branches, 'assigned': len(self.assignment),
+                                  'variables': formula.num_vars})
+        finally:
+            self.budget = None
+    
+    def _solve(self, formula: CNFFormula) -> bool:
+        if self.budget is not None and self.budget.tick():
+            raise _OutOfBudget()
+        
         # Unit propagation
         result = self.unit_propagate(formula)
         if result is not None:
@@ -47,17 +76,22 @@ class DPLLSolver:
         # Choose variable to branch on
         for var in range(1, formula.num_vars + 1):
             if var not in self.assignment:
+                # Propagation below a branch is undone before the next one
+                saved = dict(self.assignment)
+                
                 # Try var = True
+                self.branches += 1
                 self.assignment[var] = True
-                if self.solve(formula):
+                if self._solve(formula):
                     return True
                     
                 # Try var = False
+                self.assignment = dict(saved)
                 self.assignment[var] = False
-                if self.solve(formula):
+                if self._solve(formula):
                     return True
                     
-                del self.assignment[var]
+                self.assignment = saved
                 return False
                 
         return True  # All variables assigned
\ No newline at end of file
@@ -0,0 +1,231 @@
+import math
+from typing import Dict, List, Optional, Tuple
+from .cnf import CNFFormula, Clause, Literal
+
+# A literal permutation: (var, positive) -> (var, positive), moved literals only
+Permutation = Dict[Tuple[int, bool], Tuple[int, bool]]
+
+class ClauseGraph:
+    """
+    Colored clause-literal graph of a CNF formula
+    
+    Vertex 2(v-1) is literal v and 2(v-1)+1 is literal ~v (color 0), joined
+    by an edge so complements stay paired; each clause is a vertex of color
+    1 adjacent to its literals. Automorphisms of this graph that fix the
+    colors are exactly the literal permutations mapping the clause set onto
+    itself and commuting with negation.
+    """
+    
+    def __init__(self, formula: CNFFormula, clauses: List[Clause] = None):
+        clauses = formula.clauses if clauses is None else clauses
+        self.num_vars = formula.num_vars
+        num_literals = 2 * self.num_vars
+        self.size = num_literals + len(clauses)
+        self.adjacency: List[set] = [set() for _ in range(self.size)]
+        self.colors = [0] * num_literals + [1] * len(clauses)
+        
+        for var in range(1, self.num_vars + 1):
+            self._connect(self.vertex(var, True), self.vertex(var, False))
+        for k, clause in enumerate(clauses):
+            for lit in clause.literals:
+                self._connect(num_literals + k, self.vertex(lit.var, lit.positive))
+    
+    def _connect(self, u: int, v: int):
+        self.adjacency[u].add(v)
+        self.adjacency[v].add(u)
+    
+    @staticmethod
+    def vertex(var: int, positive: bool) -> int:
+        return 2 * (var - 1) + (0 if positive else 1)
+    
+    @staticmethod
+    def literal(vertex: int) -> Tuple[int, bool]:
+        return vertex // 2 + 1, vertex % 2 == 0
+    
+    def refine(self, colors: List[int]) -> List[int]:
+        """
+        Coarsest equitable refinement of a coloring
+        
+        Each round recolors a vertex by its color and the multiset of its
+        neighbours' colors. New colors are ranks of these signatures, so the
+        result depends only on the graph and the input coloring, never on
+        vertex numbers; isomorphic inputs give matching outputs.
+        """
+        count = len(set(colors))
+        while True:
+            signatures = [(colors[v], tuple(sorted(colors[u] for u in self.adjacency[v])))
+                          for v in range(self.size)]
+            ranks = {sig: rank for rank, sig in enumerate(sorted(set(signatures)))}
+            colors = [ranks[sig] for sig in signatures]
+            if len(ranks) == count:
+                return colors
+            count = len(ranks)
+    
+    @staticmethod
+    def individualize(colors: List[int], vertex: int) -> List[int]:
+        """Split vertex off its color class, ahead of the rest of the class"""
+        return [2 * c - (1 if v == vertex else 0) + 1 for v, c in enumerate(colors)]
+    
+    @staticmethod
+    def target_cell(colors: List[int]) -> Optional[List[int]]:
+        """Vertices of the non-singleton class with the smallest color"""
+        classes: Dict[int, List[int]] = {}
+        for v, c in enumerate(colors):
+            classes.setdefault(c, []).append(v)
+        cells = [classes[c] for c in sorted(classes) if len(classes[c]) > 1]
+        return cells[0] if cells else None
+    
+    def is_automorphism(self, mapping: List[int]) -> bool:
+        for u in range(self.size):
+            if self.colors[mapping[u]] != self.colors[u]:
+                return False
+            if {mapping[v] for v in self.adjacency[u]} != self.adjacency[mapping[u]]:
+                return False
+        return True
+
+def _orbits(size: int, generators: List[List[int]]) -> List[int]:
+    """Orbit representative of every vertex under the group generated"""
+    parent = list(range(size))
+    
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+    
+    for mapping in generators:
+        for v in range(size):
+            a, b = find(v), find(mapping[v])
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+    return [find(v) for v in range(size)]
+
+class SymmetryResult:
+    """Generators found by find_symmetries, with summary statistics"""
+    
+    def __init__(self, num_vars: int, generators: List[Permutation], orbit_sizes: List[int]):
+        self.num_vars = num_vars
+        self.generators = generators
+        self.orbit_sizes = orbit_sizes  # Per search level, for the group order bound
+    
+    @property
+    def moved_vars(self) -> int:
+        return len({var for gen in self.generators for var, _ in gen})
+    
+    @property
+    def group_size_log10(self) -> float:
+        """log10 of a lower bound on the automorphism group order"""
+        return sum(math.log10(size) for size in self.orbit_sizes)
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            'generators': len(self.generators),
+            'moved_vars': self.moved_vars,
+            'moved_fraction': self.moved_vars / self.num_vars if self.num_vars else 0.0,
+            'group_size_log10': self.group_size_log10,
+        }
+
+def find_symmetries(formula: CNFFormula, clauses: List[Clause] = None,
+                    max_vertices: int = 50000) -> SymmetryResult:
+    """
+    Automorphism generators of a formula's clause-literal graph
+    
+    Individualization-refinement search: the first path individualizes the
+    first vertex of the target cell at each level down to a discrete
+    coloring. Working from the deepest level up, every other vertex of the
+    level's cell that is not already in the first vertex's orbit is
+    individualized instead and followed greedily to a leaf; if the leaves
+    differ by an automorphism it becomes a generator. Every generator is
+    verified, so the result is sound though not always complete.
+    
+    Args:
+        formula: Formula whose variables are permuted
+        clauses: Clauses to preserve (default: all of formula's)
+        max_vertices: Skip the search on larger graphs
+    
+    Returns:
+        SymmetryResult with literal-permutation generators
+    """
+    graph = ClauseGraph(formula, clauses)
+    if graph.size > max_vertices or graph.size == 0:
+        return SymmetryResult(formula.num_vars, [], [])
+    
+    def leaf(colors: List[int]) -> List[int]:
+        while True:
+            cell = graph.target_cell(colors)
+            if cell is None:
+                return colors
+            colors = graph.refine(graph.individualize(colors, cell[0]))
+    
+    # First path: colorings and target cells level by level
+    path = []
+    colors = graph.refine(graph.colors)
+    while True:
+        cell = graph.target_cell(colors)
+        if cell is None:
+            break
+        path.append((colors, cell))
+        colors = graph.refine(graph.individualize(colors, cell[0]))
+    first_leaf = colors
+    by_color = {c: v for v, c in enumerate(first_leaf)}
+    
+    generators: List[List[int]] = []
+    orbit_sizes = []
+    for colors, cell in reversed(path):
+        first = cell[0]
+        for vertex in cell[1:]:
+            orbits = _orbits(graph.size, generators)
+            if orbits[vertex] == orbits[first]:
+                continue
+            other = leaf(graph.refine(graph.individualize(colors, vertex)))
+            mapping = [by_color.get(c, -1) for c in other]
+            # mapping[v]: vertex of the first leaf with v's color in the other leaf
+            inverse = [0] * graph.size
+            for v, image in enumerate(mapping):
+                inverse[image] = v
+            if -1 not in mapping and graph.is_automorphism(inverse):
+                generators.append(inverse)
+        orbits = _orbits(graph.size, generators)
+        orbit_sizes.append(sum(1 for v in cell if orbits[v] == orbits[first]))
+    
+    permutations = []
+    for mapping in generators:
+        permutation: Permutation = {}
+        for var in range(1, formula.num_vars + 1):
+            image = graph.literal(mapping[graph.vertex(var, True)])
+            if image != (var, True):
+                permutation[(var, True)] = image
+        if permutation:
+            permutations.append(permutation)
+    return SymmetryResult(formula.num_vars, permutations, orbit_sizes)
+
+def lex_leader_clauses(generator: Permutation, new_variable,
+                       max_length: int = 16) -> List[Clause]:
+    """
+    CNF for x <=lex sigma(x) over the first max_length moved variables
+    
+    Variables are compared in increasing order. With e_i meaning the first
+    i positions agree (e_0 true), each position gets
+        e_{i-1} -> (x_i -> y_i)
+        e_{i-1} & (x_i <-> y_i) -> e_i
+    where y_i = sigma(x_i). Only the forcing direction of e_i is needed:
+    any solution can set e_i to exactly "prefix equal". new_variable()
+    allocates the e_i.
+    """
+    moved = sorted(var for var, _ in generator)[:max_length]
+    clauses = []
+    equal: Optional[Literal] = None  # e_{i-1}; None stands for true
+    for i, var in enumerate(moved):
+        y_var, y_positive = generator[(var, True)]
+        x, not_x = Literal(var, True), Literal(var, False)
+        y, not_y = Literal(y_var, y_positive), Literal(y_var, not y_positive)
+        prefix = [] if equal is None else [Literal(equal.var, False)]
+        
+        clauses.append(Clause(prefix + [not_x, y]))
+        if i == len(moved) - 1:
+            break
+        nxt = Literal(new_variable(), True)
+        clauses.append(Clause(prefix + [not_x, not_y, nxt]))
+        clauses.append(Clause(prefix + [x, y, nxt]))
+        equal = nxt
+    return clauses
@@ -0,0 +1,471 @@
+"""
+Long-lived prover server speaking JSON lines
+    
+    hqtp serve [--socket PATH] [--workers N] [--queue-size N] ...
+
+Reads one JSON object per line from stdin (answers go to stdout) or from
+each connection to a Unix socket, and writes one JSON object per answer,
+in completion order. A request is
+    
+    {"id": 7, "problem": "cnf(c1, axiom, p).", "format": "tptp",
+     "timeout": 5, "memory": 512, "quantum": false}
+
+with "path" instead of "problem" to read a file; format is tptp, smtlib or
+smt2 (scripts), by default taken from the path suffix or tptp. The answer
+echoes the id and has a status (unsat, sat, timeout, memout or error, or
+done for scripts; unknown when a problem with variables is neither
+refuted by resolution nor encodable as SAT), a model of predicate names
+for sat, the SMT-LIB responses of a script, and stats. {"command":
+"stats"} returns server counters.
+
+Requests run in a pool of worker processes that import the prover (and
+the backends the server's options enable) once at startup and share a
+result cache through an SQLite file. Solvers check the time and memory
+limits themselves and answer timeout or memout with a "partial" record of
+their progress (best assignment quality, derived clauses). As backstops, a
+request well past its time limit has its worker killed and replaced, and
+an address-space rlimit is set around each request. At most queue_size
+requests wait for a worker; while the queue is full the server stops
+reading input, so clients see backpressure through their blocked writes.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import selectors
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from .budget import Budget, PartialResult, limit_memory, memory_in_use, restore_memory
+
+def _problem_format(request: dict) -> str:
+    if 'format' in request:
+        return request['format']
+    path = request.get('path', '')
+    if path.endswith('.smt2'):
+        return 'smt2'
+    if path and not path.endswith('.p'):
+        return 'smtlib'
+    return 'tptp'
+
+def _check_request(request: dict) -> Optional[str]:
+    """What is wrong with a request's limits and options, or None"""
+    for key in ('timeout', 'memory'):
+        value = request.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0:
+            return f"{key} must be a non-negative number"
+    for key in ('max_qubits', 'quantum_jobs'):
+        value = request.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            return f"{key} must be a non-negative integer"
+    return None
+
+class Worker:
+    """Prover state kept warm in a worker process"""
+    
+    def __init__(self, options: dict):
+        from .bridge.cache import ResultCache
+        from .bridge.dispatcher import HybridDispatcher
+        from .logic.parser import is_ground, parse_smtlib, parse_tptp
+        from .logic.resolution import ResolutionProver
+        self.options = options
+        self.is_ground = is_ground
+        self.prover_class = ResolutionProver
+        self.parsers = {'tptp': parse_tptp, 'smtlib': parse_smtlib}
+        self.dispatcher_class = HybridDispatcher
+        self.cache = ResultCache(options['cache_size'] << 20, options['cache'])
+        # Load the optional backends now rather than on the first request
+        if options['quantum']:
+            from .bridge import decompose, offload
+            from .quantum import grover
+        if options['learning']:
+            from .learn import policies
+    
+    def handle(self, request: dict) -> dict:
+        """Answer one request (without id or timing, which the server adds)"""
+        fmt = _problem_format(request)
+        if 'problem' in request:
+            text = request['problem']
+        elif 'path' in request:
+            with open(request['path']) as f:
+                text = f.read()
+        else:
+            raise ValueError("request needs 'problem' or 'path'")
+        
+        timeout = request.get('timeout', self.options['timeout'])
+        memory = request.get('memory', self.options['memory'])
+        if memory:
+            memory = (memory_in_use() or 0) + int(memory * (1 << 20))
+        budget = Budget(time_limit=timeout, memory_limit=memory or None)
+        
+        if fmt == 'smt2':
+            from .logic.smtlib import SMTLibInterpreter
+            return {'status': 'done', 'responses': list(SMTLibInterpreter(budget).run(text))}
+        if fmt not in self.parsers:
+            raise ValueError(f"unknown format {fmt!r}")
+        clauses = self.parsers[fmt](text)
+        if not self.is_ground(clauses):
+            return self.handle_first_order(clauses, budget)
+        
+        dispatcher = self.dispatcher_class(
+            max_quantum_vars=request.get('max_qubits', self.options['max_qubits']),
+            use_quantum=request.get('quantum', self.options['quantum']),
+            use_learning=self.options['learning'],
+            quantum_jobs=request.get('quantum_jobs', self.options['quantum_jobs']),
+            break_symmetry=request.get('symmetry', True),
+            cache=self.cache)
+        model = dispatcher.solve(clauses, budget=budget)
+        
+        if isinstance(model, PartialResult):
+            status = model.reason
+        else:
+            status = 'unsat' if model is None else 'sat'
+        answer = {'status': status,
+                  'stats': {'variables': len(dispatcher.cdcl.var_map),
+                            'clauses': len(clauses),
+                            'learned': len(dispatcher.cdcl.learned),
+                            'symmetry': dispatcher.symmetry,
+                            'cache': self.cache.stats()}}
+        if isinstance(model, PartialResult):
+            answer['partial'] = model.to_dict()
+        elif model is not None:
+            answer['model'] = {name: model[var] for name, var in dispatcher.cdcl.var_map.items()
+                               if var in model}
+        return answer
+    
+    def handle_first_order(self, clauses: list, budget: Budget) -> dict:
+        """
+        Clauses with variables have no exact propositional encoding; they
+        are refuted by resolution or left undecided (status unknown)
+        """
+        prover = self.prover_class(clauses)
+        result = prover.prove(budget=budget)
+        if isinstance(result, PartialResult):
+            status = result.reason
+        else:
+            status = 'unsat' if result else 'unknown'
+        answer = {'status': status,
+                  'stats': {'given': prover.steps,
+                            'clauses': len(prover.sos) + len(prover.usable) + len(prover.used)}}
+        if isinstance(result, PartialResult):
+            answer['partial'] = result.to_dict()
+        return answer
+
+def _worker_main(conn, options: dict):
+    worker = Worker(options)
+    conn.send({'ready': os.getpid()})
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        limits = None
+        try:
+            limits = limit_memory(request.get('memory', options['memory']))
+            answer = worker.handle(request)
+        except MemoryError:
+            answer = {'status': 'memout'}
+        except Exception as e:
+            answer = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        finally:
+            restore_memory(limits)
+        conn.send(answer)
+
+class Server:
+    """Event loop: reads requests, feeds workers, enforces limits, writes answers"""
+    
+    def __init__(self, options: dict, num_workers: int = 2, queue_size: int = 64):
+        self.options = options
+        self.num_workers = max(num_workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.context = multiprocessing.get_context()
+        # poll, unlike epoll, also accepts stdin redirected from a file
+        self.selector = getattr(selectors, 'PollSelector', selectors.DefaultSelector)()
+        self.workers: Dict[int, dict] = {}  # Pid -> {process, conn, task}
+        self.pending = deque()  # (client, request) waiting for a worker
+        self.clients: Dict[int, dict] = {}  # Input fd -> {write, buffer, open, outstanding}
+        self.listener: Optional[socket.socket] = None
+        self.paused = False
+        self.started = time.monotonic()
+        self.counters = {'requests': 0, 'sat': 0, 'unsat': 0, 'unknown': 0, 'timeout': 0,
+                         'memout': 0, 'error': 0, 'restarts': 0}
+    
+    # Workers
+    
+    def spawn(self):
+        parent, child = self.context.Pipe()
+        # Not a daemon: requests with quantum_jobs start processes of their own
+        process = self.context.Process(target=_worker_main, args=(child, self.options))
+        process.start()
+        child.close()
+        self.workers[process.pid] = {'process': process, 'conn': parent, 'task': None,
+                                     'ready': False}
+        self.selector.register(parent, selectors.EVENT_READ, ('worker', process.pid))
+    
+    def retire(self, pid: int):
+        worker = self.workers.pop(pid)
+        self.selector.unregister(worker['conn'])
+        if worker['process'].is_alive():
+            worker['process'].kill()
+        worker['process'].join()
+        worker['conn'].close()
+    
+    def idle_workers(self) -> List[dict]:
+        return [w for w in self.workers.values() if w['ready'] and w['task'] is None]
+    
+    def assign(self):
+        for worker in self.idle_workers():
+            if not self.pending:
+                return
+            client, request = self.pending.popleft()
+            timeout = request.get('timeout', self.options['timeout'])
+            # Solvers stop themselves at the timeout with a partial answer;
+            # the kill is for one stuck outside a budget check
+            worker['task'] = {'client': client, 'request': request, 'started': time.monotonic(),
+                              'deadline': time.monotonic() + timeout * 1.1 + 1 if timeout else None}
+            worker['conn'].send(request)
+    
+    def finish(self, pid: int, answer: dict):
+        worker = self.workers[pid]
+        task, worker['task'] = worker['task'], None
+        request = task['request']
+        answer = dict(answer, time=round(time.monotonic() - task['started'], 6))
+        if 'id' in request:
+            answer['id'] = request['id']
+        self.counters[answer['status']] = self.counters.get(answer['status'], 0) + 1
+        self.reply(task['client'], answer)
+        
+        state = self.clients.get(task['client'])
+        if state is not None:
+            state['outstanding'] -= 1
+            if not state['open'] and not state['outstanding'] and b'\n' not in state['buffer']:
+                self.drop_client(task['client'])
+    
+    def on_worker(self, pid: int):
+        worker = self.workers[pid]
+        try:
+            message = worker['conn'].recv()
+        except EOFError:
+            # Died (e.g. killed by the OS); answer its request and replace it
+            if worker['task'] is not None:
+                self.finish(pid, {'status': 'error', 'error': 'worker died'})
+            self.retire(pid)
+            self.counters['restarts'] += 1
+            self.spawn()
+            return
+        if not worker['ready']:
+            worker['ready'] = True
+        else:
+            self.finish(pid, message)
+    
+    def expire(self):
+        now = time.monotonic()
+        for pid, worker in list(self.workers.items()):
+            task = worker['task']
+            if task is not None and task['deadline'] is not None and now >= task['deadline']:
+                self.finish(pid, {'status': 'timeout'})
+                self.retire(pid)
+                self.counters['restarts'] += 1
+                self.spawn()
+    
+    def next_deadline(self) -> Optional[float]:
+        deadlines = [w['task']['deadline'] for w in self.workers.values()
+                     if w['task'] is not None and w['task']['deadline'] is not None]
+        return max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+    
+    # Clients
+    
+    def add_client(self, read_fd: int, write):
+        self.clients[read_fd] = {'write': write, 'buffer': b'', 'open': True, 'outstanding': 0}
+        self.selector.register(read_fd, selectors.EVENT_READ, ('client', read_fd))
+    
+    def reply(self, client: int, answer: dict):
+        write = self.clients[client]['write'] if client in self.clients else None
+        if write is None:
+            return  # Client went away
+        try:
+            write((json.dumps(answer) + '\n').encode())
+        except OSError:
+            self.drop_client(client)
+    
+    def drop_client(self, client: int):
+        state = self.clients.get(client)
+        if state is None:
+            return
+        if state['open'] and not self.paused:
+            self.selector.unregister(client)
+        if client != sys.stdin.fileno():
+            os.close(client)
+        self.clients.pop(client)
+    
+    def on_client(self, client: int):
+        state = self.clients[client]
+        data = os.read(client, 1 << 16)
+        if not data:
+            # End of input: stop reading, keep answering what is queued
+            self.selector.unregister(client)
+            state['open'] = False
+            data = b'\n'
+        state['buffer'] += data
+        self.take_requests(client)
+    
+    def take_requests(self, client: int):
+        """Queue buffered request lines while the queue has room"""
+        state = self.clients[client]
+        while len(self.pending) < self.queue_size and b'\n' in state['buffer']:
+            line, state['buffer'] = state['buffer'].split(b'\n', 1)
+            if line.strip():
+                self.on_request(client, line)
+        if (not state['open'] and not state['outstanding'] and b'\n' not in state['buffer']
+                and client != sys.stdin.fileno()):
+            self.drop_client(client)
+    
+    def on_request(self, client: int, line: bytes):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self.counters['error'] += 1
+            self.reply(client, {'status': 'error', 'error': f"bad request: {e}"})
+            return
+        if request.get('command') == 'stats':
+            self.reply(client, dict(self.stats(), id=request.get('id')))
+            return
+        problem = _check_request(request)
+        if problem is not None:
+            self.counters['error'] += 1
+            answer = {'status': 'error', 'error': f"bad request: {problem}"}
+            if 'id' in request:
+                answer['id'] = request['id']
+            self.reply(client, answer)
+            return
+        self.counters['requests'] += 1
+        self.clients[client]['outstanding'] += 1
+        self.pending.append((client, request))
+    
+    def on_accept(self):
+        connection, _ = self.listener.accept()
+        fd = connection.detach()
+        self.add_client(fd, lambda data, fd=fd: _write_all(fd, data))
+    
+    def stats(self) -> dict:
+        return {'status': 'stats', 'uptime': round(time.monotonic() - self.started, 3),
+                'workers': len(self.workers), 'busy': len(self.workers) - len(self.idle_workers()),
+                'pending': len(self.pending), **self.counters}
+    
+    # Main loop
+    
+    def pause_input(self, paused: bool):
+        """Backpressure: stop reading requests and connections while the queue is full"""
+        if paused == self.paused:
+            return
+        self.paused = paused
+        sources = [(fd, ('client', fd)) for fd, state in self.clients.items() if state['open']]
+        if self.listener is not None:
+            sources.append((self.listener, ('listener', None)))
+        for source, data in sources:
+            if paused:
+                self.selector.unregister(source)
+            else:
+                self.selector.register(source, selectors.EVENT_READ, data)
+    
+    def busy(self) -> bool:
+        return (bool(self.pending) or any(w['task'] is not None for w in self.workers.values()) or
+                any(b'\n' in state['buffer'] for state in self.clients.values()))
+    
+    def serve(self, socket_path: str = None):
+        if socket_path is None:
+            self.add_client(sys.stdin.fileno(), lambda data: _write_all(sys.stdout.fileno(), data))
+        else:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(socket_path)
+            self.listener.listen()
+            self.selector.register(self.listener, selectors.EVENT_READ, ('listener', None))
+        for _ in range(self.num_workers):
+            self.spawn()
+        
+        try:
+            while True:
+                reading = any(state['open'] for state in self.clients.values())
+                if socket_path is None and not reading and not self.busy():
+                    break  # stdin closed and everything answered
+                self.pause_input(len(self.pending) >= self.queue_size)
+                for key, _ in self.selector.select(self.next_deadline()):
+                    kind, ident = key.data
+                    if kind == 'worker':
+                        if ident in self.workers:
+                            self.on_worker(ident)
+                    elif kind == 'client':
+                        if ident in self.clients and self.clients[ident]['open']:
+                            self.on_client(ident)
+                    elif kind == 'listener':
+                        self.on_accept()
+                self.expire()
+                self.assign()
+                for client in list(self.clients):
+                    if client in self.clients and b'\n' in self.clients[client]['buffer']:
+                        self.take_requests(client)
+                self.assign()
+        finally:
+            for pid in list(self.workers):
+                self.retire(pid)
+            if self.listener is not None:
+                self.listener.close()
+                os.remove(socket_path)
+
+def _write_all(fd: int, data: bytes):
+    while data:
+        data = data[os.write(fd, data):]
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='hqtp serve', description='Run a persistent prover server')
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of stdin/stdout')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Solver processes (default: one per CPU)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='Requests waiting for a worker before input is paused')
+    parser.add_argument('--timeout', type=float, default=0,
+                        help='Default per-request time limit in seconds (0: none)')
+    parser.add_argument('--memory', type=float, default=0,
+                        help='Default per-request memory limit in MiB (0: none)')
+    parser.add_argument('--cache', help='SQLite result cache shared by the workers '
+                                        '(default: a temporary one for the server lifetime)')
+    parser.add_argument('--cache-size', type=int, default=64,
+                        help='MiB of cached results each worker keeps in memory')
+    parser.add_argument('--quantum', action='store_true',
+                        help='Preload the simulator and enable quantum search by default')
+    parser.add_argument('--learning', action='store_true', help='Enable learned guidance')
+    parser.add_argument('--max-qubits', type=int, default=14)
+    parser.add_argument('--quantum-jobs', type=int, default=0,
+                        help='Background quantum searches per request (default: inline)')
+    args = parser.parse_args(argv)
+    
+    scratch = None
+    if args.cache is None:
+        scratch = tempfile.mkdtemp(prefix='hqtp-serve-')
+        args.cache = os.path.join(scratch, 'cache.sqlite')
+    options = {'timeout': args.timeout, 'memory': args.memory, 'cache': args.cache,
+               'cache_size': args.cache_size, 'quantum': args.quantum, 'learning': args.learning,
+               'max_qubits': args.max_qubits, 'quantum_jobs': args.quantum_jobs}
+    # Unwind through the cleanup below on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        Server(options, args.workers, args.queue_size).serve(args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,127 @@
+"""
+Counters and timers for the prover's hot paths
+
+The solvers report into the process-wide registry STATS, which is off by
+default. Hot loops guard each update with
+    
+    if STATS.enabled:
+        STATS.counters['cdcl.propagations'] += 1
+
+so a disabled registry costs one attribute test per event. Names are
+'<phase>.<event>'; report() groups them by phase. Timers measure whole
+phases (a dispatcher search, a resolution saturation) and include the
+time of phases nested inside them.
+
+Work done in other processes (quantum offload jobs, pool workers of
+--jobs) is counted in those processes' registries.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+class _Timer:
+    """Context manager adding its elapsed time to a registry timer"""
+    
+    __slots__ = ('stats', 'name', 'started')
+    
+    def __init__(self, stats: 'Stats', name: str):
+        self.stats = stats
+        self.name = name
+        self.started = None
+    
+    def __enter__(self):
+        if self.stats.enabled:
+            self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        if self.started is not None:
+            total = self.stats.timers.setdefault(self.name, [0.0, 0])
+            total[0] += time.perf_counter() - self.started
+            total[1] += 1
+            self.started = None
+        return False
+
+class Stats:
+    """Named counters, peak values and phase timers"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.peaks: Dict[str, float] = {}
+        self.timers: Dict[str, List[float]] = {}  # Name -> [seconds, calls]
+    
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+    
+    def reset(self):
+        self.counters.clear()
+        self.peaks.clear()
+        self.timers.clear()
+    
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter (for call sites outside the innermost loops)"""
+        if self.enabled:
+            self.counters[name] += amount
+    
+    def peak(self, name: str, value: float):
+        """Keep the largest value reported under name"""
+        if self.enabled and value > self.peaks.get(name, value - 1):
+            self.peaks[name] = value
+    
+    def timer(self, name: str) -> _Timer:
+        """Context manager timing one occurrence of a phase"""
+        return _Timer(self, name)
+    
+    def snapshot(self) -> dict:
+        """Plain-dict copy of everything recorded, for JSON output"""
+        return {
+            'counters': dict(sorted(self.counters.items())),
+            'peaks': dict(sorted(self.peaks.items())),
+            'timers': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                       for name, (seconds, calls) in sorted(self.timers.items())},
+        }
+    
+    def report(self, snapshot: Optional[dict] = None) -> str:
+        """Human-readable summary, one block per phase"""
+        snapshot = snapshot or self.snapshot()
+        phases: Dict[str, List[str]] = defaultdict(list)
+        for name, timing in snapshot['timers'].items():
+            phase, _, event = name.partition('.')
+            calls = timing['calls']
+            phases[phase].append(f"  {event:<24} {timing['seconds']:>12.3f} s"
+                                 f"  ({calls} call{'s' if calls != 1 else ''})")
+        for name, value in snapshot['counters'].items():
+            phase, _, event = name.partition('.')
+            phases[phase].append(f"  {event:<24} {value:>12}")
+        for name, value in snapshot['peaks'].items():
+            phase, _, event = name.partition('.')
+            phases[phase].append(f"  {event + ' (peak)':<24} {value:>12}")
+        
+        if not phases:
+            return "no statistics recorded"
+        return '\n'.join(f"{phase}\n" + '\n'.join(lines) for phase, lines in phases.items())
+
+# The registry every module reports into
+STATS = Stats()
+
+def profile(run, path: Optional[str] = None, limit: int = 25):
+    """
+    Call run() under cProfile
+    
+    The profile is written to path (for pstats or snakeviz) if given,
+    otherwise the limit most expensive functions by cumulative time are
+    printed to stderr. Returns what run() returned.
+    """
+    import cProfile
+    import pstats
+    import sys
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run)
+    finally:
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(limit)
@@ -0,0 +1,57 @@
+from hqtp.logic.parser import parse_tptp
+from hqtp.logic.resolution import ResolutionProver
+from hqtp.logic.variants import variant_key
+
+NEAR_HORN = """
+cnf(a1, axiom, (~e(X,Y) | ~e(Y,Z) | e(X,Z))).
+cnf(a2, axiom, (~e(X,Y) | e(Y,X))).
+cnf(a3, axiom, (~p(X) | ~e(X,Y) | p(Y))).
+cnf(a4, axiom, (~q(X) | p(X) | r(X))).
+cnf(a5, axiom, (~e(X,Y) | e(f(X),f(Y)))).
+cnf(f1, axiom, e(a,b)).
+cnf(f2, axiom, e(b,c)).
+cnf(f3, axiom, e(c,d)).
+cnf(f4, axiom, q(a)).
+cnf(f5, axiom, (p(a) | r(b))).
+cnf(g, negated_conjecture, (~p(d) | ~e(d,d))).
+"""
+
+class CountingProver(ResolutionProver):
+    """Records, per given clause, the inferences built and the expected ones"""
+    
+    def __init__(self, clauses):
+        super().__init__(clauses)
+        self.built = 0
+        self.steps_seen = []  # (built, generated, expected) per given clause
+    
+    def _build(self, literals, subst):
+        self.built += 1
+        return super()._build(literals, subst)
+    
+    def generate(self, given, inference='binary'):
+        processed = list(self.usable | self.used)
+        expected = []
+        if self._is_nucleus(given, inference):
+            expected += [r for r, _ in self._multi_inferences(given, processed, inference)]
+        for nucleus in processed:
+            if nucleus is not given and self._is_nucleus(nucleus, inference):
+                expected += [r for r, used in self._multi_inferences(nucleus, processed, inference)
+                             if any(satellite is given for satellite in used)]
+        
+        self.built = 0
+        generated = super().generate(given, inference)
+        self.steps_seen.append((self.built, generated, expected))
+        return generated
+
+def _keys(clauses):
+    return sorted(variant_key(clause) for clause in clauses)
+
+def test_multi_inferences_use_given_once_per_step():
+    for inference in ('hyper', 'neg_hyper', 'ur'):
+        prover = CountingProver(parse_tptp(NEAR_HORN))
+        prover.prove(max_steps=40, inference=inference)
+        assert prover.steps_seen
+        for built, generated, expected in prover.steps_seen:
+            # Every inference built involves given; none is thrown away
+            assert built == len(generated)
+            assert _keys(generated) == _keys(expected)
@@ -0,0 +1,18 @@
+from hqtp.logic.smtlib import SMTLibInterpreter
+
+def _run(script):
+    return list(SMTLibInterpreter().run(script))
+
+def test_malformed_terms_are_errors():
+    for term in ('(not)', '(=> a)', '(ite a b)', '()', '(let ((x)) a)', '(let x a)',
+                 '(let ((x a b)) x)', '(! a :named (b))'):
+        responses = _run(f"(declare-const a Bool)(assert {term})(check-sat)")
+        assert responses[0].startswith('(error '), term
+        # The script carries on after a rejected command
+        assert responses[1] == 'sat', term
+
+def test_truncated_script_ends_with_error():
+    responses = _run("(declare-const a Bool)(assert a)(check-sat)(assert (not a")
+    assert responses[0] == 'sat'
+    assert responses[1].startswith('(error ')
+    assert _run("(check-sat))")[-1].startswith('(error ')